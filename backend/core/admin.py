@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, Sequence
 
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
@@ -17,3 +17,8 @@ class UserAdmin(BaseUserAdmin):
     add_fieldsets = BaseUserAdmin.add_fieldsets + (
         ('Información adicional', {'fields': ('role', 'phone', 'email', 'first_name', 'last_name')}),
     )
+
+
+@admin.register(Sequence)
+class SequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'last_value')
@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
     verbose_name = 'Gestión de Usuarios'
+
+    def ready(self):
+        from .cache import connect_invalidation
+        from .database import apply_sqlite_pragmas
+        from .search import repair_sqlite_triggers
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='core.sqlite_pragmas')
+        post_migrate.connect(repair_sqlite_triggers, sender=self, dispatch_uid='core.search_triggers')
+        connect_invalidation()
@@ -0,0 +1,135 @@
+"""
+Cache de los payloads de dashboards y estadísticas
+
+Cada payload se guarda bajo un namespace ('sales', 'orders', 'inventory')
+con un número de versión. Invalidar un namespace incrementa su versión, así
+que todas las claves anteriores quedan huérfanas (y expiran solas) sin
+tener que recorrerlas.
+
+La invalidación la disparan señales post_save/post_delete de los modelos de
+INVALIDATION_MAP (conectadas en CoreConfig.ready) y llamadas explícitas a
+invalidate() en las escrituras que no pasan por save() (update() de stock).
+Se aplica al confirmar la transacción: antes del commit otra petición
+podría volver a cachear los datos viejos con la versión nueva.
+
+El backend se elige con CACHE_URL (ver parse_cache_url). Con locmem cada
+proceso tiene su propio cache y las invalidaciones no se comparten entre
+workers: para varios workers usar file:// o redis://.
+"""
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .metrics import registry
+
+# Modelo (app_label.Modelo) -> namespaces que dependen de sus datos
+INVALIDATION_MAP = {
+    'sales.Sale': ('sales',),
+    'sales.SaleItem': ('sales',),
+    'inventory.Product': ('inventory', 'sales'),
+    'inventory.Category': ('inventory',),
+    'inventory.StockMovement': ('inventory',),
+    'orders.RepairOrder': ('orders',),
+}
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def parse_cache_url(url, base_dir):
+    """
+    Arma la entrada de settings.CACHES para la URL:
+    locmem:// (por defecto), file:///ruta (relativa a base_dir) o
+    file:////ruta/absoluta, redis://host:6379/0 (requiere el paquete redis)
+    y dummy:// (sin cache).
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in CACHE_BACKENDS:
+        raise ValueError(f'CACHE_URL no soportada: {scheme or url}')
+
+    config = {'BACKEND': CACHE_BACKENDS[scheme]}
+    if scheme == 'locmem':
+        config['LOCATION'] = parts.netloc or 'puntotecno'
+    elif scheme == 'file':
+        path = Path(unquote(parts.path)[1:])
+        config['LOCATION'] = str(path if path.is_absolute() else Path(base_dir) / path)
+    elif scheme in ('redis', 'rediss'):
+        config['LOCATION'] = url
+    return config
+
+
+def _version_key(namespace):
+    return f'cache-version:{namespace}'
+
+
+def _initial_version():
+    # Si el backend expulsa la clave de versión, la nueva no debe coincidir
+    # con una anterior que todavía tenga payloads guardados
+    return time.time_ns() // 1000
+
+
+def get_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # add() no pisa la versión si otro proceso la creó recién
+        cache.add(_version_key(namespace), _initial_version(), timeout=None)
+        version = cache.get(_version_key(namespace))
+    return version
+
+
+def _bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        # La versión no existía (cache recién iniciado o expulsada)
+        cache.add(_version_key(namespace), _initial_version(), timeout=None)
+    registry.inc('puntotecno_cache_invalidations_total', namespace=namespace)
+
+
+def invalidate(*namespaces):
+    """Invalida los namespaces al confirmar la transacción actual"""
+    for namespace in namespaces:
+        transaction.on_commit(lambda namespace=namespace: _bump(namespace))
+
+
+def cached(namespace, key, build, timeout=None):
+    """
+    Retorna el payload cacheado de `key` o lo arma con build() y lo guarda.
+    Cuenta aciertos y fallos en puntotecno_cache_requests_total.
+    """
+    full_key = f'{namespace}:v{get_version(namespace)}:{key}'
+    payload = cache.get(full_key)
+    if payload is not None:
+        registry.inc('puntotecno_cache_requests_total', namespace=namespace, result='hit')
+        return payload
+
+    registry.inc('puntotecno_cache_requests_total', namespace=namespace, result='miss')
+    payload = build()
+    if timeout is None:
+        timeout = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+    cache.set(full_key, payload, timeout)
+    return payload
+
+
+def connect_invalidation():
+    """Conecta las señales de INVALIDATION_MAP (llamado desde CoreConfig.ready)"""
+    from django.apps import apps
+    from django.db.models.signals import post_delete, post_save
+
+    for label, namespaces in INVALIDATION_MAP.items():
+        def receiver(sender, namespaces=namespaces, **kwargs):
+            invalidate(*namespaces)
+
+        model = apps.get_model(label)
+        post_save.connect(receiver, sender=model, weak=False, dispatch_uid=f'cache:{label}:save')
+        post_delete.connect(receiver, sender=model, weak=False, dispatch_uid=f'cache:{label}:delete')
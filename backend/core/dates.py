@@ -0,0 +1,157 @@
+"""
+Rangos de fechas en la zona horaria del negocio (TIME_ZONE)
+
+Los filtros por día se resuelven una sola vez a límites datetime
+semiabiertos [inicio, fin) en lugar de usar lookups __date, que convierten
+la columna fila por fila y no pueden usar índices. Los días con cambio de
+horario (23 o 25 horas) quedan bien delimitados porque cada límite es la
+medianoche local convertida por separado.
+
+Parámetros que entienden los endpoints:
+- ?period=today|week|month (semana desde el lunes, mes desde el día 1)
+- ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD (inclusive, período 'custom')
+- ?date=YYYY-MM-DD (un solo día)
+"""
+import calendar
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+DATE_FORMAT = '%Y-%m-%d'
+INVALID_DATE = 'Formato de fecha inválido. Use YYYY-MM-DD'
+PERIODS = ('today', 'week', 'month')
+
+
+def local_midnight(day):
+    """Inicio del día local `day` como datetime aware"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_range(date_from, date_to=None):
+    """Límites [inicio, fin) de los días locales date_from..date_to (inclusive)"""
+    date_to = date_to or date_from
+    return local_midnight(date_from), local_midnight(date_to + timedelta(days=1))
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def previous_period(date_from, date_to, by_month=None):
+    """
+    Período anterior equivalente a date_from..date_to (inclusive).
+
+    Un período por mes (by_month=True, o por defecto un mes calendario
+    completo) se compara con los mismos días del mes anterior, recortado a
+    su largo (1..18 de octubre -> 1..18 de septiembre); un mes completo,
+    con el mes anterior completo. Cualquier otro rango, incluido un solo
+    día aunque sea el 1º, se compara con la misma cantidad de días
+    inmediatamente anteriores.
+    """
+    if by_month is None:
+        by_month = (
+            date_from.day == 1 and date_to == month_end(date_to)
+            and (date_from.year, date_from.month) == (date_to.year, date_to.month)
+        )
+
+    if by_month:
+        previous_end = date_from - timedelta(days=1)
+        previous_start = previous_end.replace(day=1)
+        if date_to == month_end(date_to):
+            # Mes completo contra mes completo (31 días de marzo -> 28 de febrero)
+            return previous_start, previous_end
+        span = min((date_to - date_from).days, (previous_end - previous_start).days)
+        return previous_start, previous_start + timedelta(days=span)
+
+    length = date_to - date_from
+    previous_end = date_from - timedelta(days=1)
+    return previous_end - length, previous_end
+
+
+def parse_day(value):
+    """'YYYY-MM-DD' -> date. Lanza ValueError con el mensaje para el usuario"""
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        raise ValueError(INVALID_DATE)
+
+
+class DateRange:
+    """Días locales date_from..date_to (inclusive) y sus límites [start, end)"""
+
+    def __init__(self, date_from, date_to, period='custom'):
+        if date_to < date_from:
+            raise ValueError('date_from no puede ser posterior a date_to')
+        self.date_from = date_from
+        self.date_to = date_to
+        self.period = period
+        self.start, self.end = day_range(date_from, date_to)
+
+    def lookups(self, field):
+        """Filtro sargable sobre un DateTimeField: {campo__gte, campo__lt}"""
+        return {f'{field}__gte': self.start, f'{field}__lt': self.end}
+
+    def previous(self):
+        by_month = True if self.period == 'month' else None
+        return DateRange(
+            *previous_period(self.date_from, self.date_to, by_month=by_month),
+            period=self.period
+        )
+
+    def __repr__(self):
+        return f'<DateRange {self.period} {self.date_from}..{self.date_to}>'
+
+
+def resolve_period(params, default='month', today=None):
+    """
+    Rango de los parámetros ?date_from/?date_to (ambos), ?date o ?period.
+    Un período desconocido se toma como `default`. Lanza ValueError si las
+    fechas no tienen formato válido.
+    """
+    today = today or timezone.localdate()
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    if date_from and date_to:
+        return DateRange(parse_day(date_from), parse_day(date_to))
+
+    if params.get('date'):
+        day = parse_day(params['date'])
+        return DateRange(day, day, period='day')
+
+    period = params.get('period', default)
+    if period not in PERIODS:
+        period = default
+    if period == 'today':
+        return DateRange(today, today, period)
+    if period == 'week':
+        return DateRange(today - timedelta(days=today.weekday()), today, period)
+    return DateRange(month_start(today), today, period)
+
+
+def filter_by_days(queryset, field, params):
+    """
+    Aplica ?date_from / ?date_to (días locales, inclusive, cada uno
+    opcional) a un DateTimeField de un listado. Fechas inválidas -> 400.
+    """
+    bounds = {}
+    for param in ('date_from', 'date_to'):
+        if params.get(param):
+            try:
+                bounds[param] = parse_day(params[param])
+            except ValueError as error:
+                raise ValidationError({param: [str(error)]})
+
+    if 'date_from' in bounds:
+        queryset = queryset.filter(**{f'{field}__gte': local_midnight(bounds['date_from'])})
+    if 'date_to' in bounds:
+        queryset = queryset.filter(
+            **{f'{field}__lt': local_midnight(bounds['date_to'] + timedelta(days=1))}
+        )
+    return queryset
@@ -0,0 +1,47 @@
+"""
+Completa el costo unitario (unit_cost) de los items de venta históricos
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from inventory.models import Product
+from sales.models import SaleItem
+
+
+class Command(BaseCommand):
+    help = 'Completa el costo unitario de los items de venta con el costo actual del producto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recalcular también los items que ya tienen costo registrado'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Cantidad de ids de items a actualizar por transacción'
+        )
+
+    def handle(self, *args, **options):
+        items = SaleItem.objects.all()
+        if not options['force']:
+            items = items.filter(unit_cost__isnull=True)
+
+        current_cost = Subquery(
+            Product.objects.filter(pk=OuterRef('product_id')).values('unit_price')[:1]
+        )
+        batch_size = options['batch_size']
+        last_id = SaleItem.objects.aggregate(last=Max('id'))['last'] or 0
+
+        self.stdout.write('💲 Completando costos de items de venta...')
+        updated = 0
+        for start in range(0, last_id, batch_size):
+            with transaction.atomic():
+                updated += items.filter(
+                    id__gt=start,
+                    id__lte=start + batch_size
+                ).update(unit_cost=current_cost)
+
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {updated} items actualizados'))
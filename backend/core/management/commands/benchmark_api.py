@@ -0,0 +1,281 @@
+"""
+Benchmark de la API: cantidad de consultas, latencia y memoria por endpoint
+"""
+import io
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from rest_framework.test import APIClient
+
+from inventory.models import Category, Product, StockMovement
+from orders.models import Customer, RepairOrder
+from sales.models import Sale
+from services.models import Service
+
+User = get_user_model()
+
+DEFAULT_BUDGET = Path(settings.BASE_DIR) / 'benchmarks' / 'api_budget.json'
+
+# Margen que se deja al generar el presupuesto con --update-budget
+LATENCY_HEADROOM = 3
+MEMORY_HEADROOM = 2
+# Margen mínimo de latencia: los endpoints de pocos ms varían por ruido
+LATENCY_MIN_HEADROOM_MS = 20
+
+
+def first_pk(model):
+    return model.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def endpoints():
+    """Endpoints a medir: (nombre, url). Se omiten los detalles sin datos"""
+    customer = first_pk(Customer)
+    cases = [
+        ('users.list', '/api/users/'),
+        ('users.profile', '/api/users/profile/'),
+        ('inventory.categories.list', '/api/inventory/categories/'),
+        ('inventory.categories.retrieve', f'/api/inventory/categories/{first_pk(Category)}/'),
+        ('inventory.products.list', '/api/inventory/products/'),
+        # Búsqueda (core.search): palabra indexada, identificador exacto y
+        # palabra corta, que no usa el índice
+        ('inventory.products.list_search', '/api/inventory/products/?search=samsung'),
+        ('inventory.products.list_search_sku', '/api/inventory/products/?search=TEST-000001'),
+        ('inventory.products.list_search_short', '/api/inventory/products/?search=lg'),
+        ('inventory.products.list_low_stock', '/api/inventory/products/?low_stock=true'),
+        ('inventory.products.retrieve', f'/api/inventory/products/{first_pk(Product)}/'),
+        ('inventory.products.low_stock_alerts', '/api/inventory/products/low_stock_alerts/'),
+        ('inventory.products.statistics', '/api/inventory/products/statistics/'),
+        ('inventory.movements.list', '/api/inventory/movements/'),
+        ('inventory.movements.retrieve', f'/api/inventory/movements/{first_pk(StockMovement)}/'),
+        ('orders.customers.list', '/api/orders/customers/'),
+        ('orders.customers.list_search', '/api/orders/customers/?search=juan'),
+        ('orders.customers.retrieve', f'/api/orders/customers/{customer}/'),
+        ('orders.customers.orders', f'/api/orders/customers/{customer}/orders/'),
+        ('orders.orders.list', '/api/orders/orders/'),
+        ('orders.orders.list_cursor', '/api/orders/orders/?cursor='),
+        ('orders.orders.list_search', '/api/orders/orders/?search=galaxy'),
+        ('orders.orders.retrieve', f'/api/orders/orders/{first_pk(RepairOrder)}/'),
+        ('orders.orders.dashboard', '/api/orders/orders/dashboard/'),
+        ('orders.orders.my_orders', '/api/orders/orders/my_orders/'),
+        ('orders.orders.daily_load', '/api/orders/orders/daily_load/'),
+        ('orders.orders.caja', '/api/orders/orders/caja/'),
+        ('sales.sales.list', '/api/sales/sales/'),
+        ('sales.sales.list_cursor', '/api/sales/sales/?cursor='),
+        ('sales.sales.list_search', '/api/sales/sales/?search=juan'),
+        ('sales.sales.retrieve', f'/api/sales/sales/{first_pk(Sale)}/'),
+        ('sales.sales.dashboard', '/api/sales/sales/dashboard/'),
+        ('sales.sales.caja', '/api/sales/sales/caja/'),
+        ('sales.sales.daily_report', '/api/sales/sales/daily_report/'),
+        ('services.list', '/api/services/'),
+        ('services.retrieve', f'/api/services/{first_pk(Service)}/'),
+    ]
+    return [(name, url) for name, url in cases if '/None/' not in url]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide consultas SQL, latencia (p50/p95) y memoria pico de cada endpoint '
+        'sobre una base de prueba y las compara con un archivo de presupuesto'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget',
+            default=str(DEFAULT_BUDGET),
+            help='Archivo JSON con el presupuesto por endpoint'
+        )
+        parser.add_argument(
+            '--update-budget',
+            action='store_true',
+            help='Reescribir el presupuesto con las mediciones actuales (con margen)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Repeticiones por endpoint para calcular la latencia'
+        )
+        parser.add_argument(
+            '--volume',
+            type=int,
+            default=300,
+            help='Clientes, productos, órdenes y ventas a generar con create_test_pagination'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Semilla para que los datos generados sean reproducibles'
+        )
+        parser.add_argument(
+            '--only',
+            help='Medir solo los endpoints cuyo nombre empiece con este prefijo'
+        )
+        parser.add_argument(
+            '--output',
+            help='Guardar las mediciones en este archivo JSON'
+        )
+
+    def handle(self, *args, **options):
+        budget_path = Path(options['budget'])
+        budget = {}
+        if not options['update_budget']:
+            if not budget_path.exists():
+                raise CommandError(
+                    f'No existe el presupuesto {budget_path}. Generarlo con --update-budget'
+                )
+            budget = json.loads(budget_path.read_text())
+
+        # Como el test runner: DEBUG desactivado para medir tiempos reales
+        setup_test_environment(debug=False)
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = self.seed(options)
+            results = self.measure(user, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2) + '\n')
+
+        if options['update_budget']:
+            self.write_budget(budget_path, results)
+            return
+
+        failures = self.check_budget(results, budget)
+        if failures:
+            raise CommandError(
+                f'{len(failures)} endpoints fuera de presupuesto: {", ".join(failures)}'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Todos los endpoints dentro del presupuesto'))
+
+    # ------------------------------------------------------------------
+    # Datos
+    # ------------------------------------------------------------------
+
+    def seed(self, options):
+        """Genera los datos con los comandos de prueba existentes"""
+        volume = options['volume']
+        self.stdout.write(f'🌱 Generando datos de prueba (volumen {volume})...')
+        silent = io.StringIO()
+        call_command('poblar_datos', seed=options['seed'], stdout=silent)
+        call_command(
+            'create_test_pagination',
+            customers=volume,
+            products=volume,
+            orders=volume,
+            sales=volume,
+            seed=options['seed'],
+            stdout=silent
+        )
+        return User.objects.get(username='admin')
+
+    # ------------------------------------------------------------------
+    # Mediciones
+    # ------------------------------------------------------------------
+
+    def measure(self, user, options):
+        client = APIClient()
+        client.force_authenticate(user)
+        prefix = options['only'] or ''
+        iterations = max(options['iterations'], 1)
+
+        results = {}
+        for name, url in endpoints():
+            if not name.startswith(prefix):
+                continue
+
+            # Primera llamada: calienta caches y cuenta consultas
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            # El log se reinicia en cada request: contar antes de seguir
+            query_count = len(queries)
+            if response.status_code != 200:
+                raise CommandError(f'{name}: {url} respondió {response.status_code}')
+
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            # La memoria se mide aparte: tracemalloc agrega overhead a la latencia
+            tracemalloc.start()
+            client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                'queries': query_count,
+                'p50_ms': round(statistics.median(timings), 2),
+                'p95_ms': round(percentile(timings, 0.95), 2),
+                'peak_kb': round(peak / 1024, 1),
+            }
+            self.stdout.write(
+                f'  {name:<40} {query_count:>4} consultas  '
+                f'p50 {results[name]["p50_ms"]:>8.2f} ms  '
+                f'p95 {results[name]["p95_ms"]:>8.2f} ms  '
+                f'{results[name]["peak_kb"]:>9.1f} KB'
+            )
+        return results
+
+    # ------------------------------------------------------------------
+    # Presupuesto
+    # ------------------------------------------------------------------
+
+    def check_budget(self, results, budget):
+        """Compara las mediciones con el presupuesto; retorna los endpoints excedidos"""
+        failures = []
+        for name, measured in results.items():
+            limits = budget.get(name)
+            if limits is None:
+                self.stdout.write(self.style.WARNING(f'  ⚠️  {name}: sin presupuesto'))
+                continue
+
+            exceeded = [
+                f'{metric} {measured[metric]} > {limit}'
+                for metric, limit in limits.items()
+                if metric in measured and measured[metric] > limit
+            ]
+            if exceeded:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f'  ❌ {name}: {"; ".join(exceeded)}'))
+        return failures
+
+    def write_budget(self, path, results):
+        budget = {
+            name: {
+                'queries': measured['queries'],
+                'p95_ms': round(max(
+                    measured['p95_ms'] * LATENCY_HEADROOM,
+                    measured['p95_ms'] + LATENCY_MIN_HEADROOM_MS
+                ), 1),
+                'peak_kb': round(measured['peak_kb'] * MEMORY_HEADROOM),
+            }
+            for name, measured in results.items()
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(budget, indent=2, sort_keys=True) + '\n')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Presupuesto guardado en {path}'))
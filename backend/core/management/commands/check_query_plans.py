@@ -0,0 +1,44 @@
+"""
+Verifica que las consultas principales de cada endpoint usen índices
+(las mismas verificaciones corren en los tests de core)
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.query_plans import check_plans, is_supported
+
+
+class Command(BaseCommand):
+    help = 'Verifica con EXPLAIN que las consultas principales de cada endpoint usen índices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose-plans',
+            action='store_true',
+            help='Mostrar el plan completo de cada consulta'
+        )
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  Motor {connection.vendor} no soportado, no se verifican planes'
+            ))
+            return
+
+        failures = []
+        for name, plan, scans in check_plans():
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f'  ❌ {name}: recorrido completo ({"; ".join(scans)})'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  ✅ {name}'))
+            if options['verbose_plans']:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(
+                f'{len(failures)} consultas sin índice: {", ".join(failures)}'
+            )
+        self.stdout.write(self.style.SUCCESS('\n✅ Todas las consultas usan índices'))
@@ -1,14 +1,55 @@
 """
 Script para limpiar datos de prueba de la base de datos
 """
-from django.core.management.base import BaseCommand
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
-from orders.models import Customer, RepairOrder
-from inventory.models import Product, Category
-from sales.models import Sale, SaleItem
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from orders.models import Customer, RepairOrder, OrderPart, OrderStatusHistory
+from inventory.models import Product, Category, StockMovement, StockSnapshot
+from sales.models import Sale, SaleItem, DailySalesSummary
 
 User = get_user_model()
 
+# Orden de borrado del modo --fast: cada tabla antes que las tablas a las que
+# apunta. (modelo, etiqueta, filtro opcional)
+FAST_PURGE_ORDER = [
+    (SaleItem, 'Items de venta', None),
+    (Sale, 'Ventas', None),
+    (DailySalesSummary, 'Resúmenes diarios', None),
+    (OrderPart, 'Repuestos de órdenes', None),
+    (OrderStatusHistory, 'Historial de órdenes', None),
+    (RepairOrder, 'Órdenes', None),
+    (StockMovement, 'Movimientos de stock', None),
+    (StockSnapshot, 'Snapshots de stock', None),
+    (Product, 'Productos', None),
+    (Category, 'Categorías', {'name__in': ['Test', 'Prueba']}),
+    (Customer, 'Clientes', None),
+]
+
+
+def purge_order_problems():
+    """
+    Claves foráneas hacia tablas de FAST_PURGE_ORDER desde modelos que no
+    se borran antes que ellas. Los DELETE directos no aplican on_delete, así
+    que cualquiera de estas haría fallar la purga a mitad de camino.
+    """
+    position = {model: index for index, (model, _, _) in enumerate(FAST_PURGE_ORDER)}
+    problems = []
+    for model in apps.get_models(include_auto_created=True):
+        for field in model._meta.get_fields():
+            if not (field.concrete and (field.many_to_one or field.one_to_one)):
+                continue
+            target = field.related_model
+            if target not in position or target is model:
+                continue
+            if model not in position or position[model] > position[target]:
+                problems.append(f'{model._meta.label}.{field.name} -> {target._meta.label}')
+    return problems
+
 
 class Command(BaseCommand):
     help = 'Elimina todos los datos de prueba de la base de datos'
@@ -19,6 +60,22 @@ class Command(BaseCommand):
             action='store_true',
             help='Confirmar la eliminación de datos'
         )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Borrar con DELETE directos por rangos de id, sin cargar los registros'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=50000,
+            help='Rango de ids que se borra por transacción en modo --fast'
+        )
+        parser.add_argument(
+            '--vacuum',
+            action='store_true',
+            help='Ejecutar VACUUM al terminar para recuperar espacio'
+        )
 
     def handle(self, *args, **options):
         if not options['confirm']:
@@ -32,10 +89,23 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.WARNING('\n🧹 Iniciando limpieza de datos de prueba...\n'))
 
+        if options['fast']:
+            problems = purge_order_problems()
+            if problems:
+                raise CommandError(
+                    'FAST_PURGE_ORDER no incluye modelos que apuntan a tablas purgadas '
+                    '(no se borró nada): ' + ', '.join(problems)
+                )
+            self.fast_purge(options['chunk_size'])
+            if options['vacuum']:
+                self.vacuum()
+            return
+
         # Contador de elementos eliminados
         deleted = {
             'sales': 0,
             'sale_items': 0,
+            'summaries': 0,
             'orders': 0,
             'products': 0,
             'categories': 0,
@@ -49,6 +119,9 @@ class Command(BaseCommand):
         SaleItem.objects.all().delete()
         deleted['sales'] = Sale.objects.all().count()
         Sale.objects.all().delete()
+        # Sin ventas, los resúmenes diarios que leen los dashboards quedan vacíos
+        deleted['summaries'] = DailySalesSummary.objects.all().count()
+        DailySalesSummary.objects.all().delete()
         self.stdout.write(self.style.SUCCESS(f'    ✅ {deleted["sales"]} ventas eliminadas'))
 
         # Eliminar todas las órdenes de reparación
@@ -93,9 +166,91 @@ class Command(BaseCommand):
         self.stdout.write('📋 Resumen:')
         self.stdout.write(f'  - Items de venta: {deleted["sale_items"]}')
         self.stdout.write(f'  - Ventas: {deleted["sales"]}')
+        self.stdout.write(f'  - Resúmenes diarios: {deleted["summaries"]}')
         self.stdout.write(f'  - Órdenes: {deleted["orders"]}')
         self.stdout.write(f'  - Productos: {deleted["products"]}')
         self.stdout.write(f'  - Categorías: {deleted["categories"]}')
         self.stdout.write(f'  - Clientes: {deleted["customers"]}')
         self.stdout.write(f'  - Usuarios: {deleted["users"]}')
+        if options['vacuum']:
+            self.vacuum()
         self.stdout.write('\n🎉 Base de datos lista para producción!')
+
+    def fast_purge(self, chunk_size):
+        """
+        Borra tabla por tabla con DELETE por rangos de id, cada rango en su
+        propia transacción. No pasa por el Collector de Django: no se emiten
+        señales ni se cargan filas en memoria, por eso las tablas se recorren
+        en orden de dependencias (FAST_PURGE_ORDER).
+        """
+        summary = []
+        started = time.perf_counter()
+        for model, label, filters in FAST_PURGE_ORDER:
+            self.stdout.write(f'  🗑️  {label}...')
+            table_started = time.perf_counter()
+            rows = self.delete_in_chunks(model, filters, chunk_size)
+            elapsed = time.perf_counter() - table_started
+            rate = rows / elapsed if elapsed else rows
+            summary.append((label, rows))
+            self.stdout.write(self.style.SUCCESS(
+                f'    ✅ {rows} filas en {elapsed:.1f}s ({rate:,.0f} filas/s)'
+            ))
+
+        # Pocos registros y con tablas relacionadas de terceros (tokens,
+        # log del admin): se borran con el ORM
+        self.stdout.write('  🗑️  Usuarios de prueba...')
+        admin_user = User.objects.filter(role='admin').order_by('id').first()
+        users = 0
+        if admin_user:
+            users, _ = User.objects.exclude(id=admin_user.id).delete()
+            self.stdout.write(self.style.SUCCESS(f'    ✅ {users} filas (admin preservado)'))
+        else:
+            self.stdout.write(self.style.WARNING('    ⚠️  No se encontró usuario admin, no se eliminaron usuarios'))
+        summary.append(('Usuarios y relacionados', users))
+
+        elapsed = time.perf_counter() - started
+        total = sum(rows for _, rows in summary)
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Limpieza completada en {elapsed:.1f}s\n'))
+        self.stdout.write('📋 Resumen:')
+        for label, rows in summary:
+            self.stdout.write(f'  - {label}: {rows}')
+        self.stdout.write(f'  Total: {total} filas ({total / elapsed if elapsed else total:,.0f} filas/s)')
+
+    def delete_in_chunks(self, model, filters, chunk_size):
+        """DELETE por rangos [inicio, inicio + chunk_size) de la clave primaria"""
+        queryset = model.objects.all()
+        where, params = '', []
+        if filters:
+            queryset = queryset.filter(**filters)
+            # El filtro se traduce a SQL con el compilador para no armarlo a mano
+            compiler = queryset.query.get_compiler(using=queryset.db)
+            where, params = queryset.query.where.as_sql(compiler, connection)
+            where = f' AND {where}'
+
+        bounds = queryset.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            return 0
+
+        table = connection.ops.quote_name(model._meta.db_table)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        sql = f'DELETE FROM {table} WHERE {pk} >= %s AND {pk} < %s{where}'
+        rows = 0
+        for start in range(bounds['low'], bounds['high'] + 1, chunk_size):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, [start, start + chunk_size, *params])
+                rows += cursor.rowcount
+        return rows
+
+    def vacuum(self):
+        """Recupera el espacio liberado; VACUUM no puede correr dentro de una transacción"""
+        self.stdout.write('  🧽 Ejecutando VACUUM...')
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('VACUUM ANALYZE')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('VACUUM')
+            else:
+                self.stdout.write(self.style.WARNING(f'    ⚠️  VACUUM no disponible en {connection.vendor}'))
+                return
+        self.stdout.write(self.style.SUCCESS(f'    ✅ VACUUM en {time.perf_counter() - started:.1f}s'))
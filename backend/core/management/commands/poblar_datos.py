@@ -2,13 +2,13 @@
 Comando para poblar la base de datos con datos masivos de prueba.
 Crea clientes, repuestos, órdenes de reparación y ventas.
 """
-import random
 from decimal import Decimal
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from orders.models import Customer, RepairOrder, OrderPart
 from inventory.models import Category, Product
 from sales.models import Sale, SaleItem
+from core.seeding import BulkSeeder, SCALE_PRESETS
 
 User = get_user_model()
 
@@ -139,6 +139,22 @@ ESTADOS = ['received', 'in_service', 'repaired', 'ready', 'delivered', 'cancelle
 PAGOS_ORDEN = ['cash', 'transfer', 'not_paid', 'account']
 PAGOS_VENTA = ['cash', 'card', 'transfer']
 
+VOCABULARIO = {
+    'first_names': NOMBRES,
+    'last_names': APELLIDOS,
+    'city': 'Bahía Blanca',
+    'devices': MARCAS_MODELOS,
+    'colors': COLORES,
+    'problems': PROBLEMAS,
+    'diagnoses': DIAGNOSTICOS,
+    'order_statuses': ESTADOS,
+    'order_payment_methods': PAGOS_ORDEN,
+    'deposits': [0, 2000, 5000, 10000],
+    'sale_payment_methods': PAGOS_VENTA,
+    'discounts': [0, 0, 0, 500, 1000, 2000],
+    'walk_in_ratio': 0.25,
+}
+
 
 class Command(BaseCommand):
     help = 'Pobla la base de datos con datos masivos de prueba'
@@ -147,26 +163,51 @@ class Command(BaseCommand):
         parser.add_argument('--clientes', type=int, default=30, help='Cantidad de clientes a crear')
         parser.add_argument('--ordenes', type=int, default=50, help='Cantidad de órdenes a crear')
         parser.add_argument('--ventas', type=int, default=40, help='Cantidad de ventas a crear')
+        parser.add_argument(
+            '--scale', choices=sorted(SCALE_PRESETS),
+            help='Volumen predefinido (small, medium, large); reemplaza --clientes, --ordenes y --ventas'
+        )
+        parser.add_argument('--seed', type=int, help='Semilla para generar siempre los mismos datos')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Registros por lote de inserción')
         parser.add_argument('--limpiar', action='store_true', help='Eliminar datos de prueba existentes antes de crear')
 
     def handle(self, *args, **options):
         if options['limpiar']:
             self.limpiar_datos()
 
+        cantidades = {
+            'clientes': options['clientes'],
+            'ordenes': options['ordenes'],
+            'ventas': options['ventas'],
+        }
+        if options['scale']:
+            preset = SCALE_PRESETS[options['scale']]
+            cantidades = {
+                'clientes': preset['customers'],
+                'ordenes': preset['orders'],
+                'ventas': preset['sales'],
+            }
+
         self.stdout.write(self.style.HTTP_INFO('\n🚀 Poblando base de datos con datos de prueba...\n'))
 
+        self.seeder = BulkSeeder(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            vocabulary=VOCABULARIO,
+            log=self.stdout.write
+        )
         admin = self.get_or_create_admin()
         categorias = self.crear_categorias()
         productos = self.crear_productos(categorias)
-        clientes = self.crear_clientes(options['clientes'])
-        ordenes = self.crear_ordenes(clientes, productos, admin, options['ordenes'])
-        ventas = self.crear_ventas(clientes, productos, admin, options['ventas'])
+        clientes = self.crear_clientes(cantidades['clientes'])
+        self.crear_ordenes(clientes, productos, admin, cantidades['ordenes'])
+        self.crear_ventas(clientes, productos, admin, cantidades['ventas'])
 
         self.stdout.write(self.style.SUCCESS('\n✅ Datos de prueba creados exitosamente!\n'))
-        self.stdout.write(f'   👤 Clientes:   {len(clientes)} creados ({Customer.objects.count()} total)')
+        self.stdout.write(f'   👤 Clientes:   {cantidades["clientes"]} creados ({Customer.objects.count()} total)')
         self.stdout.write(f'   📦 Repuestos:  {len(productos)} creados ({Product.objects.count()} total)')
-        self.stdout.write(f'   🔧 Órdenes:    {len(ordenes)} creadas ({RepairOrder.objects.count()} total)')
-        self.stdout.write(f'   🛒 Ventas:     {len(ventas)} creadas ({Sale.objects.count()} total)\n')
+        self.stdout.write(f'   🔧 Órdenes:    {cantidades["ordenes"]} creadas ({RepairOrder.objects.count()} total)')
+        self.stdout.write(f'   🛒 Ventas:     {cantidades["ventas"]} creadas ({Sale.objects.count()} total)\n')
         self.stdout.write('   🔑 Admin: usuario=admin  contraseña=admin123\n')
 
     # ------------------------------------------------------------------
@@ -234,136 +275,15 @@ class Command(BaseCommand):
 
     # ------------------------------------------------------------------
     def crear_clientes(self, cantidad):
-        creados = []
-        usados_dni = set(Customer.objects.values_list('dni', flat=True))
-        intentos = 0
-        while len(creados) < cantidad and intentos < cantidad * 3:
-            intentos += 1
-            dni = str(random.randint(20_000_000, 45_000_000))
-            if dni in usados_dni:
-                continue
-            usados_dni.add(dni)
-            nombre = random.choice(NOMBRES)
-            apellido = random.choice(APELLIDOS)
-            cliente = Customer.objects.create(
-                dni=dni,
-                first_name=nombre,
-                last_name=apellido,
-                phone=f'11{random.randint(10000000, 99999999)}',
-                email=f'{nombre.lower()}.{apellido.lower()}{random.randint(1,99)}@mail.com',
-                address=f'Calle {random.choice(APELLIDOS)} {random.randint(100, 9999)}, Bahía Blanca',
-            )
-            creados.append(cliente)
-        self.stdout.write(f'   ✓ {len(creados)} clientes creados')
-        return creados
+        """Crea los clientes y retorna los ids de todos los clientes"""
+        self.seeder.customers(cantidad)
+        return list(Customer.objects.values_list('id', flat=True))
 
     # ------------------------------------------------------------------
     def crear_ordenes(self, clientes, productos, admin, cantidad):
-        creados = []
-
-        for i in range(cantidad):
-            cliente = random.choice(clientes)
-            dispositivo = random.choice(MARCAS_MODELOS)
-            estado = random.choice(ESTADOS)
-            costo_estimado = Decimal(random.choice([5000, 8000, 10000, 15000, 20000, 25000, 30000]))
-            costo_final = costo_estimado + Decimal(random.randint(-2000, 5000)) if estado in ('repaired', 'ready', 'delivered') else None
-            deposito = Decimal(random.choice([0, 2000, 5000, 10000]))
-            metodo_pago = random.choice(PAGOS_ORDEN)
-
-            repuestos_usados = random.sample(productos[:20], random.randint(0, 3))
-            parts_cost = sum(p.unit_price for p in repuestos_usados)
-
-            orden = RepairOrder.objects.create(
-                customer=cliente,
-                device_type=dispositivo[0],
-                device_brand=dispositivo[1],
-                device_model=dispositivo[2],
-                device_color=random.choice(COLORES),
-                device_serial=f'SN{random.randint(100000000, 999999999)}',
-                problem_description=random.choice(PROBLEMAS),
-                diagnosis=random.choice(DIAGNOSTICOS) if estado != 'received' else '',
-                status=estado,
-                estimated_cost=costo_estimado,
-                final_cost=costo_final,
-                deposit_amount=deposito,
-                parts_cost=parts_cost,
-                payment_method=metodo_pago,
-                assigned_to=admin,
-                created_by=admin,
-            )
-
-            # Agregar repuestos a la orden si el modelo OrderPart existe
-            try:
-                for prod in repuestos_usados:
-                    qty = random.randint(1, 2)
-                    OrderPart.objects.create(
-                        order=orden,
-                        product=prod,
-                        quantity=qty,
-                        unit_price=prod.unit_price,
-                        subtotal=prod.unit_price * qty,
-                    )
-            except Exception:
-                pass
-
-            creados.append(orden)
-
-        self.stdout.write(f'   ✓ {len(creados)} órdenes creadas')
-        return creados
+        # Los repuestos se toman de los primeros 20 productos del catálogo
+        self.seeder.orders(cantidad, clientes, [admin], parts=productos[:20])
 
     # ------------------------------------------------------------------
     def crear_ventas(self, clientes, productos, admin, cantidad):
-        creados = []
-        existing_numbers = set(Sale.objects.values_list('sale_number', flat=True))
-
-        for i in range(cantidad):
-            num = 1000 + Sale.objects.count() + i + 1
-            sale_number = f'VTA-{num:05d}'
-            if sale_number in existing_numbers:
-                sale_number = f'VTA-{random.randint(90000, 99999)}'
-            existing_numbers.add(sale_number)
-
-            cliente = random.choice(clientes + [None] * 10)  # algunas sin cliente
-            metodo = random.choice(PAGOS_VENTA)
-            descuento = Decimal(random.choice([0, 0, 0, 500, 1000, 2000]))
-
-            venta = Sale.objects.create(
-                sale_number=sale_number,
-                customer=cliente if isinstance(cliente, Customer) else None,
-                customer_name='' if isinstance(cliente, Customer) else 'Cliente Ocasional',
-                payment_method=metodo,
-                payment_status='paid',
-                discount=descuento,
-                subtotal=Decimal('0'),
-                total=Decimal('0'),
-                paid_amount=Decimal('0'),
-                balance=Decimal('0'),
-                employee=admin,
-            )
-
-            # Agregar 1-5 productos al ticket
-            items_productos = random.sample(productos, random.randint(1, 5))
-            subtotal_total = Decimal('0')
-            for prod in items_productos:
-                qty = random.randint(1, 3)
-                precio = prod.sale_price
-                subtotal = precio * qty
-                SaleItem.objects.create(
-                    sale=venta,
-                    product=prod,
-                    quantity=qty,
-                    unit_price=precio,
-                    subtotal=subtotal,
-                )
-                subtotal_total += subtotal
-
-            total = subtotal_total - descuento
-            venta.subtotal = subtotal_total
-            venta.total = total
-            venta.paid_amount = total
-            venta.save()
-
-            creados.append(venta)
-
-        self.stdout.write(f'   ✓ {len(creados)} ventas creadas')
-        return creados
+        self.seeder.sales(cantidad, clientes, productos, [admin])
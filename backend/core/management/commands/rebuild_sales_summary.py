@@ -0,0 +1,38 @@
+"""
+Reconstruye los resúmenes diarios de ventas (DailySalesSummary)
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from sales import rollups
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye o completa los resúmenes diarios de ventas a partir de los tickets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date-from',
+            help='Primer día a reconstruir (YYYY-MM-DD). Por defecto, el historial completo'
+        )
+        parser.add_argument(
+            '--date-to',
+            help='Último día a reconstruir (YYYY-MM-DD). Por defecto, sin límite'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            date_from = self.parse_date(options['date_from'])
+            date_to = self.parse_date(options['date_to'])
+        except ValueError:
+            raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        self.stdout.write('📊 Reconstruyendo resúmenes diarios de ventas...')
+        count = rollups.rebuild(date_from, date_to)
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {count} resúmenes generados'))
+
+    @staticmethod
+    def parse_date(value):
+        if not value:
+            return None
+        return datetime.strptime(value, '%Y-%m-%d').date()
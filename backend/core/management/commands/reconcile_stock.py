@@ -0,0 +1,53 @@
+"""
+Detecta productos cuyo stock no coincide con el libro de movimientos
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from inventory import reconciliation
+
+
+class Command(BaseCommand):
+    help = 'Compara el stock de cada producto con el libro de movimientos y opcionalmente lo concilia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Registra ajustes que llevan el libro al stock actual de cada producto con diferencia'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Cantidad de productos con diferencia a listar (default: 20)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔍 Conciliando stock contra el libro de movimientos...')
+        started = time.perf_counter()
+        checked, drifts = reconciliation.find_drift()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'  {checked} productos revisados en {elapsed:.2f}s')
+
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS('  ✅ Sin diferencias'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'  ⚠️  {len(drifts)} productos con diferencias'))
+        for drift in drifts[:options['limit']]:
+            self.stdout.write(
+                f"    {drift['sku']:<20} {drift['name'][:40]:<40} "
+                f"stock {drift['quantity']:>6}  libro {drift['expected']:>6}  "
+                f"diferencia {drift['difference']:+d}"
+            )
+        if len(drifts) > options['limit']:
+            self.stdout.write(f"    ... y {len(drifts) - options['limit']} más")
+
+        if options['apply']:
+            started = time.perf_counter()
+            corrected = reconciliation.apply_corrections(drifts)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(f'  ✅ {corrected} ajustes registrados en {elapsed:.2f}s'))
+        else:
+            self.stdout.write('  Use --apply para registrar los ajustes')
@@ -0,0 +1,33 @@
+"""
+Guarda el snapshot de stock de todos los productos a medianoche local
+(pensado para correr a diario, por ejemplo desde cron a la madrugada)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.dates import INVALID_DATE, parse_day
+from inventory import ledger
+
+
+class Command(BaseCommand):
+    help = 'Guarda el stock de cada producto al inicio de un día para consultas de stock a fecha'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Día cuyo inicio (00:00 local) se toma como corte (YYYY-MM-DD). Por defecto, hoy'
+        )
+
+    def handle(self, *args, **options):
+        day = None
+        if options['date']:
+            try:
+                day = parse_day(options['date'])
+            except ValueError:
+                raise CommandError(INVALID_DATE)
+
+        self.stdout.write('📦 Guardando snapshot de stock...')
+        try:
+            count = ledger.take_snapshot(day)
+        except ValueError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'  ✅ {count} productos guardados'))
@@ -0,0 +1,135 @@
+"""
+Métricas en memoria del proceso (histogramas y contadores) con salida en
+formato de texto de Prometheus.
+
+Cada proceso del servidor lleva sus propias métricas; con varios workers
+cada scrape ve solo las del proceso que atendió la petición.
+"""
+import threading
+from collections import defaultdict
+
+# Límites superiores de los buckets de cada tipo de medición
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, limit in enumerate(self.buckets):
+            if value <= limit:
+                self.counts[index] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._histograms = defaultdict(dict)
+        self._counters = defaultdict(lambda: defaultdict(float))
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def observe(self, name, value, buckets=DURATION_BUCKETS, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms[name].get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._counters[name][key] += amount
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters[name].get(tuple(sorted(labels.items())), 0)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """Todas las métricas en formato de texto de Prometheus"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                self._header(lines, name, 'counter')
+                for key, value in sorted(series.items()):
+                    lines.append(f'{name}{_labels(key)} {_number(value)}')
+
+            for name, series in sorted(self._histograms.items()):
+                self._header(lines, name, 'histogram')
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for limit, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f'{name}_bucket{_labels(key, le=_number(limit))} {cumulative}'
+                        )
+                    lines.append(f'{name}_bucket{_labels(key, le="+Inf")} {histogram.count}')
+                    lines.append(f'{name}_sum{_labels(key)} {_number(histogram.total)}')
+                    lines.append(f'{name}_count{_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, lines, name, kind):
+        if name in self._help:
+            lines.append(f'# HELP {name} {self._help[name]}')
+        lines.append(f'# TYPE {name} {kind}')
+
+
+def _number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _labels(key, **extra):
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+registry.describe('puntotecno_requests_total', 'Peticiones atendidas por vista, método y estado')
+registry.describe(
+    'puntotecno_request_duration_seconds',
+    'Duración total de la petición (en streaming, hasta terminar de enviar el contenido)'
+)
+registry.describe('puntotecno_request_queries', 'Consultas SQL por petición')
+registry.describe('puntotecno_request_db_seconds', 'Tiempo en la base de datos por petición')
+registry.describe(
+    'puntotecno_request_app_seconds',
+    'Tiempo fuera de la base de datos, la serialización y el render: código '
+    'de la vista y generación del contenido en streaming'
+)
+registry.describe(
+    'puntotecno_request_serializer_seconds',
+    'Tiempo de serialización de DRF (.data), sin las consultas que dispara'
+)
+registry.describe('puntotecno_request_render_seconds', 'Tiempo de render de la respuesta (JSON)')
+registry.describe('puntotecno_response_size_bytes', 'Tamaño del cuerpo de la respuesta')
+registry.describe(
+    'puntotecno_cache_requests_total',
+    'Lecturas del cache de dashboards por namespace y resultado (hit/miss)'
+)
+registry.describe('puntotecno_cache_invalidations_total', 'Invalidaciones del cache por namespace')
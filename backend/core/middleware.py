@@ -0,0 +1,166 @@
+"""
+Middleware de instrumentación: consultas SQL, tiempos y tamaño de respuesta
+por vista, registrados en core.metrics y expuestos en /api/metrics/
+
+Las respuestas en streaming (exportaciones CSV) hacen casi todo su trabajo
+después de que la vista retorna, mientras el servidor consume el iterador:
+se registran al terminar de enviarse, con las consultas, el tiempo y los
+bytes del envío incluidos.
+"""
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .metrics import QUERY_BUCKETS, SIZE_BUCKETS, registry
+
+logger = logging.getLogger('puntotecno.requests')
+
+# Consultas más lentas que se incluyen en el log de peticiones lentas
+SLOW_LOG_QUERIES = 5
+
+
+class RequestStats:
+    """Mediciones de una petición"""
+
+    def __init__(self):
+        self.queries = []  # (segundos, sql)
+        self.render_start = None
+        self.render_seconds = 0
+        self.serializer_seconds = 0
+
+    @property
+    def db_seconds(self):
+        return sum(duration for duration, _ in self.queries)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Usado como connection.execute_wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((time.perf_counter() - start, sql))
+
+    @contextmanager
+    def measure_serializer(self):
+        """Tiempo de serialización sin las consultas que dispara (ya van en db)"""
+        start = time.perf_counter()
+        first_query = len(self.queries)
+        try:
+            yield
+        finally:
+            db_seconds = sum(duration for duration, _ in self.queries[first_query:])
+            self.serializer_seconds += time.perf_counter() - start - db_seconds
+
+    def start_render(self, response):
+        self.render_start = time.perf_counter()
+        response.add_post_render_callback(self.end_render)
+
+    def end_render(self, response):
+        self.render_seconds = time.perf_counter() - self.render_start
+
+
+class RequestMetricsMiddleware:
+    """
+    Registra por vista: cantidad de consultas, tiempo total, tiempo en la
+    base de datos, tiempo de serialización de DRF (medido por
+    core.mixins.SerializerTimingMixin), tiempo de render del JSON y tamaño
+    de la respuesta. El tiempo de aplicación es el resto: código Python de
+    la vista y, en streaming, la generación del contenido.
+    Las peticiones que superan SLOW_REQUEST_THRESHOLD_MS se loguean con sus
+    consultas más lentas.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', 1000) / 1000
+
+    def __call__(self, request):
+        stats = request._request_stats = RequestStats()
+        start = time.perf_counter()
+        with self.capture_queries(stats):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.stream(
+                request, response, stats, start, response.streaming_content
+            )
+            return response
+
+        size = None if response.streaming else len(response.content)
+        self.record(request, response, stats, time.perf_counter() - start, size)
+        return response
+
+    @staticmethod
+    def capture_queries(stats):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(stats))
+        return stack
+
+    def stream(self, request, response, stats, start, content):
+        """Reenvía el contenido midiendo consultas y bytes hasta que termina"""
+        size = 0
+        try:
+            with self.capture_queries(stats):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            # También si el cliente corta la descarga (close() del servidor)
+            self.record(request, response, stats, time.perf_counter() - start, size)
+
+    def process_template_response(self, request, response):
+        # Las Response de DRF se renderizan después de la vista
+        stats = getattr(request, '_request_stats', None)
+        if stats is not None:
+            stats.start_render(response)
+        return response
+
+    def record(self, request, response, stats, duration, size=None):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        db_seconds = stats.db_seconds
+        app_seconds = max(
+            duration - db_seconds - stats.serializer_seconds - stats.render_seconds, 0
+        )
+
+        registry.inc(
+            'puntotecno_requests_total',
+            view=view, method=request.method, status=response.status_code
+        )
+        registry.observe('puntotecno_request_duration_seconds', duration, view=view)
+        registry.observe(
+            'puntotecno_request_queries', len(stats.queries), buckets=QUERY_BUCKETS, view=view
+        )
+        registry.observe('puntotecno_request_db_seconds', db_seconds, view=view)
+        registry.observe('puntotecno_request_app_seconds', app_seconds, view=view)
+        registry.observe(
+            'puntotecno_request_serializer_seconds', stats.serializer_seconds, view=view
+        )
+        registry.observe('puntotecno_request_render_seconds', stats.render_seconds, view=view)
+        if size is not None:
+            registry.observe(
+                'puntotecno_response_size_bytes', size, buckets=SIZE_BUCKETS, view=view
+            )
+
+        if duration >= self.slow_threshold:
+            slowest = sorted(stats.queries, key=lambda query: query[0], reverse=True)
+            logger.warning(
+                'Petición lenta %s %s (%s): %.0f ms, %d consultas, %.0f ms en base de datos\n%s',
+                request.method,
+                request.get_full_path(),
+                view,
+                duration * 1000,
+                len(stats.queries),
+                db_seconds * 1000,
+                '\n'.join(
+                    f'  {seconds * 1000:.1f} ms: {sql}'
+                    for seconds, sql in slowest[:SLOW_LOG_QUERIES]
+                )
+            )
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('prefix', models.CharField(max_length=10, primary_key=True, serialize=False, verbose_name='Prefijo')),
+                ('last_value', models.BigIntegerField(default=0, verbose_name='Último número reservado')),
+            ],
+            options={
+                'verbose_name': 'Secuencia',
+                'verbose_name_plural': 'Secuencias',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from core.database import enable_sqlite_wal
+
+
+def enable_wal(apps, schema_editor):
+    enable_sqlite_wal(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    # SQLite no cambia el modo del journal dentro de una transacción
+    atomic = False
+
+    dependencies = [
+        ('core', '0002_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, migrations.RunPython.noop, atomic=False),
+    ]
@@ -0,0 +1,36 @@
+"""
+Mixins compartidos por los viewsets de la API
+"""
+from functools import lru_cache
+
+
+class TimedData:
+    """Mide el armado de .data del serializador en las métricas de la petición"""
+
+    @property
+    def data(self):
+        with self._request_stats.measure_serializer():
+            return super().data
+
+
+@lru_cache(maxsize=None)
+def timed_serializer_class(serializer_class):
+    return type(serializer_class.__name__, (TimedData, serializer_class), {
+        '__module__': serializer_class.__module__,
+    })
+
+
+class SerializerTimingMixin:
+    """
+    Registra el tiempo de serialización de DRF (el acceso a .data, incluidas
+    las listas) como medición propia de RequestMetricsMiddleware, separada
+    del código de la vista y del render del JSON.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        stats = getattr(self.request, '_request_stats', None)
+        if stats is not None:
+            serializer.__class__ = timed_serializer_class(type(serializer))
+            serializer._request_stats = stats
+        return serializer
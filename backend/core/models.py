@@ -56,3 +56,27 @@ class User(AbstractUser):
     def is_employee(self):
         """Verifica si el usuario es empleado"""
         return self.role == 'employee'
+
+
+class Sequence(models.Model):
+    """
+    Contador de numeración por prefijo (VTA, ORD, ...).
+    Cada fila guarda el último número reservado; ver core.sequences.
+    """
+    prefix = models.CharField(
+        max_length=10,
+        primary_key=True,
+        verbose_name='Prefijo'
+    )
+    
+    last_value = models.BigIntegerField(
+        default=0,
+        verbose_name='Último número reservado'
+    )
+    
+    class Meta:
+        verbose_name = 'Secuencia'
+        verbose_name_plural = 'Secuencias'
+    
+    def __str__(self):
+        return f"{self.prefix}: {self.last_value}"
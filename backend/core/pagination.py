@@ -1,14 +1,264 @@
 """
 Clases de paginación personalizadas
 """
-from rest_framework.pagination import PageNumberPagination
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset): cada página filtra a partir de los valores
+    de orden del último registro entregado (WHERE date < x ...) en lugar de
+    usar OFFSET, por lo que las páginas profundas cuestan lo mismo que la
+    primera.
+
+    El orden se toma de `cursor_ordering` de la vista o, si no existe, del
+    orden del queryset; siempre se desempata por id. Los campos del orden
+    deben ser no nulos.
+
+    Parámetros:
+    - ?cursor=       primera página (vacío) o cursor devuelto en next/previous
+    - ?page_size=X   tamaño de página (mismo límite que la paginación normal)
+    - ?with_count=true   agrega el total (cacheado por CURSOR_COUNT_CACHE_TIMEOUT)
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'with_count'
+
+    def __init__(self, page_size, max_page_size, page_size_query_param):
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.page_size_query_param = page_size_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'true':
+            self.count = self.get_count(queryset)
+
+        values, backwards = self.decode_cursor(request)
+        if values is not None:
+            values = self.clean_values(queryset.model, values)
+        if backwards:
+            ordering = [self.invert(field) for field in self.ordering]
+        else:
+            ordering = self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.after(ordering, values))
+
+        # Un registro extra indica si hay más páginas en esa dirección
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+
+        self.has_next = has_more if not backwards else values is not None
+        self.has_previous = values is not None if not backwards else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # ------------------------------------------------------------------
+    # Orden y filtro
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def get_ordering(self, queryset, view):
+        ordering = list(
+            getattr(view, 'cursor_ordering', None)
+            or queryset.query.order_by
+            or queryset.model._meta.ordering
+        )
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            descending = ordering and ordering[0].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    @staticmethod
+    def after(ordering, values):
+        """
+        Condición "posterior a values" según el orden (comparación
+        lexicográfica). Se agrega una cota sobre el primer campo para que la
+        base de datos pueda usar el índice como rango.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    # ------------------------------------------------------------------
+    # Cursores
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def row_value(row, field):
+        value = row
+        for attr in field.lstrip('-').split('__'):
+            value = getattr(value, attr)
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def encode_cursor(self, row, backwards):
+        payload = {
+            'v': [self.row_value(row, field) for field in self.ordering],
+            'b': backwards,
+        }
+        data = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(data).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param, '')
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, backwards = payload['v'], bool(payload['b'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound('Cursor inválido')
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound('Cursor inválido')
+        return values, backwards
+
+    @staticmethod
+    def model_field(model, path):
+        """Campo del modelo para un campo de orden ('-date', 'customer__last_name', 'pk')"""
+        field = None
+        for name in path.lstrip('-').split('__'):
+            if field is not None:
+                model = field.related_model
+            field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        return field
+
+    def clean_values(self, model, values):
+        """
+        Convierte los valores del cursor al tipo de cada campo de orden. Un
+        cursor bien formado con valores que no corresponden (texto en una
+        fecha, nulos) es un cursor inválido y no un error del servidor.
+        """
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            try:
+                value = self.model_field(model, field).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound('Cursor inválido')
+            if value is None:
+                raise NotFound('Cursor inválido')
+            cleaned.append(value)
+        return cleaned
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last_row, False)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.first_row is None:
+            return replace_query_param(url, self.cursor_query_param, '')
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.first_row, True)
+        )
+
+    # ------------------------------------------------------------------
+    # Total opcional
+    # ------------------------------------------------------------------
+
+    def get_count(self, queryset):
+        """COUNT(*) del listado completo, cacheado por consulta"""
+        timeout = getattr(settings, 'CURSOR_COUNT_CACHE_TIMEOUT', 60)
+        sql, params = queryset.order_by().query.sql_with_params()
+        key = 'cursor-count:' + hashlib.sha1(f'{sql}|{params}'.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, timeout)
+        return count
 
 
 class DynamicPageSizePagination(PageNumberPagination):
     """
     Paginación que permite al cliente especificar el tamaño de página
     mediante el parámetro ?page_size=X
+
+    Si la petición incluye ?cursor= se usa paginación por cursor
+    (KeysetPagination) en lugar de número de página.
     """
     page_size = 50  # Valor por defecto
     page_size_query_param = 'page_size'  # Permite ?page_size=X
     max_page_size = 1000  # Límite máximo para prevenir abuso
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if KeysetPagination.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination(
+                self.page_size, self.max_page_size, self.page_size_query_param
+            )
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,123 @@
+"""
+Verificación de planes de consulta: las consultas principales de cada
+endpoint deben usar índices
+
+Los querysets se arman con las mismas piezas que usan las vistas (el
+get_queryset/filter_queryset de cada viewset y las funciones compartidas
+de las acciones), así que un cambio en el filtro de una vista cambia lo
+que se verifica. Lo usan el comando check_query_plans y los tests de core.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.dates import resolve_period
+from inventory.models import Product
+from inventory.views import ProductViewSet, StockMovementViewSet
+from orders.views import (
+    CustomerViewSet, RepairOrderViewSet, delivered_in_period, open_orders_for, orders_with_balance,
+)
+from sales.caja import period_sales, sales_with_balance, summaries_between
+from sales.views import SaleViewSet
+
+# Patrones de recorrido completo de tabla según el motor
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (TABLE )?\w+\s*$', re.MULTILINE),
+    'postgresql': re.compile(r'\bSeq Scan on\b'),
+}
+
+# En SQLite, "SCAN tabla USING INDEX x" recorre el índice completo: solo es
+# aceptable si la consulta está paginada (LIMIT) o si el índice es parcial
+SQLITE_INDEX_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+) USING (?:COVERING )?INDEX (\w+)')
+
+
+def is_supported():
+    return connection.vendor in FULL_SCAN_PATTERNS
+
+
+def sqlite_partial_indexes(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA index_list("{table}")')
+        return {row[1] for row in cursor.fetchall() if row[4]}
+
+
+def full_scans(queryset, plan):
+    """Retorna las líneas del plan que recorren una tabla completa"""
+    scans = [match.group(0) for match in FULL_SCAN_PATTERNS[connection.vendor].finditer(plan)]
+    if connection.vendor == 'sqlite' and queryset.query.high_mark is None:
+        for match in SQLITE_INDEX_SCAN.finditer(plan):
+            table, index = match.groups()
+            if index not in sqlite_partial_indexes(table):
+                scans.append(match.group(0))
+    return scans
+
+
+def list_queryset(viewset, params=None, user=None, cursor=False):
+    """
+    Primera página del listado de un viewset con los parámetros dados: el
+    queryset de get_queryset/filter_queryset, ordenado como lo pagina la
+    paginación normal o la de cursor.
+    """
+    request = Request(APIRequestFactory().get('/', params or {}))
+    request.user = user
+    view = viewset(action='list', request=request, args=(), kwargs={}, format_kwarg=None)
+    queryset = view.filter_queryset(view.get_queryset())
+    if cursor:
+        queryset = queryset.order_by(*view.cursor_ordering)
+    return queryset[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+
+
+def plan_checks():
+    """Consultas principales de cada endpoint: (nombre, queryset)"""
+    # Usuario sin guardar: alcanza para armar los filtros por usuario
+    user = get_user_model()(pk=0)
+    # Períodos por defecto de caja (mes) y del reporte diario (hoy)
+    month = resolve_period({})
+    today = resolve_period({}, default='today')
+    delivered, delivered_fallback = delivered_in_period(month)
+    return [
+        ('inventory.products.list', list_queryset(ProductViewSet, user=user)),
+        ('inventory.products.list_cursor', list_queryset(ProductViewSet, user=user, cursor=True)),
+        ('inventory.products.low_stock',
+         list_queryset(ProductViewSet, {'low_stock': 'true', 'is_active': 'true'}, user)),
+        ('inventory.products.low_stock_alerts', Product.objects.low_stock_alerts()),
+        ('inventory.movements.list', list_queryset(StockMovementViewSet, user=user)),
+        ('inventory.movements.by_product', list_queryset(StockMovementViewSet, {'product': 1}, user)),
+        ('orders.customers.list', list_queryset(CustomerViewSet, user=user)),
+        ('orders.orders.list', list_queryset(RepairOrderViewSet, user=user)),
+        ('orders.orders.list_cursor', list_queryset(RepairOrderViewSet, user=user, cursor=True)),
+        ('orders.orders.by_status', list_queryset(RepairOrderViewSet, {'status': 'received'}, user)),
+        ('orders.orders.my_orders', open_orders_for(user)),
+        ('orders.orders.caja_delivered', delivered),
+        ('orders.orders.caja_delivered_fallback', delivered_fallback),
+        ('orders.orders.pending_balance', orders_with_balance().order_by('-received_date')),
+        ('sales.sales.list', list_queryset(SaleViewSet, user=user)),
+        ('sales.sales.list_cursor', list_queryset(SaleViewSet, user=user, cursor=True)),
+        ('sales.sales.caja_period', period_sales(month).order_by('-date')),
+        ('sales.sales.daily_report', period_sales(today).order_by('-date')),
+        ('sales.sales.pending_balance', sales_with_balance().order_by('-date')),
+        ('sales.sales.dashboard', summaries_between(month.date_from, month.date_to)),
+    ]
+
+
+def check_plans():
+    """
+    Ejecuta EXPLAIN de cada consulta de plan_checks. Retorna
+    [(nombre, plan, recorridos completos)].
+    """
+    results = []
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Con tablas chicas el planner prefiere Seq Scan aunque exista
+            # un índice; se desactiva para verificar que el índice sirve.
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        for name, queryset in plan_checks():
+            plan = queryset.explain()
+            results.append((name, plan, full_scans(queryset, plan)))
+    return results
@@ -0,0 +1,248 @@
+"""
+Búsqueda de texto para los listados (clientes, productos, órdenes y ventas)
+
+Según el motor de base de datos se usa:
+- SQLite: tablas virtuales FTS5 con tokenizador trigram (búsqueda por
+  subcadena, como icontains, pero indexada). Se mantienen sincronizadas con
+  triggers, así que también reflejan bulk_create y update().
+- PostgreSQL: índices GIN pg_trgm sobre UPPER(columna), que hacen indexables
+  los filtros icontains.
+- Otros motores (o SEARCH_BACKEND='basic'): icontains sin índice.
+
+Cada palabra del término debe aparecer en algún campo (del modelo o del
+cliente relacionado). Los resultados se ordenan por relevancia: primero las
+coincidencias exactas en identificadores (DNI, SKU, número de ticket...),
+luego las que empiezan con el término y después el resto.
+"""
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Largo mínimo de palabra que puede resolver el tokenizador trigram
+FTS_MIN_LENGTH = 3
+
+
+class SearchConfig:
+    """Campos buscables de un modelo"""
+
+    def __init__(self, table, fields, identifiers=(), related=None):
+        self.table = table
+        self.fields = list(fields)
+        self.identifiers = list(identifiers)
+        # {campo FK: clave de SEARCH_CONFIGS del modelo relacionado}
+        self.related = related or {}
+
+    @property
+    def fts_table(self):
+        return f'{self.table}_fts'
+
+
+SEARCH_CONFIGS = {
+    'customer': SearchConfig(
+        'orders_customer',
+        ['dni', 'customer_number', 'first_name', 'last_name', 'phone', 'email'],
+        identifiers=['dni', 'customer_number', 'phone'],
+    ),
+    'product': SearchConfig(
+        'inventory_product',
+        ['name', 'sku', 'description'],
+        identifiers=['sku'],
+    ),
+    'order': SearchConfig(
+        'orders_repairorder',
+        ['order_number', 'device_brand', 'device_model', 'device_serial'],
+        identifiers=['order_number', 'device_serial'],
+        related={'customer': 'customer'},
+    ),
+    'sale': SearchConfig(
+        'sales_sale',
+        ['sale_number', 'customer_name'],
+        identifiers=['sale_number'],
+        related={'customer': 'customer'},
+    ),
+}
+
+_fts_tables = None
+
+
+def get_backend():
+    """Retorna 'fts', 'trigram' o 'basic' según configuración y motor"""
+    backend = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if backend != 'auto':
+        return backend
+    if connection.vendor == 'sqlite':
+        return 'fts'
+    if connection.vendor == 'postgresql':
+        return 'trigram'
+    return 'basic'
+
+
+def _has_fts_table(config):
+    global _fts_tables
+    if _fts_tables is None:
+        _fts_tables = set(connection.introspection.table_names())
+    return config.fts_table in _fts_tables
+
+
+def _fts_match(config, word):
+    """Subconsulta con los ids que contienen la palabra"""
+    phrase = '"' + word.replace('"', '""') + '"'
+    return RawSQL(
+        f'SELECT rowid FROM "{config.fts_table}" WHERE "{config.fts_table}" MATCH %s',
+        [phrase]
+    )
+
+
+def _word_filter(config, word, use_fts, prefix=''):
+    """Q que exige que la palabra aparezca en algún campo del modelo o sus relaciones"""
+    if use_fts and len(word) >= FTS_MIN_LENGTH and _has_fts_table(config):
+        q = Q(**{f'{prefix}pk__in': _fts_match(config, word)})
+    else:
+        q = Q()
+        for field in config.fields:
+            q |= Q(**{f'{prefix}{field}__icontains': word})
+
+    for fk, related_key in config.related.items():
+        q |= _word_filter(SEARCH_CONFIGS[related_key], word, use_fts, prefix=f'{prefix}{fk}__')
+    return q
+
+
+def apply_search(queryset, config_key, term):
+    """
+    Filtra el queryset por el término y lo ordena por relevancia
+    (anotación search_rank) manteniendo el orden original como desempate.
+    """
+    term = (term or '').strip()
+    if not term:
+        return queryset
+
+    config = SEARCH_CONFIGS[config_key]
+    use_fts = get_backend() == 'fts'
+    for word in term.split():
+        queryset = queryset.filter(_word_filter(config, word, use_fts))
+
+    ranking = [When(Q(**{f'{field}__iexact': term}), then=Value(0)) for field in config.identifiers]
+    ranking += [When(Q(**{f'{field}__istartswith': term}), then=Value(1)) for field in config.identifiers]
+    if not ranking:
+        return queryset
+
+    ordering = queryset.query.order_by or queryset.model._meta.ordering
+    return queryset.annotate(
+        search_rank=Case(*ranking, default=Value(2), output_field=IntegerField())
+    ).order_by('search_rank', *ordering)
+
+
+# ----------------------------------------------------------------------
+# Creación de índices (llamado desde las migraciones y post_migrate)
+# ----------------------------------------------------------------------
+
+def _sqlite_has_fts5_trigram(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x, tokenize='trigram')")
+        cursor.execute('DROP TABLE temp.fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+def create_search_index(schema_editor, table, fields):
+    """Crea el índice de búsqueda de una tabla según el motor"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _create_sqlite_fts(schema_editor, table, fields)
+    elif vendor == 'postgresql':
+        _create_postgres_trigram(schema_editor, table, fields)
+
+
+def drop_search_index(schema_editor, table, fields):
+    """Elimina el índice de búsqueda de una tabla"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS "{table}_fts_{suffix}"')
+        schema_editor.execute(f'DROP TABLE IF EXISTS "{table}_fts"')
+    elif vendor == 'postgresql':
+        for field in fields:
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{table}_{field}_trgm"')
+
+
+def _create_sqlite_fts(schema_editor, table, fields):
+    with schema_editor.connection.cursor() as cursor:
+        if not _sqlite_has_fts5_trigram(cursor):
+            return
+
+    fts = f'{table}_fts'
+    columns = ', '.join(f'"{field}"' for field in fields)
+
+    schema_editor.execute(f'CREATE VIRTUAL TABLE "{fts}" USING fts5({columns}, tokenize=\'trigram\')')
+    schema_editor.execute(f'INSERT INTO "{fts}" (rowid, {columns}) SELECT id, {columns} FROM "{table}"')
+    for sql in _sqlite_trigger_sql(table, fields):
+        schema_editor.execute(sql)
+
+
+def _sqlite_trigger_sql(table, fields):
+    """Triggers que mantienen sincronizada la tabla FTS (idempotentes)"""
+    fts = f'{table}_fts'
+    columns = ', '.join(f'"{field}"' for field in fields)
+    new_values = ', '.join(f'new."{field}"' for field in fields)
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_fts_ai" AFTER INSERT ON "{table}" BEGIN '
+        f'INSERT INTO "{fts}" (rowid, {columns}) VALUES (new.id, {new_values}); END',
+
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_fts_ad" AFTER DELETE ON "{table}" BEGIN '
+        f'DELETE FROM "{fts}" WHERE rowid = old.id; END',
+
+        # Solo al cambiar columnas buscables (no en cada movimiento de stock)
+        f'CREATE TRIGGER IF NOT EXISTS "{table}_fts_au" AFTER UPDATE OF {columns} ON "{table}" BEGIN '
+        f'DELETE FROM "{fts}" WHERE rowid = old.id; '
+        f'INSERT INTO "{fts}" (rowid, {columns}) VALUES (new.id, {new_values}); END',
+    ]
+
+
+def repair_sqlite_triggers(using='default', **kwargs):
+    """
+    Receptor de post_migrate: los triggers de FTS no forman parte del estado
+    de migraciones de Django, y cualquier AlterField posterior reconstruye la
+    tabla en SQLite y los borra sin aviso. Si falta alguno, se recrean y se
+    reindexa la tabla, porque las escrituras hechas sin triggers no llegaron
+    al índice. Retorna las tablas reparadas.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return []
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {(kind, name) for kind, name in cursor.fetchall()}
+
+        repaired = []
+        for config in SEARCH_CONFIGS.values():
+            if ('table', config.fts_table) not in existing:
+                continue
+            triggers = {f'{config.table}_fts_{suffix}' for suffix in ('ai', 'ad', 'au')}
+            if all(('trigger', name) in existing for name in triggers):
+                continue
+
+            columns = ', '.join(f'"{field}"' for field in config.fields)
+            cursor.execute(f'DELETE FROM "{config.fts_table}"')
+            cursor.execute(
+                f'INSERT INTO "{config.fts_table}" (rowid, {columns}) '
+                f'SELECT id, {columns} FROM "{config.table}"'
+            )
+            for sql in _sqlite_trigger_sql(config.table, config.fields):
+                cursor.execute(sql)
+            repaired.append(config.table)
+    return repaired
+
+
+def _create_postgres_trigram(schema_editor, table, fields):
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for field in fields:
+        # Misma expresión que genera Django para icontains: UPPER(col::text)
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{table}_{field}_trgm" ON "{table}" '
+            f'USING gin ((UPPER("{field}"::text)) gin_trgm_ops)'
+        )
@@ -0,0 +1,301 @@
+"""
+Carga masiva de datos de prueba para los comandos de generación
+(create_test_pagination, poblar_datos).
+
+- Inserta con bulk_create en lotes de tamaño fijo, cada lote en su propia
+  transacción, sin cargar en memoria más que el lote actual.
+- Reserva los números de orden y de ticket de una sola vez
+  (core.sequences.reserve), sin consultar el último número por fila.
+- Usa un generador aleatorio propio con semilla, así la misma semilla
+  produce los mismos datos.
+- Las fechas se distribuyen en los últimos `days` días: durante la carga se
+  desactiva auto_now_add de las fechas de alta para poder asignarlas.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from inventory.models import Product
+from orders.models import Customer, OrderPart, RepairOrder
+from sales import rollups
+from sales.models import Sale, SaleItem
+
+from .sequences import format_number, reserve
+
+# Cantidades de cada tipo de registro según la escala
+SCALE_PRESETS = {
+    'small': {'customers': 1_000, 'products': 500, 'orders': 2_000, 'sales': 5_000},
+    'medium': {'customers': 20_000, 'products': 2_000, 'orders': 50_000, 'sales': 100_000},
+    'large': {'customers': 200_000, 'products': 10_000, 'orders': 300_000, 'sales': 1_000_000},
+}
+
+DEFAULT_VOCABULARY = {
+    'first_names': ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Pedro', 'Sofia', 'Diego', 'Valentina'],
+    'last_names': [
+        'González', 'Rodríguez', 'Martínez', 'García', 'López',
+        'Pérez', 'Sánchez', 'Romero', 'Fernández', 'Torres',
+    ],
+    'city': 'CABA',
+    'product_types': ['Batería', 'Cargador', 'Cable', 'Funda', 'Auriculares', 'Protector', 'Soporte', 'Adaptador'],
+    'product_brands': ['Samsung', 'Motorola', 'Xiaomi', 'Apple', 'Huawei', 'LG', 'Nokia', 'Sony'],
+    'devices': [
+        ('phone', 'Samsung', 'Galaxy A52'),
+        ('phone', 'Motorola', 'G60'),
+        ('phone', 'iPhone', '13 Pro'),
+        ('phone', 'Xiaomi', 'Redmi Note'),
+        ('tablet', 'Samsung', 'Galaxy Tab A8'),
+        ('laptop', 'Lenovo', 'IdeaPad 3'),
+    ],
+    'colors': ['Negro', 'Blanco', 'Azul', 'Gris'],
+    'problems': [
+        'No enciende', 'Pantalla rota', 'No carga', 'Problema de batería',
+        'Cámara no funciona', 'Altavoz no suena', 'Táctil no responde',
+    ],
+    'diagnoses': [''],
+    'order_statuses': ['received', 'in_service', 'ready', 'repaired', 'delivered'],
+    'order_payment_methods': ['cash', 'transfer', 'not_paid', 'account'],
+    'deposits': [0, 2000, 5000],
+    'sale_payment_methods': ['cash', 'card', 'transfer', 'account'],
+    'discounts': [0, 0, 0, 500, 1000],
+    'walk_in_ratio': 0.3,
+}
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Permite asignar a mano campos auto_now_add (Model, 'campo') durante la carga"""
+    model_fields = [model._meta.get_field(name) for model, name in fields]
+    previous = [field.auto_now_add for field in model_fields]
+    for field in model_fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(model_fields, previous):
+            field.auto_now_add = value
+
+
+class BulkSeeder:
+    """Generador de datos de prueba por lotes"""
+
+    def __init__(self, seed=None, batch_size=5000, days=90, vocabulary=None, log=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.now = timezone.now()
+        self.vocabulary = {**DEFAULT_VOCABULARY, **(vocabulary or {})}
+        self.log = log or (lambda message: None)
+
+    # ------------------------------------------------------------------
+    # Utilidades
+    # ------------------------------------------------------------------
+
+    def batches(self, total):
+        """Rangos (inicio, fin) de cada lote"""
+        for start in range(0, total, self.batch_size):
+            yield start, min(start + self.batch_size, total)
+
+    def random_date(self):
+        return self.now - timedelta(seconds=self.random.randint(0, self.days * 86400))
+
+    def choice(self, key):
+        return self.random.choice(self.vocabulary[key])
+
+    def report(self, label, count, started):
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else count
+        self.log(f'  ✅ {count} {label} en {elapsed:.1f}s ({rate:,.0f} filas/s)')
+
+    @staticmethod
+    def insert_returning_ids(model, objects, lookup_field):
+        """
+        bulk_create que deja asignados los ids. En motores sin RETURNING los
+        busca por un campo único.
+        """
+        model.objects.bulk_create(objects)
+        if connection.features.can_return_rows_from_bulk_insert:
+            return
+        ids = dict(model.objects.filter(
+            **{f'{lookup_field}__in': [getattr(obj, lookup_field) for obj in objects]}
+        ).values_list(lookup_field, 'id'))
+        for obj in objects:
+            obj.id = ids[getattr(obj, lookup_field)]
+
+    # ------------------------------------------------------------------
+    # Generadores
+    # ------------------------------------------------------------------
+
+    def customers(self, count):
+        """Clientes con DNI único a partir de la cantidad existente"""
+        started = time.perf_counter()
+        offset = Customer.objects.count()
+        first_names = self.vocabulary['first_names']
+        last_names = self.vocabulary['last_names']
+        for start, end in self.batches(count):
+            batch = []
+            for index in range(offset + start, offset + end):
+                first_name = self.random.choice(first_names)
+                last_name = self.random.choice(last_names)
+                batch.append(Customer(
+                    dni=f'{50_000_000 + index:08d}',
+                    customer_number=f'C-{index + 1:06d}',
+                    first_name=first_name,
+                    last_name=last_name,
+                    phone=f'11{self.random.randint(10_000_000, 99_999_999)}',
+                    email=f'{first_name.lower()}.{last_name.lower()}{index}@test.com',
+                    address=f'Calle {self.random.randint(100, 9999)}, {self.vocabulary["city"]}',
+                ))
+            with transaction.atomic():
+                Customer.objects.bulk_create(batch, ignore_conflicts=True)
+        self.report('clientes', count, started)
+
+    def products(self, count, category):
+        """Productos con SKU único a partir de la cantidad existente"""
+        started = time.perf_counter()
+        offset = Product.objects.count()
+        for start, end in self.batches(count):
+            batch = []
+            for index in range(offset + start, offset + end):
+                unit_price = Decimal(self.random.randint(100, 5000))
+                batch.append(Product(
+                    sku=f'TEST-{index + 1:06d}',
+                    name=f'{self.choice("product_types")} {self.choice("product_brands")} Test {index + 1}',
+                    description=f'Producto de prueba número {index + 1}',
+                    category=category,
+                    unit_price=unit_price,
+                    sale_price=unit_price * Decimal(self.random.choice(['1.5', '1.8', '2'])),
+                    quantity=self.random.randint(0, 100),
+                    min_stock=5,
+                ))
+            with transaction.atomic():
+                Product.objects.bulk_create(batch, ignore_conflicts=True)
+        self.report('productos', count, started)
+
+    def orders(self, count, customer_ids, users, parts=None):
+        """
+        Órdenes de reparación. `parts` es una lista de productos de los que
+        se toman entre 0 y 3 repuestos por orden.
+        """
+        started = time.perf_counter()
+        numbers = reserve(RepairOrder.NUMBER_PREFIX, count) if count else range(0)
+        parts = parts or []
+        with explicit_dates((RepairOrder, 'received_date')):
+            for start, end in self.batches(count):
+                orders, order_parts = [], []
+                for number in numbers[start:end]:
+                    order, used = self.build_order(number, customer_ids, users, parts)
+                    orders.append(order)
+                    order_parts.append(used)
+
+                with transaction.atomic():
+                    self.insert_returning_ids(RepairOrder, orders, 'order_number')
+                    OrderPart.objects.bulk_create([
+                        OrderPart(order_id=order.id, product_id=product.id,
+                                  quantity=quantity, unit_price=product.unit_price)
+                        for order, used in zip(orders, order_parts)
+                        for product, quantity in used
+                    ])
+        self.report('órdenes', count, started)
+
+    def build_order(self, number, customer_ids, users, parts):
+        status = self.choice('order_statuses')
+        device_type, brand, model = self.choice('devices')
+        estimated = Decimal(self.random.randint(10, 200) * 100)
+        received = self.random_date()
+        used = [
+            (product, self.random.randint(1, 2))
+            for product in self.random.sample(parts, min(len(parts), self.random.randint(0, 3)))
+        ]
+        user = self.random.choice(users)
+
+        order = RepairOrder(
+            order_number=format_number(RepairOrder.NUMBER_PREFIX, number),
+            customer_id=self.random.choice(customer_ids),
+            device_type=device_type,
+            device_brand=brand,
+            device_model=model,
+            device_color=self.choice('colors'),
+            device_serial=f'SN{self.random.randint(100_000_000, 999_999_999)}',
+            problem_description=self.choice('problems'),
+            diagnosis=self.choice('diagnoses') if status != 'received' else '',
+            status=status,
+            estimated_cost=estimated,
+            final_cost=(
+                estimated + Decimal(self.random.randint(-20, 50) * 100)
+                if status in ('repaired', 'ready', 'delivered') else None
+            ),
+            deposit_amount=Decimal(self.choice('deposits')),
+            parts_cost=sum((product.unit_price * quantity for product, quantity in used), Decimal('0')),
+            payment_method=self.choice('order_payment_methods'),
+            received_date=received,
+            delivered_date=(
+                min(received + timedelta(days=self.random.randint(1, 10)), self.now)
+                if status == 'delivered' else None
+            ),
+            assigned_to=user,
+            created_by=user,
+        )
+        order.apply_payment_defaults()
+        return order, used
+
+    def sales(self, count, customer_ids, products, employees):
+        """
+        Ventas con 1 a 5 items cada una. Al final reconstruye los resúmenes
+        diarios del período generado.
+        """
+        started = time.perf_counter()
+        numbers = reserve(Sale.NUMBER_PREFIX, count) if count else range(0)
+        items_count = 0
+        with explicit_dates((Sale, 'date')):
+            for start, end in self.batches(count):
+                sales, sale_items = [], []
+                for number in numbers[start:end]:
+                    sale, items = self.build_sale(number, customer_ids, products, employees)
+                    sales.append(sale)
+                    sale_items.append(items)
+
+                with transaction.atomic():
+                    self.insert_returning_ids(Sale, sales, 'sale_number')
+                    for sale, items in zip(sales, sale_items):
+                        for item in items:
+                            item.sale_id = sale.id
+                    batch_items = [item for items in sale_items for item in items]
+                    SaleItem.objects.bulk_create(batch_items)
+                    items_count += len(batch_items)
+        self.report(f'ventas ({items_count} items)', count, started)
+
+        if count:
+            rollups.rebuild(date_from=timezone.localdate(self.now - timedelta(days=self.days)))
+
+    def build_sale(self, number, customer_ids, products, employees):
+        walk_in = not customer_ids or self.random.random() < self.vocabulary['walk_in_ratio']
+        items = []
+        for product in self.random.sample(products, min(len(products), self.random.randint(1, 5))):
+            quantity = self.random.randint(1, 3)
+            items.append(SaleItem(
+                product_id=product.id,
+                quantity=quantity,
+                unit_price=product.sale_price,
+                unit_cost=product.unit_price,
+                subtotal=product.sale_price * quantity,
+            ))
+        subtotal = sum((item.subtotal for item in items), Decimal('0'))
+
+        sale = Sale(
+            sale_number=format_number(Sale.NUMBER_PREFIX, number),
+            date=self.random_date(),
+            customer_id=None if walk_in else self.random.choice(customer_ids),
+            customer_name=f'Cliente Ocasional {number}' if walk_in else '',
+            employee=self.random.choice(employees),
+            payment_method=self.choice('sale_payment_methods'),
+            discount=min(Decimal(self.choice('discounts')), subtotal),
+        )
+        if sale.payment_method == 'account':
+            sale.paid_amount = Decimal(self.random.randint(0, int(subtotal - sale.discount)))
+        sale.apply_totals(subtotal)
+        return sale, items
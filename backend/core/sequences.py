@@ -0,0 +1,71 @@
+"""
+Numeración correlativa de tickets y órdenes (VTA-000001, ORD-000001, ...)
+
+Cada prefijo tiene una fila en core.Sequence que se incrementa con un único
+UPDATE atómico, por lo que dos requests simultáneos nunca obtienen el mismo
+número. Para no serializar todas las ventas sobre esa fila, cada proceso
+reserva bloques de SEQUENCE_BLOCK_SIZE números y los consume en memoria.
+"""
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Sequence
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def format_number(prefix, value):
+    """Formatea un número de secuencia: ('VTA', 12) -> 'VTA-000012'"""
+    return f"{prefix}-{value:06d}"
+
+
+def reserve(prefix, count=1):
+    """
+    Reserva `count` números consecutivos para el prefijo y retorna el rango.
+    El UPDATE toma el lock de la fila antes de leer el valor, así que la
+    lectura posterior siempre ve el incremento propio.
+    """
+    with transaction.atomic():
+        updated = Sequence.objects.filter(prefix=prefix).update(
+            last_value=F('last_value') + count
+        )
+        if not updated:
+            Sequence.objects.get_or_create(prefix=prefix)
+            Sequence.objects.filter(prefix=prefix).update(
+                last_value=F('last_value') + count
+            )
+        last_value = Sequence.objects.filter(prefix=prefix).values_list(
+            'last_value', flat=True
+        ).get()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def _release(prefix, numbers):
+    """Deja disponibles en el proceso los números sobrantes de un bloque"""
+    with _pools_lock:
+        _pools.setdefault(prefix, deque()).extend(numbers)
+
+
+def next_value(prefix):
+    """Retorna el próximo número libre para el prefijo"""
+    with _pools_lock:
+        pool = _pools.get(prefix)
+        if pool:
+            return pool.popleft()
+
+    numbers = reserve(prefix, getattr(settings, 'SEQUENCE_BLOCK_SIZE', 1))
+    if len(numbers) > 1:
+        # Si la transacción actual se revierte, el contador vuelve atrás y
+        # el bloque no debe quedar en memoria (se volvería a entregar).
+        transaction.on_commit(lambda: _release(prefix, numbers[1:]))
+    return numbers[0]
+
+
+def next_number(prefix):
+    """Retorna el próximo número formateado, p. ej. 'VTA-000123'"""
+    return format_number(prefix, next_value(prefix))
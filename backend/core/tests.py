@@ -0,0 +1,320 @@
+"""
+Tests de los rangos de fechas (core.dates), del formato de exportación, de
+la búsqueda de texto (core.search), de la paginación por cursor y de las
+métricas por petición y de la configuración de SQLite
+"""
+import base64
+import json
+import time
+from datetime import date, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.dates import DateRange, day_range, previous_period, resolve_period
+from core.exports import format_value
+from core.metrics import registry
+from core.models import User
+from core.query_plans import check_plans, is_supported
+from core.search import apply_search, repair_sqlite_triggers
+from inventory.models import Category, Product
+from inventory.serializers import CategorySerializer
+
+
+class ResolvePeriodTests(SimpleTestCase):
+    today = date(2026, 10, 18)  # domingo
+
+    def resolve(self, **params):
+        return resolve_period(params, today=self.today)
+
+    def test_today(self):
+        period = self.resolve(period='today')
+        self.assertEqual((period.date_from, period.date_to, period.period), (self.today, self.today, 'today'))
+
+    def test_week_starts_on_monday(self):
+        period = self.resolve(period='week')
+        self.assertEqual((period.date_from, period.date_to), (date(2026, 10, 12), self.today))
+
+    def test_month_and_default(self):
+        for period in (self.resolve(period='month'), self.resolve(), self.resolve(period='año')):
+            self.assertEqual((period.date_from, period.date_to, period.period), (date(2026, 10, 1), self.today, 'month'))
+
+    def test_single_day(self):
+        period = self.resolve(date='2026-03-05')
+        self.assertEqual((period.date_from, period.date_to, period.period), (date(2026, 3, 5), date(2026, 3, 5), 'day'))
+
+    def test_custom_range_has_priority(self):
+        period = self.resolve(date_from='2026-01-10', date_to='2026-01-20', date='2026-03-05', period='today')
+        self.assertEqual((period.date_from, period.date_to, period.period), (date(2026, 1, 10), date(2026, 1, 20), 'custom'))
+
+    def test_only_date_from_is_ignored(self):
+        self.assertEqual(self.resolve(date_from='2026-01-10').period, 'month')
+
+    def test_invalid_dates(self):
+        with self.assertRaises(ValueError):
+            self.resolve(date='18/10/2026')
+        with self.assertRaises(ValueError):
+            self.resolve(date_from='2026-01-20', date_to='2026-01-10')
+
+
+class PreviousPeriodTests(SimpleTestCase):
+
+    def test_single_day(self):
+        self.assertEqual(previous_period(date(2026, 10, 18), date(2026, 10, 18)), (date(2026, 10, 17), date(2026, 10, 17)))
+
+    def test_single_day_on_first_of_month(self):
+        self.assertEqual(previous_period(date(2026, 10, 1), date(2026, 10, 1)), (date(2026, 9, 30), date(2026, 9, 30)))
+        self.assertEqual(previous_period(date(2026, 1, 1), date(2026, 1, 1)), (date(2025, 12, 31), date(2025, 12, 31)))
+
+    def test_month_to_date(self):
+        self.assertEqual(
+            previous_period(date(2026, 10, 1), date(2026, 10, 18), by_month=True),
+            (date(2026, 9, 1), date(2026, 9, 18))
+        )
+
+    def test_month_to_date_clipped_to_shorter_month(self):
+        self.assertEqual(
+            previous_period(date(2026, 3, 1), date(2026, 3, 30), by_month=True),
+            (date(2026, 2, 1), date(2026, 2, 28))
+        )
+
+    def test_full_month(self):
+        self.assertEqual(previous_period(date(2026, 9, 1), date(2026, 9, 30)), (date(2026, 8, 1), date(2026, 8, 31)))
+        self.assertEqual(previous_period(date(2026, 3, 1), date(2026, 3, 31)), (date(2026, 2, 1), date(2026, 2, 28)))
+
+    def test_custom_range_shifts_by_its_length(self):
+        self.assertEqual(previous_period(date(2026, 10, 12), date(2026, 10, 18)), (date(2026, 10, 5), date(2026, 10, 11)))
+
+    def test_date_range_previous_month(self):
+        previous = DateRange(date(2026, 10, 1), date(2026, 10, 1), period='month').previous()
+        self.assertEqual((previous.date_from, previous.date_to), (date(2026, 9, 1), date(2026, 9, 1)))
+
+
+@override_settings(TIME_ZONE='Europe/Madrid')
+class DaylightSavingTests(SimpleTestCase):
+    """Días con cambio de horario: cada límite es la medianoche local"""
+
+    @staticmethod
+    def hours(start, end):
+        # Restar aware con la misma zona da horas de reloj: se mide en UTC
+        return end.astimezone(dt_timezone.utc) - start.astimezone(dt_timezone.utc)
+
+    def test_spring_forward_day_has_23_hours(self):
+        start, end = day_range(date(2026, 3, 29))
+        self.assertEqual(self.hours(start, end), timedelta(hours=23))
+
+    def test_fall_back_day_has_25_hours(self):
+        start, end = day_range(date(2026, 10, 25))
+        self.assertEqual(self.hours(start, end), timedelta(hours=25))
+
+    def test_range_across_change_is_contiguous(self):
+        period = DateRange(date(2026, 10, 24), date(2026, 10, 26))
+        self.assertEqual(period.start, day_range(date(2026, 10, 24))[0])
+        self.assertEqual(period.end, day_range(date(2026, 10, 26))[1])
+        self.assertEqual(self.hours(period.start, period.end), timedelta(hours=73))
+
+
+class FormatValueTests(SimpleTestCase):
+
+    def test_decimal_uses_configured_separator(self):
+        self.assertEqual(format_value(Decimal('1234.5')), '1234,50')
+        with self.settings(EXPORT_DECIMAL_SEPARATOR='.'):
+            self.assertEqual(format_value(Decimal('-3')), '-3.00')
+
+    def test_formula_prefixes_are_escaped(self):
+        for value in ('=HYPERLINK("x")', '+54 11', '-1', '@SUM(A1)', '\tx'):
+            self.assertEqual(format_value(value), f"'{value}")
+        self.assertEqual(format_value('Juan Pérez'), 'Juan Pérez')
+
+
+def require_product_fts(test):
+    if 'inventory_product_fts' not in connection.introspection.table_names():
+        test.skipTest('SQLite sin FTS5 trigram')
+
+
+def search_skus(term):
+    return list(apply_search(Product.objects.all(), 'product', term).values_list('sku', flat=True))
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Repuestos')
+
+    def product(self, sku, name, **extra):
+        return Product(
+            category=self.category, sku=sku, name=name,
+            unit_price=10, sale_price=20, **extra
+        )
+
+    def test_ranking_exact_then_prefix_then_rest(self):
+        Product.objects.bulk_create([
+            self.product('XYZ-9', 'Flex compatible MOD-1'),
+            self.product('MOD-12', 'Módulo ampliado'),
+            self.product('MOD-1', 'Módulo'),
+        ])
+        self.assertEqual(search_skus('mod-1'), ['MOD-1', 'MOD-12', 'XYZ-9'])
+
+    def test_every_word_must_match(self):
+        Product.objects.bulk_create([
+            self.product('A-1', 'Pantalla Samsung A52'),
+            self.product('A-2', 'Pantalla Motorola G8'),
+        ])
+        self.assertEqual(search_skus('pantalla samsung'), ['A-1'])
+
+    def test_short_words_fall_back_to_icontains(self):
+        Product.objects.bulk_create([
+            self.product('G-1', 'Vidrio templado G8'),
+            self.product('G-2', 'Vidrio templado A52'),
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(search_skus('g8'), ['G-1'])
+        self.assertNotIn(' MATCH ', queries[0]['sql'])
+
+    def test_fts_follows_bulk_create_and_update(self):
+        require_product_fts(self)
+        Product.objects.bulk_create([self.product('BAT-1', 'Batería iPhone 11')])
+        self.assertEqual(search_skus('iphone'), ['BAT-1'])
+
+        Product.objects.filter(sku='BAT-1').update(name='Batería Galaxy S10')
+        self.assertEqual(search_skus('iphone'), [])
+        self.assertEqual(search_skus('galaxy'), ['BAT-1'])
+
+        Product.objects.filter(sku='BAT-1').delete()
+        self.assertEqual(search_skus('galaxy'), [])
+
+
+class RepairSearchTriggersTests(TransactionTestCase):
+    """Un AlterField reconstruye la tabla en SQLite y borra los triggers"""
+
+    def setUp(self):
+        require_product_fts(self)
+
+    def triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'inventory_product'"
+            )
+            return {name for name, in cursor.fetchall()}
+
+    def alter_name(self, from_length, to_length):
+        fields = []
+        for max_length in (from_length, to_length):
+            field = Product._meta.get_field('name').clone()
+            field.set_attributes_from_name('name')
+            field.model = Product
+            field.max_length = max_length
+            fields.append(field)
+        with connection.schema_editor() as editor:
+            editor.alter_field(Product, *fields)
+
+    def test_repair_after_alter_field(self):
+        expected = {f'inventory_product_fts_{suffix}' for suffix in ('ai', 'ad', 'au')}
+        category = Category.objects.create(name='Repuestos')
+        length = Product._meta.get_field('name').max_length
+        try:
+            self.alter_name(length, length + 50)
+            self.assertEqual(self.triggers() & expected, set())
+            # Escritura sin triggers: el índice queda desactualizado
+            Product.objects.create(category=category, sku='CAM-1', name='Cámara trasera', unit_price=1, sale_price=2)
+            self.assertEqual(search_skus('trasera'), [])
+
+            self.assertEqual(repair_sqlite_triggers(), ['inventory_product'])
+            self.assertEqual(self.triggers() & expected, expected)
+            self.assertEqual(search_skus('trasera'), ['CAM-1'])
+            self.assertEqual(repair_sqlite_triggers(), [])
+        finally:
+            self.alter_name(length + 50, length)
+            repair_sqlite_triggers()
+
+
+class QueryPlanTests(TestCase):
+    """Las consultas de los endpoints (core.query_plans) usan índices"""
+
+    def test_endpoint_queries_use_indexes(self):
+        if not is_supported():
+            self.skipTest(f'Motor {connection.vendor} sin verificación de planes')
+        failures = {name: scans for name, _, scans in check_plans() if scans}
+        self.assertEqual(failures, {})
+
+
+class CursorValidationTests(TestCase):
+    """Un cursor con valores que no corresponden al orden es un 404, no un 500"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='clave', role='admin'))
+
+    def cursor(self, values):
+        payload = json.dumps({'v': values, 'b': False}).encode()
+        return base64.urlsafe_b64encode(payload).decode()
+
+    def test_invalid_values_are_rejected(self):
+        for values in (['x', 'y'], [None, 1], [{'a': 1}, 2], ['2024-01-01T10:00:00', 'z']):
+            with self.subTest(values=values):
+                response = self.client.get('/api/sales/sales/', {'cursor': self.cursor(values)})
+                self.assertEqual(response.status_code, 404)
+
+    def test_valid_values_are_accepted(self):
+        response = self.client.get('/api/sales/sales/', {'cursor': self.cursor(['2024-01-01T10:00:00-03:00', 5])})
+        self.assertEqual(response.status_code, 200)
+
+
+class SerializerMetricsTests(TestCase):
+    """La serialización de DRF se mide aparte del código de la vista"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='clave', role='admin'))
+        Category.objects.create(name='Celulares')
+        registry.reset()
+
+    def observed(self, name):
+        (histogram,) = registry._histograms[name].values()
+        return histogram.total
+
+    def test_serializer_time_is_its_own_metric(self):
+        to_representation = CategorySerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return to_representation(serializer, instance)
+
+        with mock.patch.object(CategorySerializer, 'to_representation', slow):
+            response = self.client.get('/api/inventory/categories/')
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(self.observed('puntotecno_request_serializer_seconds'), 0.05)
+        self.assertLess(self.observed('puntotecno_request_app_seconds'), 0.05)
+
+
+class SqliteSettingsTests(TestCase):
+    """WAL queda en el archivo y cada conexión nueva no suma consultas"""
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Solo SQLite')
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_wal_is_persisted_by_the_migration(self):
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+
+    def test_new_connection_applies_settings_without_queries(self):
+        # Una conexión aparte, como la de cada petición con CONN_MAX_AGE=0
+        other = connections.create_connection('default')
+        try:
+            with CaptureQueriesContext(other) as queries:
+                other.ensure_connection()
+            self.assertEqual(len(queries), 0)
+            self.assertEqual(other.connection.execute('PRAGMA synchronous').fetchone()[0], 1)
+            self.assertEqual(other.connection.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+        finally:
+            other.close()
@@ -5,13 +5,17 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from django.http import HttpResponse
 from .serializers import UserSerializer, UserProfileSerializer
 from .permissions import IsAdmin
+from .metrics import registry
+from .mixins import SerializerTimingMixin
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para la gestión de usuarios
     Solo accesible para administradores
@@ -79,3 +83,17 @@ class UserViewSet(viewsets.ModelViewSet):
         user.save()
         
         return Response({'message': 'Contraseña actualizada correctamente'})
+
+
+class MetricsView(APIView):
+    """
+    Métricas de peticiones en formato Prometheus (solo administradores)
+    GET /api/metrics/
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+    
+    def get(self, request):
+        return HttpResponse(
+            registry.render(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
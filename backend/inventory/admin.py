@@ -1,5 +1,35 @@
-from django.contrib import admin
-from .models import Category, Product, StockMovement
+from django import forms
+from django.contrib import admin, messages
+from rest_framework import serializers
+
+from . import ledger
+from .models import Category, Product, StockMovement, StockSnapshot
+
+
+class ProductAdminForm(forms.ModelForm):
+    """
+    El stock de un producto existente no se edita directamente: se carga un
+    movimiento (Ajuste de stock) que pasa por el libro como en la API.
+    """
+    stock_movement_type = forms.ChoiceField(
+        label='Tipo de movimiento',
+        choices=[('', '---------')] + list(StockMovement.MOVEMENT_TYPES),
+        required=False
+    )
+    stock_quantity = forms.IntegerField(label='Cantidad', min_value=0, required=False)
+    stock_reason = forms.CharField(label='Motivo', required=False)
+
+    class Meta:
+        model = Product
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        movement_type = cleaned_data.get('stock_movement_type')
+        quantity = cleaned_data.get('stock_quantity')
+        if bool(movement_type) != (quantity is not None):
+            raise forms.ValidationError('Para ajustar el stock indique el tipo de movimiento y la cantidad.')
+        return cleaned_data
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -8,21 +38,88 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    form = ProductAdminForm
     list_display = ('name', 'sku', 'category', 'quantity', 'min_stock', 'unit_price', 'sale_price', 'is_active')
     list_filter = ('category', 'is_active')
     search_fields = ('name', 'sku')
     
+    STOCK_FIELDS = ('stock_movement_type', 'stock_quantity', 'stock_reason')
+    
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('category')
+    
+    def get_readonly_fields(self, request, obj=None):
+        # El stock inicial se carga al crear; después solo con movimientos
+        if obj is not None:
+            return self.readonly_fields + ('quantity',)
+        return self.readonly_fields
+    
+    def get_fieldsets(self, request, obj=None):
+        fields = [field for field in self.get_fields(request, obj) if field not in self.STOCK_FIELDS]
+        if obj is None:
+            return [(None, {'fields': fields})]
+        return [
+            (None, {'fields': fields}),
+            ('Ajuste de stock', {'fields': self.STOCK_FIELDS}),
+        ]
+    
+    def save_model(self, request, obj, form, change):
+        if not change:
+            super().save_model(request, obj, form, change)
+            ledger.record_opening(obj, user=request.user)
+            return
+        
+        # Sin quantity: un save() completo pisaría el stock que haya
+        # descontado una venta desde que se abrió el formulario
+        obj.save(update_fields=[
+            field.name for field in Product._meta.concrete_fields
+            if not field.primary_key and field.name not in ('quantity', 'created_at')
+        ])
+        
+        movement_type = form.cleaned_data.get('stock_movement_type')
+        if movement_type:
+            try:
+                ledger.apply_movement(
+                    obj,
+                    movement_type,
+                    form.cleaned_data['stock_quantity'],
+                    reason=form.cleaned_data.get('stock_reason', ''),
+                    user=request.user,
+                )
+            except serializers.ValidationError as error:
+                self.message_user(request, f'Stock sin cambios: {error.detail[0]}', messages.ERROR)
 
 @admin.register(StockMovement)
 class StockMovementAdmin(admin.ModelAdmin):
-    list_display = ('product', 'movement_type', 'quantity', 'user', 'created_at')
-    list_filter = ('movement_type', 'created_at')
-    search_fields = ('product__name', 'reason')
+    list_display = ('product', 'movement_type', 'quantity', 'source', 'reference', 'user', 'created_at')
+    list_filter = ('movement_type', 'source', 'created_at')
+    search_fields = ('product__name', 'reason', 'reference')
     readonly_fields = ('created_at',)
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('product', 'user')
+    
+    # El libro de movimientos solo crece: los movimientos se registran desde
+    # ventas, órdenes y ajustes (inventory.ledger) y se corrigen con otro
+    # movimiento, nunca editándolos
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('product', 'taken_at', 'quantity')
+    list_filter = ('taken_at',)
+    search_fields = ('product__name', 'product__sku')
+    readonly_fields = ('created_at',)
+    
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.select_related('product')
@@ -0,0 +1,298 @@
+"""
+Libro de movimientos de stock
+
+Toda variación de Product.quantity pasa por este módulo, que escribe los
+movimientos (StockMovement) con bulk_create y aplica las variaciones con un
+único UPDATE (inventory.stock). Product.quantity queda como saldo cacheado
+del libro: cada movimiento guarda el stock anterior y el nuevo.
+
+Para consultar el stock a una fecha no se recorre todo el historial: se
+parte del último StockSnapshot anterior a la fecha (tomados a medianoche
+local, ver take_snapshot) y se suma solo la cola de movimientos posteriores.
+"""
+from django.db import transaction
+from django.db.models import F, Max, Subquery, Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.cache import invalidate
+from core.dates import local_midnight
+
+from .models import Product, StockMovement, StockSnapshot
+from .stock import apply_quantity_deltas, lock_all_products, lock_products
+
+SNAPSHOT_BATCH_SIZE = 2000
+
+
+def _default_reason(source, reference):
+    if source == 'manual':
+        return ''
+    label = dict(StockMovement.SOURCES)[source]
+    return f'{label} {reference}'.strip()
+
+
+def next_quantity(movement_type, current, quantity):
+    """Stock resultante de un movimiento: 'adjustment' fija el valor"""
+    if movement_type == 'in':
+        return current + quantity
+    if movement_type == 'out':
+        return current - quantity
+    return quantity
+
+
+def post(products, deltas, source, reference='', reason='', user=None):
+    """
+    Registra variaciones {product_id: delta} sobre productos ya bloqueados
+    (lock_products): un movimiento por producto y un solo UPDATE de stock.
+    Actualiza también quantity en los objetos de `products`.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return []
+
+    reason = reason or _default_reason(source, reference)
+    movements = []
+    for pk, delta in deltas.items():
+        product = products[pk]
+        movements.append(StockMovement(
+            product=product,
+            movement_type='in' if delta > 0 else 'out',
+            quantity=abs(delta),
+            previous_quantity=product.quantity,
+            new_quantity=product.quantity + delta,
+            reason=reason,
+            source=source,
+            reference=reference,
+            user=user,
+        ))
+    StockMovement.objects.bulk_create(movements)
+
+    apply_quantity_deltas(deltas)
+    for pk, delta in deltas.items():
+        products[pk].quantity += delta
+    return movements
+
+
+def apply_movements(lines, user=None, source='manual', reference=''):
+    """
+    Aplica movimientos [{product, movement_type, quantity, reason}] en el
+    orden recibido; product puede ser un id o un Product. Debe llamarse
+    dentro de una transacción.
+
+    Bloquea todos los productos con un único SELECT, valida todas las líneas
+    juntas (si alguna deja stock negativo no se aplica ninguna) y retorna
+    los movimientos creados.
+    """
+    product_ids = [getattr(line['product'], 'pk', line['product']) for line in lines]
+    products = lock_products(set(product_ids))
+    balances = {pk: product.quantity for pk, product in products.items()}
+
+    errors = []
+    movements = []
+    for number, (product_id, line) in enumerate(zip(product_ids, lines), 1):
+        prefix = f'Línea {number}: ' if len(lines) > 1 else ''
+        product = products.get(product_id)
+        if product is None:
+            errors.append(f'{prefix}Producto con id={product_id} no encontrado.')
+            continue
+
+        previous = balances[product_id]
+        new = next_quantity(line['movement_type'], previous, line['quantity'])
+        if new < 0:
+            errors.append(f'{prefix}No hay suficiente stock. Disponible: {previous}')
+            continue
+
+        balances[product_id] = new
+        movements.append(StockMovement(
+            product=product,
+            movement_type=line['movement_type'],
+            quantity=line['quantity'],
+            previous_quantity=previous,
+            new_quantity=new,
+            reason=line.get('reason') or _default_reason(source, reference),
+            source=source,
+            reference=reference,
+            user=user,
+        ))
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    StockMovement.objects.bulk_create(movements)
+
+    apply_quantity_deltas({
+        pk: balances[pk] - product.quantity for pk, product in products.items()
+    })
+    for pk, product in products.items():
+        product.quantity = balances[pk]
+    return movements
+
+
+def apply_movement(product, movement_type, quantity, reason='', user=None,
+                   source='manual', reference=''):
+    """
+    Aplica un único movimiento sin bloquear la fila de antemano. Debe
+    llamarse dentro de una transacción.
+
+    Escribe solo quantity con un UPDATE condicionado al stock leído en
+    `product` (compare-and-swap): si nadie lo cambió entretanto, ese valor
+    es el stock anterior exacto del movimiento y no hace falta volver a
+    leerlo. Si el UPDATE no afecta filas, se bloquea el producto y se
+    aplica sobre el stock actual (una salida sin stock suficiente se
+    rechaza recién con el stock bloqueado). Actualiza product.quantity y retorna el
+    movimiento creado.
+    """
+    previous = product.quantity
+    new = next_quantity(movement_type, previous, quantity)
+    swapped = new >= 0 and Product.objects.filter(
+        pk=product.pk, quantity=previous
+    ).update(quantity=new)
+
+    if not swapped:
+        locked = lock_products([product.pk]).get(product.pk)
+        if locked is None:
+            raise serializers.ValidationError([f'Producto con id={product.pk} no encontrado.'])
+        previous = locked.quantity
+        new = next_quantity(movement_type, previous, quantity)
+        if new < 0:
+            raise serializers.ValidationError([f'No hay suficiente stock. Disponible: {previous}'])
+        Product.objects.filter(pk=product.pk).update(quantity=new)
+
+    movement = StockMovement.objects.create(
+        product=product,
+        movement_type=movement_type,
+        quantity=quantity,
+        previous_quantity=previous,
+        new_quantity=new,
+        reason=reason or _default_reason(source, reference),
+        source=source,
+        reference=reference,
+        user=user,
+    )
+    product.quantity = new
+    # update() no emite señales
+    invalidate('inventory')
+    return movement
+
+
+def record_opening(product, user=None):
+    """Movimiento de stock inicial de un producto recién creado"""
+    if not product.quantity:
+        return None
+    return StockMovement.objects.create(
+        product=product,
+        movement_type='in',
+        quantity=product.quantity,
+        previous_quantity=0,
+        new_quantity=product.quantity,
+        reason=_default_reason('opening', ''),
+        source='opening',
+        user=user,
+    )
+
+
+def _tail(start=None, end=None, product_ids=None):
+    """Suma de variaciones {product_id: delta} de los movimientos en [start, end)"""
+    movements = StockMovement.objects.all()
+    if start is not None:
+        movements = movements.filter(created_at__gte=start)
+    if end is not None:
+        movements = movements.filter(created_at__lt=end)
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+    rows = movements.order_by().values('product_id').annotate(
+        delta=Sum(F('new_quantity') - F('previous_quantity'))
+    ).values_list('product_id', 'delta')
+    return dict(rows)
+
+
+def latest_snapshot_time(before):
+    """Fecha de corte del último snapshot con taken_at <= before (o None)"""
+    return StockSnapshot.objects.filter(
+        taken_at__lte=before
+    ).order_by('-taken_at').values_list('taken_at', flat=True).first()
+
+
+def stock_at(when, product_ids=None):
+    """
+    Stock {product_id: cantidad} en el instante `when` (aware).
+
+    Con snapshot: saldo del último snapshot anterior más los movimientos
+    entre su fecha de corte y `when`. Sin snapshot: stock actual menos los
+    movimientos posteriores a `when`.
+    """
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+
+    taken_at = latest_snapshot_time(when)
+    if taken_at is None:
+        balances = dict(products.values_list('pk', 'quantity'))
+        for pk, delta in _tail(start=when, product_ids=product_ids).items():
+            if pk in balances:
+                balances[pk] -= delta
+        return balances
+
+    balances = dict.fromkeys(products.values_list('pk', flat=True), 0)
+    snapshots = StockSnapshot.objects.filter(taken_at=taken_at)
+    if product_ids is not None:
+        snapshots = snapshots.filter(product_id__in=product_ids)
+    balances.update(snapshots.values_list('product_id', 'quantity'))
+    for pk, delta in _tail(taken_at, when, product_ids).items():
+        if pk in balances:
+            balances[pk] += delta
+    return balances
+
+
+def book_balances(taken_at):
+    """
+    Saldo actual de cada producto según el libro {product_id: cantidad}, sin
+    mirar Product.quantity: el snapshot de taken_at más los movimientos
+    posteriores o, con taken_at=None, el stock nuevo del último movimiento
+    (mayor id). Los productos sin snapshot ni movimientos no aparecen.
+    """
+    if taken_at is None:
+        last_ids = StockMovement.objects.order_by().values('product_id').annotate(
+            last_id=Max('id')
+        ).values('last_id')
+        return dict(
+            StockMovement.objects.filter(id__in=Subquery(last_ids))
+            .values_list('product_id', 'new_quantity')
+        )
+
+    balances = dict(
+        StockSnapshot.objects.filter(taken_at=taken_at).values_list('product_id', 'quantity')
+    )
+    for pk, delta in _tail(start=taken_at).items():
+        balances[pk] = balances.get(pk, 0) + delta
+    return balances
+
+
+def take_snapshot(day=None):
+    """
+    Guarda el stock de todos los productos al inicio del día local `day`
+    (por defecto hoy). Se arma con el snapshot anterior más los movimientos
+    del intervalo; el primero, con el stock actual menos los movimientos
+    posteriores al corte. Reemplaza un snapshot existente del mismo corte.
+    Retorna la cantidad de filas guardadas.
+
+    Los productos quedan bloqueados mientras se lee: una venta confirmada
+    entre la lectura del stock y la de los movimientos descuadraría el
+    primer snapshot.
+    """
+    taken_at = local_midnight(day or timezone.localdate())
+    if taken_at > timezone.now():
+        raise ValueError('No se puede tomar un snapshot de una fecha futura')
+
+    with transaction.atomic():
+        lock_all_products()
+        # El snapshot que se reemplaza no debe usarse como base de sí mismo
+        StockSnapshot.objects.filter(taken_at=taken_at).delete()
+        balances = stock_at(taken_at)
+        StockSnapshot.objects.bulk_create(
+            [
+                StockSnapshot(product_id=pk, taken_at=taken_at, quantity=quantity)
+                for pk, quantity in balances.items()
+            ],
+            batch_size=SNAPSHOT_BATCH_SIZE
+        )
+    return len(balances)
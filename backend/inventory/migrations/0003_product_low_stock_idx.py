@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_product_supplier'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('quantity__lte', models.F('min_stock'))), fields=['-created_at'], name='product_low_stock_idx'),
+        ),
+    ]
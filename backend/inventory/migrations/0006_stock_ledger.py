@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='reference',
+            field=models.CharField(blank=True, help_text='Número de venta u orden que generó el movimiento', max_length=50, verbose_name='Referencia'),
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='source',
+            field=models.CharField(choices=[('manual', 'Manual'), ('opening', 'Stock inicial'), ('sale', 'Venta'), ('sale_cancel', 'Anulación de venta'), ('order', 'Orden de reparación'), ('reconciliation', 'Conciliación')], default='manual', max_length=20, verbose_name='Origen'),
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField(verbose_name='Fecha de corte')),
+                ('quantity', models.IntegerField(verbose_name='Cantidad')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de stock',
+                'verbose_name_plural': 'Snapshots de stock',
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['taken_at'], name='snapshot_taken_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('product', 'taken_at'), name='snapshot_product_taken_uniq'),
+        ),
+    ]
@@ -35,6 +35,18 @@ class Category(models.Model):
         return self.name
 
 
+class ProductQuerySet(models.QuerySet):
+    """QuerySet de productos con filtros reutilizables"""
+    
+    def low_stock(self):
+        """Productos con stock igual o menor al mínimo (resuelto en SQL)"""
+        return self.filter(quantity__lte=models.F('min_stock'))
+    
+    def low_stock_alerts(self):
+        """Productos activos con stock bajo (alertas y estadísticas)"""
+        return self.low_stock().filter(is_active=True)
+
+
 class Product(models.Model):
     """
     Modelo de productos en inventario
@@ -105,10 +117,23 @@ class Product(models.Model):
         verbose_name='Última actualización'
     )
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='product_created_idx'),
+            models.Index(fields=['is_active', 'quantity', 'min_stock'], name='product_active_stock_idx'),
+            # Índice parcial: solo contiene los productos con stock bajo,
+            # en el orden por defecto del listado
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(quantity__lte=models.F('min_stock')),
+                name='product_low_stock_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -132,6 +157,15 @@ class StockMovement(models.Model):
         ('adjustment', 'Ajuste'),
     )
     
+    SOURCES = (
+        ('manual', 'Manual'),
+        ('opening', 'Stock inicial'),
+        ('sale', 'Venta'),
+        ('sale_cancel', 'Anulación de venta'),
+        ('order', 'Orden de reparación'),
+        ('reconciliation', 'Conciliación'),
+    )
+    
     product = models.ForeignKey(
         Product,
         on_delete=models.CASCADE,
@@ -161,6 +195,20 @@ class StockMovement(models.Model):
         verbose_name='Motivo'
     )
     
+    source = models.CharField(
+        max_length=20,
+        choices=SOURCES,
+        default='manual',
+        verbose_name='Origen'
+    )
+    
+    reference = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Referencia',
+        help_text='Número de venta u orden que generó el movimiento'
+    )
+    
     user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -178,6 +226,56 @@ class StockMovement(models.Model):
         verbose_name = 'Movimiento de stock'
         verbose_name_plural = 'Movimientos de stock'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='movement_created_idx'),
+            models.Index(fields=['product', '-created_at'], name='movement_product_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_movement_type_display()} - {self.product.name} ({self.quantity})"
+
+    @property
+    def delta(self):
+        """Variación de stock que produjo el movimiento"""
+        return self.new_quantity - self.previous_quantity
+
+
+class StockSnapshot(models.Model):
+    """
+    Stock de un producto a una fecha de corte (medianoche local).
+    quantity es el saldo con todos los movimientos anteriores a taken_at;
+    el stock a una fecha posterior es el snapshot más la cola de movimientos.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+        verbose_name='Producto'
+    )
+    
+    taken_at = models.DateTimeField(
+        verbose_name='Fecha de corte'
+    )
+    
+    quantity = models.IntegerField(
+        verbose_name='Cantidad'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Fecha de creación'
+    )
+    
+    class Meta:
+        verbose_name = 'Snapshot de stock'
+        verbose_name_plural = 'Snapshots de stock'
+        ordering = ['-taken_at']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'taken_at'], name='snapshot_product_taken_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['taken_at'], name='snapshot_taken_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} @ {self.taken_at:%Y-%m-%d}: {self.quantity}"
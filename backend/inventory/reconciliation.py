@@ -0,0 +1,88 @@
+"""
+Conciliación de Product.quantity contra el libro de movimientos
+
+El stock esperado de cada producto sale del libro (inventory.ledger): el
+último snapshot más los movimientos posteriores, o el último movimiento si
+todavía no hay snapshots. Todo se calcula con consultas agregadas sobre
+todos los productos a la vez, sin recorrerlos uno por uno.
+
+Una diferencia significa que quantity se modificó sin pasar por el libro
+(datos anteriores al libro, ediciones directas en la base). La corrección
+registra un movimiento de ajuste que lleva el libro al stock actual: no
+cambia Product.quantity, que es el valor contra el que se vendió.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import book_balances, latest_snapshot_time
+from .models import Product, StockMovement
+from .stock import lock_products
+
+APPLY_BATCH_SIZE = 1000
+
+
+def find_drift():
+    """
+    Productos cuyo stock difiere del libro. Retorna (revisados, diferencias)
+    donde cada diferencia es {product_id, sku, name, quantity, expected,
+    difference}, ordenadas por diferencia absoluta descendente.
+    """
+    taken_at = latest_snapshot_time(timezone.now())
+    book = book_balances(taken_at)
+    stock = dict(Product.objects.values_list('pk', 'quantity'))
+
+    drifting = {}
+    for pk, quantity in stock.items():
+        # Con snapshot el libro conoce todos los productos (los nuevos
+        # arrancan en 0); sin snapshot, solo los que tienen movimientos
+        expected = book.get(pk, 0 if taken_at else None)
+        if expected is not None and expected != quantity:
+            drifting[pk] = expected
+
+    names = Product.objects.filter(pk__in=drifting).values_list('pk', 'sku', 'name')
+    drifts = [
+        {
+            'product_id': pk,
+            'sku': sku,
+            'name': name,
+            'quantity': stock[pk],
+            'expected': drifting[pk],
+            'difference': stock[pk] - drifting[pk],
+        }
+        for pk, sku, name in names.iterator(chunk_size=APPLY_BATCH_SIZE)
+    ]
+    drifts.sort(key=lambda drift: (-abs(drift['difference']), drift['product_id']))
+    return len(stock), drifts
+
+
+def apply_corrections(drifts, user=None):
+    """
+    Registra un ajuste por producto con diferencia, en lotes de
+    APPLY_BATCH_SIZE (un SELECT FOR UPDATE y un bulk_create por lote).
+    La diferencia no cambia si entretanto se vende por el libro: el ajuste
+    se arma con el stock bloqueado. Retorna la cantidad de ajustes.
+    """
+    created = 0
+    for start in range(0, len(drifts), APPLY_BATCH_SIZE):
+        batch = drifts[start:start + APPLY_BATCH_SIZE]
+        with transaction.atomic():
+            products = lock_products([drift['product_id'] for drift in batch])
+            movements = []
+            for drift in batch:
+                product = products.get(drift['product_id'])
+                if product is None:
+                    continue
+                previous = product.quantity - drift['difference']
+                movements.append(StockMovement(
+                    product=product,
+                    movement_type='adjustment',
+                    quantity=product.quantity,
+                    previous_quantity=previous,
+                    new_quantity=product.quantity,
+                    reason=f'Conciliación: el libro indicaba {previous}',
+                    source='reconciliation',
+                    user=user,
+                ))
+            StockMovement.objects.bulk_create(movements)
+            created += len(movements)
+    return created
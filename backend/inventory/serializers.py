@@ -1,8 +1,10 @@
 """
 Serializadores para el sistema de inventario
 """
+from django.db import transaction
 from rest_framework import serializers
 from .models import Category, Product, StockMovement
+from . import ledger
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializador para categorías"""
@@ -15,7 +17,11 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
     
     def get_products_count(self, obj):
-        return obj.products.count()
+        # Los listados anotan products_count; se cuenta solo si no viene anotado
+        count = getattr(obj, 'products_count', None)
+        if count is None:
+            count = obj.products.count()
+        return count
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -41,6 +47,36 @@ class ProductSerializer(serializers.ModelSerializer):
     def get_total_value(self, obj):
         return float(obj.total_value())
 
+    def _user(self):
+        request = self.context.get('request')
+        return request.user if request else None
+
+    @transaction.atomic
+    def create(self, validated_data):
+        """Crea el producto y registra su stock inicial como movimiento"""
+        product = super().create(validated_data)
+        ledger.record_opening(product, user=self._user())
+        return product
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        """
+        Actualiza el producto. Un cambio de quantity se registra como ajuste
+        en el libro; el resto de los campos se guarda sin tocar quantity para
+        no pisar ventas concurrentes.
+        """
+        quantity = validated_data.pop('quantity', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+
+        if quantity is not None and quantity != instance.quantity:
+            ledger.apply_movement(
+                instance, 'adjustment', quantity,
+                reason='Edición del producto', user=self._user()
+            )
+        return instance
+
 
 class StockMovementSerializer(serializers.ModelSerializer):
     """Serializador para movimientos de stock"""
@@ -48,46 +84,28 @@ class StockMovementSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.name', read_only=True)
     user_name = serializers.SerializerMethodField()
     movement_type_display = serializers.CharField(source='get_movement_type_display', read_only=True)
+    source_display = serializers.CharField(source='get_source_display', read_only=True)
     
     class Meta:
         model = StockMovement
         fields = [
             'id', 'product', 'product_name', 'movement_type',
             'movement_type_display', 'quantity', 'previous_quantity',
-            'new_quantity', 'reason', 'user', 'user_name', 'created_at'
+            'new_quantity', 'reason', 'source', 'source_display', 'reference',
+            'user', 'user_name', 'created_at'
+        ]
+        read_only_fields = [
+            'id', 'previous_quantity', 'new_quantity', 'source', 'reference',
+            'user', 'created_at'
         ]
-        read_only_fields = ['id', 'previous_quantity', 'new_quantity', 'user', 'created_at']
     
     def get_user_name(self, obj):
         return obj.user.get_full_name() if obj.user else 'Sistema'
     
+    @transaction.atomic
     def create(self, validated_data):
         """Crea un movimiento de stock y actualiza la cantidad del producto"""
-        product = validated_data['product']
-        movement_type = validated_data['movement_type']
-        quantity = validated_data['quantity']
-        
-        # Guardar cantidad anterior
-        validated_data['previous_quantity'] = product.quantity
-        
-        # Calcular nueva cantidad según el tipo de movimiento
-        if movement_type == 'in':
-            product.quantity += quantity
-        elif movement_type == 'out':
-            if product.quantity < quantity:
-                raise serializers.ValidationError(
-                    f"No hay suficiente stock. Disponible: {product.quantity}"
-                )
-            product.quantity -= quantity
-        elif movement_type == 'adjustment':
-            product.quantity = quantity
-        
-        validated_data['new_quantity'] = product.quantity
-        product.save()
-        
-        # Crear el movimiento
-        movement = StockMovement.objects.create(**validated_data)
-        return movement
+        return ledger.apply_movement(**validated_data)
 
 
 class ProductStockUpdateSerializer(serializers.Serializer):
@@ -96,3 +114,23 @@ class ProductStockUpdateSerializer(serializers.Serializer):
     movement_type = serializers.ChoiceField(choices=['in', 'out', 'adjustment'])
     quantity = serializers.IntegerField(min_value=0)
     reason = serializers.CharField(required=False, allow_blank=True)
+
+
+class StockMovementLineSerializer(ProductStockUpdateSerializer):
+    """Línea de una carga masiva de movimientos"""
+    
+    # Id sin validar contra la base: el ledger busca todos los productos juntos
+    product = serializers.IntegerField(min_value=1)
+
+
+class BulkStockMovementSerializer(serializers.Serializer):
+    """Carga masiva de movimientos (por ejemplo, recepción de un remito)"""
+    
+    MAX_LINES = 1000
+    
+    reference = serializers.CharField(max_length=50, required=False, allow_blank=True)
+    movements = serializers.ListField(
+        child=StockMovementLineSerializer(),
+        min_length=1,
+        max_length=MAX_LINES
+    )
@@ -0,0 +1,70 @@
+"""
+Operaciones de stock en lote sobre Product.quantity
+"""
+from django.db import connection
+from django.db.models import Case, F, When
+
+from core.cache import invalidate
+
+from .models import Product
+
+
+def lock_products(product_ids):
+    """
+    Bloquea los productos indicados con un único SELECT ... FOR UPDATE.
+    Se ordena por id para que dos transacciones concurrentes tomen los
+    locks en el mismo orden y no se produzcan deadlocks.
+    Retorna un dict {id: producto}.
+
+    En SQLite select_for_update no bloquea nada, y una transacción que lee
+    y después escribe falla con "database is locked" si otro proceso
+    escribió en el medio (busy_timeout no aplica a ese caso). Ahí se toma
+    primero el lock de escritura de la base con un UPDATE sin cambios, por
+    lo que debe ser la primera consulta de la transacción o ir después de
+    otra escritura.
+    """
+    product_ids = list(product_ids)
+    if not connection.features.has_select_for_update:
+        Product.objects.filter(pk__in=product_ids).update(quantity=F('quantity'))
+
+    products = Product.objects.select_for_update().filter(
+        pk__in=product_ids
+    ).order_by('pk')
+    return {product.pk: product for product in products}
+
+
+def lock_all_products():
+    """
+    Bloquea todos los productos, para leer Product.quantity y los
+    movimientos de stock como un único estado consistente: ninguna venta
+    ni movimiento puede confirmarse entre ambas lecturas. Debe llamarse
+    dentro de una transacción.
+
+    En SQLite el lock de escritura es de toda la base: alcanza con un
+    UPDATE sin cambios sobre una sola fila (ver lock_products).
+    """
+    if not connection.features.has_select_for_update:
+        first = Product.objects.order_by('pk').values('pk')[:1]
+        Product.objects.filter(pk__in=first).update(quantity=F('quantity'))
+        return
+    list(Product.objects.select_for_update().order_by('pk').values_list('pk', flat=True))
+
+
+def apply_quantity_deltas(deltas):
+    """
+    Aplica variaciones de stock {product_id: delta} con un único UPDATE
+    (CASE por producto). Debe llamarse dentro de una transacción y con los
+    productos ya bloqueados.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    Product.objects.filter(pk__in=deltas).update(
+        quantity=Case(
+            *[When(pk=pk, then=F('quantity') + delta) for pk, delta in deltas.items()],
+            default=F('quantity')
+        )
+    )
+    # update() no emite señales
+    invalidate('inventory')
@@ -0,0 +1,185 @@
+"""
+Tests del libro de movimientos de stock
+"""
+import threading
+from datetime import timedelta
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.models import User
+from . import ledger
+from .models import Category, Product, StockMovement, StockSnapshot
+
+
+class ConcurrentStockUpdateTests(TransactionTestCase):
+    """Entradas y salidas simultáneas sobre un mismo producto (update_stock)"""
+
+    INITIAL_STOCK = 20
+    IN_THREADS, INS_PER_THREAD = 4, 15
+    OUT_THREADS, OUTS_PER_THREAD = 4, 25
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', password='clave', role='admin')
+        self.product = Product.objects.create(
+            category=Category.objects.create(name='Repuestos'), name='Batería',
+            sku='BAT-1', quantity=self.INITIAL_STOCK, min_stock=1, unit_price=100, sale_price=150
+        )
+
+    def _move(self, movement_type, count, statuses, errors):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = f'/api/inventory/products/{self.product.pk}/update_stock/'
+        try:
+            for _ in range(count):
+                response = client.post(url, {'movement_type': movement_type, 'quantity': 1}, format='json')
+                statuses.append((movement_type, response.status_code))
+        except Exception as error:  # noqa: BLE001 - se reporta en el assert
+            errors.append(repr(error))
+        finally:
+            connections.close_all()
+
+    def test_no_lost_updates(self):
+        statuses, errors = [], []
+        threads = [
+            threading.Thread(target=self._move, args=('in', self.INS_PER_THREAD, statuses, errors))
+            for _ in range(self.IN_THREADS)
+        ] + [
+            threading.Thread(target=self._move, args=('out', self.OUTS_PER_THREAD, statuses, errors))
+            for _ in range(self.OUT_THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Las entradas siempre se aplican; las salidas sin stock se rechazan con 400
+        ins = self.IN_THREADS * self.INS_PER_THREAD
+        self.assertEqual(statuses.count(('in', 200)), ins)
+        outs = statuses.count(('out', 200))
+        self.assertEqual(outs + statuses.count(('out', 400)), self.OUT_THREADS * self.OUTS_PER_THREAD)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, self.INITIAL_STOCK + ins - outs)
+        self.assertGreaterEqual(self.product.quantity, 0)
+
+        movements = list(StockMovement.objects.filter(product=self.product).order_by('id'))
+        self.assertEqual(len(movements), ins + outs)
+        self.assertEqual(movements[0].previous_quantity, self.INITIAL_STOCK)
+        self.assertEqual(movements[-1].new_quantity, self.product.quantity)
+        for previous, movement in zip(movements, movements[1:]):
+            self.assertEqual(movement.previous_quantity, previous.new_quantity)
+            self.assertGreaterEqual(movement.new_quantity, 0)
+
+
+class ProductAdminStockTests(TestCase):
+    """El admin no escribe Product.quantity por fuera del libro"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(username='root', password='clave', email='root@example.com')
+        cls.category = Category.objects.create(name='Repuestos')
+        cls.product = Product.objects.create(
+            category=cls.category, name='Pantalla', sku='PAN-1',
+            quantity=10, min_stock=1, unit_price=100, sale_price=150
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def change(self, **extra):
+        data = {
+            'category': self.category.pk, 'name': 'Pantalla OLED', 'description': '',
+            'sku': 'PAN-1', 'quantity': 999, 'min_stock': 1, 'unit_price': '100',
+            'sale_price': '150', 'supplier': '', 'is_active': 'on',
+            'stock_movement_type': '', 'stock_quantity': '', 'stock_reason': '',
+            **extra,
+        }
+        return self.client.post(f'/admin/inventory/product/{self.product.pk}/change/', data)
+
+    def test_edit_keeps_stock_written_meanwhile(self):
+        # Una venta descuenta stock mientras el formulario está abierto
+        Product.objects.filter(pk=self.product.pk).update(quantity=7)
+        self.assertEqual(self.change().status_code, 302)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.name, self.product.quantity), ('Pantalla OLED', 7))
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_adjustment_goes_through_ledger(self):
+        response = self.change(stock_movement_type='out', stock_quantity=3, stock_reason='Rotura')
+        self.assertEqual(response.status_code, 302)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 7)
+        movement = StockMovement.objects.get()
+        self.assertEqual(
+            (movement.previous_quantity, movement.new_quantity, movement.reason, movement.user),
+            (10, 7, 'Rotura', self.user)
+        )
+
+    def test_create_records_opening(self):
+        response = self.client.post('/admin/inventory/product/add/', {
+            'category': self.category.pk, 'name': 'Batería', 'description': '', 'sku': 'BAT-1',
+            'quantity': 4, 'min_stock': 1, 'unit_price': '50', 'sale_price': '80',
+            'supplier': '', 'is_active': 'on',
+        })
+        self.assertEqual(response.status_code, 302)
+        movement = StockMovement.objects.get(product__sku='BAT-1')
+        self.assertEqual((movement.source, movement.new_quantity), ('opening', 4))
+
+    def test_movements_are_read_only(self):
+        ledger.apply_movement(self.product, 'in', 1)
+        movement = StockMovement.objects.get()
+        self.assertEqual(self.client.get('/admin/inventory/stockmovement/add/').status_code, 403)
+        self.assertEqual(
+            self.client.post(f'/admin/inventory/stockmovement/{movement.pk}/delete/', {'post': 'yes'}).status_code,
+            403
+        )
+        self.assertTrue(StockMovement.objects.filter(pk=movement.pk).exists())
+
+
+class TakeSnapshotTests(TestCase):
+
+    def test_first_snapshot_matches_ledger(self):
+        product = Product.objects.create(
+            category=Category.objects.create(name='Repuestos'), name='Flex', sku='FLX-1',
+            quantity=10, min_stock=1, unit_price=10, sale_price=20
+        )
+        ledger.apply_movement(product, 'out', 4)
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(days=2))
+        ledger.apply_movement(product, 'in', 1)
+
+        yesterday = timezone.localdate() - timedelta(days=1)
+        self.assertEqual(ledger.take_snapshot(yesterday), 1)
+        self.assertEqual(StockSnapshot.objects.get(product=product).quantity, 6)
+
+
+class CategoryListQueryCountTests(TestCase):
+    """El listado de categorías anota products_count: no cuenta fila por fila"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='clave', role='admin'))
+
+    def add_categories(self, count):
+        for number in range(count):
+            category = Category.objects.create(name=f'Categoría {count}-{number}')
+            Product.objects.bulk_create([
+                Product(
+                    category=category, name='Producto', sku=f'SKU-{count}-{number}-{index}',
+                    unit_price=10, sale_price=20
+                )
+                for index in range(number % 3)
+            ])
+
+    def test_constant_queries(self):
+        for count in (2, 20):
+            self.add_categories(count)
+            with self.subTest(categories=Category.objects.count()), self.assertNumQueries(2):
+                response = self.client.get('/api/inventory/categories/')
+            self.assertEqual(response.status_code, 200)
+
+        counts = {row['id']: row['products_count'] for row in response.data['results']}
+        self.assertEqual(counts, {category.pk: category.products.count() for category in Category.objects.all()})
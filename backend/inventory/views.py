@@ -3,20 +3,44 @@ Vistas para el sistema de inventario
 """
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db import models
-from django.db.models import Q, Sum, Count
+from django.db import models, transaction
+from django.db.models import Sum, Count
 from .models import Category, Product, StockMovement
+from . import ledger, reconciliation
 from .serializers import (
+    BulkStockMovementSerializer,
     CategorySerializer,
     ProductSerializer,
     StockMovementSerializer,
     ProductStockUpdateSerializer
 )
+from core.cache import cached
+from core.dates import day_range, filter_by_days, parse_day, resolve_period
+from core.exports import Column, choice_label, full_name, period_filename, stream_csv
+from core.mixins import SerializerTimingMixin
 from core.permissions import IsAdmin, IsAdminOrReadOnly
+from core.search import apply_search
 
-class CategoryViewSet(viewsets.ModelViewSet):
+# Exportación de movimientos de stock
+MOVEMENT_EXPORT_COLUMNS = [
+    Column('Fecha', 'created_at'),
+    Column('SKU', 'product__sku'),
+    Column('Producto', 'product__name'),
+    Column('Tipo', 'movement_type', format=choice_label(StockMovement.MOVEMENT_TYPES)),
+    Column('Cantidad', 'quantity'),
+    Column('Stock anterior', 'previous_quantity'),
+    Column('Stock nuevo', 'new_quantity'),
+    Column('Motivo', 'reason'),
+    Column('Origen', 'source', format=choice_label(StockMovement.SOURCES)),
+    Column('Referencia', 'reference'),
+    Column('Usuario', 'user__first_name', 'user__last_name', 'user__username', format=full_name),
+]
+
+
+class CategoryViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de categorías
     """
@@ -25,7 +49,9 @@ class CategoryViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
     
     def get_queryset(self):
-        queryset = Category.objects.all()
+        queryset = Category.objects.annotate(
+            products_count=Count('products')
+        ).order_by('name')
         search = self.request.query_params.get('search', None)
         
         if search:
@@ -34,13 +60,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return queryset
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de productos
     """
     queryset = Product.objects.select_related('category').all()
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = Product.objects.select_related('category').all()
@@ -52,18 +79,13 @@ class ProductViewSet(viewsets.ModelViewSet):
         is_active = self.request.query_params.get('is_active', None)
         
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(sku__icontains=search) |
-                Q(description__icontains=search)
-            )
+            queryset = apply_search(queryset, 'product', search)
         
         if category:
             queryset = queryset.filter(category_id=category)
         
         if low_stock == 'true':
-            queryset = [p for p in queryset if p.is_low_stock()]
-            return queryset
+            queryset = queryset.low_stock()
         
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active == 'true')
@@ -76,10 +98,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         Retorna productos con stock bajo el mínimo
         GET /api/inventory/products/low_stock_alerts/
         """
-        products = Product.objects.filter(
-            quantity__lte=models.F('min_stock'),
-            is_active=True
-        )
+        products = Product.objects.select_related('category').low_stock_alerts()
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
     
@@ -100,53 +119,55 @@ class ProductViewSet(viewsets.ModelViewSet):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        # Obtener datos validados
-        movement_type = serializer.validated_data['movement_type']
-        quantity = serializer.validated_data['quantity']
-        reason = serializer.validated_data.get('reason', '')
-        
-        # Guardar cantidad anterior
-        previous_quantity = product.quantity
-        
-        # Calcular nueva cantidad según el tipo de movimiento
-        if movement_type == 'in':
-            new_quantity = product.quantity + quantity
-        elif movement_type == 'out':
-            if product.quantity < quantity:
-                return Response(
-                    {'error': f'No hay suficiente stock. Disponible: {product.quantity}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            new_quantity = product.quantity - quantity
-        elif movement_type == 'adjustment':
-            new_quantity = quantity
+        try:
+            with transaction.atomic():
+                # Deja en product.quantity el stock resultante (sin refresh_from_db)
+                ledger.apply_movement(product, user=request.user, **serializer.validated_data)
+        except ValidationError as error:
+            return Response({'error': error.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Crear movimiento de stock con todos los valores calculados
+        return Response(ProductSerializer(product).data)
+    
+    @action(detail=True, methods=['get'])
+    def stock_at(self, request, pk=None):
+        """
+        Stock del producto al cierre de un día
+        GET /api/inventory/products/{id}/stock_at/?date=YYYY-MM-DD
+        """
+        product = self.get_object()
         try:
-            movement = StockMovement.objects.create(
-                product=product,
-                movement_type=movement_type,
-                quantity=quantity,
-                reason=reason,
-                user=request.user,
-                previous_quantity=previous_quantity,
-                new_quantity=new_quantity
-            )
-            
-            # Actualizar cantidad del producto
-            product.quantity = new_quantity
-            product.save()
-            
-            # Retornar el producto actualizado
-            product.refresh_from_db()
-            product_serializer = ProductSerializer(product)
-            return Response(product_serializer.data)
-            
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            day = parse_day(request.query_params.get('date'))
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        _, end = day_range(day)
+        quantity = ledger.stock_at(end, product_ids=[product.pk]).get(product.pk, 0)
+        return Response({
+            'product': product.pk,
+            'date': day.isoformat(),
+            'quantity': quantity,
+        })
+    
+    @action(detail=False, methods=['get', 'post'], permission_classes=[IsAuthenticated, IsAdmin])
+    def reconciliation(self, request):
+        """
+        Compara el stock de cada producto con el libro de movimientos
+        GET /api/inventory/products/reconciliation/?limit=100
+        POST /api/inventory/products/reconciliation/ registra los ajustes
+        """
+        checked, drifts = reconciliation.find_drift()
+        payload = {'checked': checked, 'drifting': len(drifts)}
+        
+        if request.method == 'POST':
+            payload['corrected'] = reconciliation.apply_corrections(drifts, user=request.user)
+            return Response(payload)
+        
+        try:
+            limit = max(int(request.query_params.get('limit', 100)), 0)
+        except ValueError:
+            limit = 100
+        payload['items'] = drifts[:limit]
+        return Response(payload)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
@@ -154,11 +175,11 @@ class ProductViewSet(viewsets.ModelViewSet):
         Retorna estadísticas del inventario
         GET /api/inventory/products/statistics/
         """
+        return Response(cached('inventory', 'statistics', self.statistics_payload))
+
+    def statistics_payload(self):
         total_products = Product.objects.filter(is_active=True).count()
-        low_stock_count = Product.objects.filter(
-            quantity__lte=models.F('min_stock'),
-            is_active=True
-        ).count()
+        low_stock_count = Product.objects.low_stock_alerts().count()
         
         total_value = Product.objects.filter(is_active=True).aggregate(
             total=Sum(models.F('quantity') * models.F('unit_price'))
@@ -166,21 +187,22 @@ class ProductViewSet(viewsets.ModelViewSet):
         
         categories_count = Category.objects.count()
         
-        return Response({
+        return {
             'total_products': total_products,
             'low_stock_count': low_stock_count,
             'total_inventory_value': float(total_value),
             'categories_count': categories_count
-        })
+        }
 
 
-class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
+class StockMovementViewSet(SerializerTimingMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consultar movimientos de stock (solo lectura)
     """
     queryset = StockMovement.objects.select_related('product', 'user').all()
     serializer_class = StockMovementSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-created_at', '-id')
     
     def get_queryset(self):
         queryset = StockMovement.objects.select_related('product', 'user').all()
@@ -188,8 +210,7 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
         # Filtros
         product = self.request.query_params.get('product', None)
         movement_type = self.request.query_params.get('movement_type', None)
-        date_from = self.request.query_params.get('date_from', None)
-        date_to = self.request.query_params.get('date_to', None)
+        source = self.request.query_params.get('source', None)
         
         if product:
             queryset = queryset.filter(product_id=product)
@@ -197,10 +218,61 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
         if movement_type:
             queryset = queryset.filter(movement_type=movement_type)
         
-        if date_from:
-            queryset = queryset.filter(created_at__gte=date_from)
+        if source:
+            queryset = queryset.filter(source=source)
         
-        if date_to:
-            queryset = queryset.filter(created_at__lte=date_to)
+        queryset = filter_by_days(queryset, 'created_at', self.request.query_params)
         
         return queryset
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
+    def export(self, request):
+        """
+        Exporta a CSV los movimientos del período (acepta ?product y ?movement_type)
+        GET /api/inventory/movements/export/?period=today|week|month
+        GET /api/inventory/movements/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        """
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        movements = StockMovement.objects.filter(**period.lookups('created_at'))
+        if request.query_params.get('product'):
+            movements = movements.filter(product_id=request.query_params['product'])
+        if request.query_params.get('movement_type'):
+            movements = movements.filter(movement_type=request.query_params['movement_type'])
+        movements = movements.order_by('created_at', 'id')
+        return stream_csv(movements, MOVEMENT_EXPORT_COLUMNS, period_filename('movimientos', period))
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated, IsAdmin])
+    def bulk(self, request):
+        """
+        Registra varios movimientos a la vez, todos o ninguno
+        POST /api/inventory/movements/bulk/
+        Body: [{"product": 1, "movement_type": "in", "quantity": 10, "reason": "..."}, ...]
+        o { "reference": "Remito 0001-00001234", "movements": [...] }
+        """
+        data = request.data
+        if isinstance(data, list):
+            data = {'movements': data}
+        serializer = BulkStockMovementSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            with transaction.atomic():
+                movements = ledger.apply_movements(
+                    serializer.validated_data['movements'],
+                    user=request.user,
+                    reference=serializer.validated_data.get('reference', '')
+                )
+        except ValidationError as error:
+            return Response({'errors': error.detail}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Producto y usuario ya están en memoria: serializar no consulta la base
+        results = StockMovementSerializer(movements, many=True).data
+        return Response(
+            {'count': len(results), 'results': results},
+            status=status.HTTP_201_CREATED
+        )
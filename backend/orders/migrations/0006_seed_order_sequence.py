@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def seed_order_sequence(apps, schema_editor):
+    """Inicializa el contador ORD con el mayor número de orden existente"""
+    RepairOrder = apps.get_model('orders', 'RepairOrder')
+    Sequence = apps.get_model('core', 'Sequence')
+
+    last_value = 0
+    numbers = RepairOrder.objects.filter(order_number__startswith='ORD-').values_list('order_number', flat=True)
+    for order_number in numbers.iterator():
+        try:
+            last_value = max(last_value, int(order_number.split('-')[1]))
+        except (IndexError, ValueError):
+            continue
+
+    Sequence.objects.update_or_create(prefix='ORD', defaults={'last_value': last_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sequence'),
+        ('orders', '0005_fix_payment_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_order_sequence, migrations.RunPython.noop),
+    ]
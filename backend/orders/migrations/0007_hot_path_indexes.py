@@ -0,0 +1,39 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_seed_order_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['last_name', 'first_name'], name='customer_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(fields=['-received_date'], name='order_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(fields=['status', '-received_date'], name='order_status_received_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(fields=['assigned_to', 'status'], name='order_assigned_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(fields=['status', 'delivered_date'], name='order_status_delivered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='repairorder',
+            index=models.Index(condition=models.Q(('balance__gt', 0)), fields=['-received_date'], name='order_pending_balance_idx'),
+        ),
+    ]
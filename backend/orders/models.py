@@ -3,6 +3,7 @@ Modelos para el sistema de órdenes de reparación
 """
 from django.db import models
 from django.contrib.auth import get_user_model
+from core.sequences import next_number
 
 User = get_user_model()
 
@@ -56,6 +57,9 @@ class Customer(models.Model):
         verbose_name = 'Cliente'
         verbose_name_plural = 'Clientes'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['last_name', 'first_name'], name='customer_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.last_name}, {self.first_name}"
@@ -68,6 +72,8 @@ class RepairOrder(models.Model):
     """
     Modelo de órdenes de reparación
     """
+    NUMBER_PREFIX = 'ORD'
+
     STATUS_CHOICES = (
         ('received', 'Recibido'),
         ('in_service', 'En Servicio'),
@@ -78,6 +84,10 @@ class RepairOrder(models.Model):
         ('delivered', 'Entregado'),
         ('cancelled', 'Cancelado'),
     )
+    # Órdenes cerradas (no cuentan como pendientes) y órdenes en las que
+    # todavía se está trabajando
+    CLOSED_STATUSES = ('delivered', 'cancelled')
+    WORKING_STATUSES = ('received', 'in_service')
     
     DEVICE_TYPES = (
         ('phone', 'Celular'),
@@ -277,6 +287,18 @@ class RepairOrder(models.Model):
         verbose_name = 'Orden de reparación'
         verbose_name_plural = 'Órdenes de reparación'
         ordering = ['-received_date']
+        indexes = [
+            models.Index(fields=['-received_date'], name='order_received_idx'),
+            models.Index(fields=['status', '-received_date'], name='order_status_received_idx'),
+            models.Index(fields=['assigned_to', 'status'], name='order_assigned_status_idx'),
+            models.Index(fields=['status', 'delivered_date'], name='order_status_delivered_idx'),
+            # Índice parcial (se omite en motores que no los soportan)
+            models.Index(
+                fields=['-received_date'],
+                condition=models.Q(balance__gt=0),
+                name='order_pending_balance_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Orden {self.order_number} - {self.customer.get_full_name()}"
@@ -284,13 +306,7 @@ class RepairOrder(models.Model):
     def save(self, *args, **kwargs):
         if not self.order_number:
             # Generar número de orden automático
-            last_order = RepairOrder.objects.all().order_by('-id').first()
-            if last_order and last_order.order_number:
-                last_number = int(last_order.order_number.split('-')[1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            self.order_number = f"ORD-{new_number:06d}"
+            self.order_number = next_number(self.NUMBER_PREFIX)
 
         # Solo recalcular balance y estado de pago si:
         # 1. Es una orden nueva (no tiene pk)
@@ -302,49 +318,53 @@ class RepairOrder(models.Model):
         )
 
         if should_recalculate:
-            # Obtener el costo total (preferir final_cost, sino estimated_cost)
-            total_cost = self.final_cost if self.final_cost else self.estimated_cost
+            self.apply_payment_defaults()
+
+        super().save(*args, **kwargs)
 
-            # Calcular balance y estado de pago según el método
-            if self.payment_method == 'account':
-                # Cuenta corriente - calcular saldo pendiente
+    def apply_payment_defaults(self):
+        """Calcula monto pagado, saldo y estado de pago según el método, sin guardar"""
+        # Obtener el costo total (preferir final_cost, sino estimated_cost)
+        total_cost = self.final_cost if self.final_cost else self.estimated_cost
+
+        # Calcular balance y estado de pago según el método
+        if self.payment_method == 'account':
+            # Cuenta corriente - calcular saldo pendiente
+            if total_cost:
+                self.balance = total_cost - self.paid_amount
+
+                # Actualizar estado de pago
+                if self.balance <= 0:
+                    self.payment_status = 'paid'
+                    self.balance = 0
+                elif self.paid_amount > 0:
+                    self.payment_status = 'partial'
+                else:
+                    self.payment_status = 'pending'
+        elif self.payment_method == 'not_paid':
+            # Sin abonar - calcular balance basado en adelanto/seña
+            if self.deposit_amount > 0:
+                self.paid_amount = self.deposit_amount
                 if total_cost:
                     self.balance = total_cost - self.paid_amount
 
-                    # Actualizar estado de pago
+                    # Actualizar estado
                     if self.balance <= 0:
                         self.payment_status = 'paid'
                         self.balance = 0
-                    elif self.paid_amount > 0:
-                        self.payment_status = 'partial'
                     else:
-                        self.payment_status = 'pending'
-            elif self.payment_method == 'not_paid':
-                # Sin abonar - calcular balance basado en adelanto/seña
-                if self.deposit_amount > 0:
-                    self.paid_amount = self.deposit_amount
-                    if total_cost:
-                        self.balance = total_cost - self.paid_amount
-
-                        # Actualizar estado
-                        if self.balance <= 0:
-                            self.payment_status = 'paid'
-                            self.balance = 0
-                        else:
-                            self.payment_status = 'partial'
-                else:
-                    # Sin adelanto - todo pendiente
-                    self.paid_amount = 0
-                    self.balance = total_cost if total_cost else 0
-                    self.payment_status = 'pending'
+                        self.payment_status = 'partial'
             else:
-                # Efectivo, Transferencia - considerado como pagado
-                if total_cost:
-                    self.paid_amount = total_cost
-                self.balance = 0
-                self.payment_status = 'paid'
-
-        super().save(*args, **kwargs)
+                # Sin adelanto - todo pendiente
+                self.paid_amount = 0
+                self.balance = total_cost if total_cost else 0
+                self.payment_status = 'pending'
+        else:
+            # Efectivo, Transferencia - considerado como pagado
+            if total_cost:
+                self.paid_amount = total_cost
+            self.balance = 0
+            self.payment_status = 'paid'
     
     def remaining_balance(self):
         """Calcula el saldo pendiente"""
@@ -0,0 +1,110 @@
+"""
+Repuestos de una orden: aplica la lista pedida comparándola con la actual
+
+En lugar de borrar todos los repuestos, devolver su stock y volver a
+descontarlo uno por uno, se calcula la diferencia por producto y:
+- se bloquean solo los productos cuya cantidad cambia, en un único SELECT
+  ordenado (inventory.stock.lock_products);
+- se aplica la variación neta de stock en un único UPDATE y se registra
+  en el libro de movimientos (inventory.ledger);
+- se insertan, actualizan y borran solo los OrderPart que cambian.
+
+Editar una orden sin tocar sus repuestos cuesta una sola consulta.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from rest_framework import serializers
+
+from inventory import ledger
+from inventory.stock import lock_products
+from .models import OrderPart, RepairOrder
+
+
+def requested_quantities(parts_data):
+    """[{product_id|product, quantity}] -> {product_id: cantidad}, sumando repetidos"""
+    requested = defaultdict(int)
+    for item in parts_data:
+        try:
+            product_id = int(item.get('product_id') or item.get('product'))
+            quantity = int(item.get('quantity', 1))
+        except (TypeError, ValueError):
+            raise serializers.ValidationError('Cada repuesto necesita product_id y quantity numéricos.')
+        if quantity > 0:
+            requested[product_id] += quantity
+    return dict(requested)
+
+
+def apply_parts(order, parts_data, is_new=False, user=None):
+    """
+    Deja en la orden exactamente los repuestos de parts_data, ajustando el
+    stock por la diferencia. Debe llamarse dentro de una transacción.
+
+    Los repuestos que ya estaban conservan su precio unitario; los nuevos
+    toman el precio de venta actual del producto.
+    """
+    requested = requested_quantities(parts_data)
+    current = {} if is_new else {
+        part.product_id: part
+        for part in OrderPart.objects.select_for_update().filter(order=order)
+    }
+
+    used = {product_id: part.quantity for product_id, part in current.items()}
+
+    # Variación de stock por producto: lo que se devuelve menos lo que se usa
+    deltas = {
+        product_id: used.get(product_id, 0) - requested.get(product_id, 0)
+        for product_id in set(used) | set(requested)
+    }
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    products = lock_products(deltas.keys())
+
+    errors = []
+    for product_id, delta in deltas.items():
+        product = products.get(product_id)
+        if product is None:
+            errors.append(f'Producto con id={product_id} no encontrado.')
+        elif product.quantity + delta < 0:
+            errors.append(
+                f'Stock insuficiente para "{product.name}": '
+                f'disponible {product.quantity + used.get(product_id, 0)}, '
+                f'solicitado {requested[product_id]}.'
+            )
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    ledger.post(products, deltas, source='order', reference=order.order_number, user=user)
+
+    removed = [product_id for product_id in deltas if product_id not in requested]
+    added, changed = [], []
+    for product_id in deltas:
+        if product_id in removed:
+            continue
+        if product_id in current:
+            part = current[product_id]
+            part.quantity = requested[product_id]
+            changed.append(part)
+        else:
+            added.append(OrderPart(
+                order=order,
+                product_id=product_id,
+                quantity=requested[product_id],
+                unit_price=products[product_id].sale_price,
+            ))
+
+    if removed:
+        OrderPart.objects.filter(order=order, product_id__in=removed).delete()
+    if changed:
+        OrderPart.objects.bulk_update(changed, ['quantity'])
+    if added:
+        OrderPart.objects.bulk_create(added)
+
+    # Costo de repuestos de la orden con las partes finales (sin re-consultar)
+    final_parts = [part for product_id, part in current.items() if product_id not in removed] + added
+    parts_cost = sum((part.unit_price * part.quantity for part in final_parts), Decimal('0'))
+    # update() para no pasar por la lógica de saldo de save()
+    RepairOrder.objects.filter(pk=order.pk).update(parts_cost=parts_cost)
+    order.parts_cost = parts_cost
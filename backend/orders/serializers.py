@@ -3,9 +3,9 @@ Serializadores para el sistema de órdenes
 """
 from rest_framework import serializers
 from django.db import transaction
-from django.db.models import F
+from django.db.models import prefetch_related_objects
 from .models import Customer, RepairOrder, OrderStatusHistory, OrderPart
-from inventory.models import Product
+from .parts import apply_parts
 
 class CustomerSerializer(serializers.ModelSerializer):
     """Serializador para clientes"""
@@ -25,7 +25,11 @@ class CustomerSerializer(serializers.ModelSerializer):
         return obj.get_full_name()
     
     def get_orders_count(self, obj):
-        return obj.orders.count()
+        # Los listados anotan orders_count; se cuenta solo si no viene anotado
+        count = getattr(obj, 'orders_count', None)
+        if count is None:
+            count = obj.orders.count()
+        return count
 
 
 class OrderStatusHistorySerializer(serializers.ModelSerializer):
@@ -117,62 +121,12 @@ class RepairOrderSerializer(serializers.ModelSerializer):
     def get_labor_profit(self, obj):
         return float(obj.labor_profit())
 
-    # ------------------------------------------------------------------
-    # Helpers para manejo de stock
-    # ------------------------------------------------------------------
-
-    @staticmethod
-    def _restore_stock(order):
-        """Devuelve al inventario el stock de los repuestos actuales de la orden."""
-        for part in order.order_parts.select_related('product').all():
-            Product.objects.filter(pk=part.product_id).update(
-                quantity=F('quantity') + part.quantity
-            )
-
-    @staticmethod
-    def _apply_parts(order, parts_data):
-        """
-        Borra los repuestos anteriores de la orden y crea los nuevos,
-        descontando stock del inventario y recalculando parts_cost.
-        parts_data: lista de dicts con 'product_id' y 'quantity'.
-        """
-        order.order_parts.all().delete()
-
-        total_cost = 0
-        for item in parts_data:
-            product_id = int(item.get('product_id') or item.get('product'))
-            quantity = int(item.get('quantity', 1))
-            if quantity <= 0:
-                continue
-
-            try:
-                product = Product.objects.select_for_update().get(pk=product_id)
-            except Product.DoesNotExist:
-                raise serializers.ValidationError(
-                    f'Producto con id={product_id} no encontrado.'
-                )
-
-            if product.quantity < quantity:
-                raise serializers.ValidationError(
-                    f'Stock insuficiente para "{product.name}": '
-                    f'disponible {product.quantity}, solicitado {quantity}.'
-                )
-
-            OrderPart.objects.create(
-                order=order,
-                product=product,
-                quantity=quantity,
-                unit_price=product.sale_price,
-            )
-
-            product.quantity -= quantity
-            product.save(update_fields=['quantity'])
-
-            total_cost += float(product.sale_price) * quantity
-
-        # Actualizar parts_cost sin llamar al save() completo (evita lógica de balance)
-        RepairOrder.objects.filter(pk=order.pk).update(parts_cost=total_cost)
-        order.parts_cost = total_cost
+    def to_representation(self, instance):
+        # Tras crear/editar la orden (DRF descarta el prefetch al actualizar)
+        # los repuestos se cargan con su producto en una sola consulta
+        if 'order_parts' not in getattr(instance, '_prefetched_objects_cache', {}):
+            prefetch_related_objects([instance], 'order_parts__product')
+        return super().to_representation(instance)
 
     # ------------------------------------------------------------------
     # Create / Update
@@ -186,7 +140,7 @@ class RepairOrderSerializer(serializers.ModelSerializer):
         order = super().create(validated_data)
 
         if parts_data:
-            self._apply_parts(order, parts_data)
+            apply_parts(order, parts_data, is_new=True, user=self.context['request'].user)
 
         return order
 
@@ -210,10 +164,8 @@ class RepairOrderSerializer(serializers.ModelSerializer):
         order = super().update(instance, validated_data)
 
         if parts_data is not None:
-            # Primero restaurar el stock de los repuestos anteriores
-            self._restore_stock(order)
-            # Luego aplicar los nuevos (descuenta stock y guarda OrderPart)
-            self._apply_parts(order, parts_data)
+            # Ajusta stock y repuestos solo por la diferencia con los actuales
+            apply_parts(order, parts_data, user=self.context['request'].user)
 
         return order
 
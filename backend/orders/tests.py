@@ -0,0 +1,106 @@
+"""
+Tests de cantidad de consultas de clientes y órdenes
+"""
+from django.db.models import Count
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from core.models import User
+from inventory.models import Category, Product
+from .models import Customer, OrderPart, RepairOrder
+
+
+class OrderPartsQueryCountTests(TestCase):
+    """Crear o editar una orden con repuestos cuesta una cantidad fija de consultas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='tecnico', password='clave', role='admin')
+        cls.customer = Customer.objects.create(first_name='Ana', last_name='García', phone='1122334455')
+        category = Category.objects.create(name='Repuestos')
+        cls.products = [
+            Product.objects.create(
+                category=category, name=f'Repuesto {number}', sku=f'REP-{number}',
+                quantity=50, min_stock=1, unit_price=100, sale_price=150
+            )
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def parts(self, *products, quantity=1):
+        return [{'product_id': product.pk, 'quantity': quantity} for product in products]
+
+    def create_order(self, parts):
+        return self.client.post('/api/orders/orders/', {
+            'customer': self.customer.pk,
+            'device_type': 'phone',
+            'device_brand': 'Samsung',
+            'device_model': 'A52',
+            'problem_description': 'No enciende',
+            'parts': parts,
+        }, format='json')
+
+    def test_create_with_parts(self):
+        with self.assertNumQueries(16):
+            response = self.create_order(self.parts(*self.products))
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(OrderPart.objects.filter(order_id=response.data['id']).count(), 5)
+
+    def test_patch_with_same_parts(self):
+        order_id = self.create_order(self.parts(*self.products)).data['id']
+        with self.assertNumQueries(9):
+            response = self.client.patch(
+                f'/api/orders/orders/{order_id}/', {'parts': self.parts(*self.products)}, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_patch_with_changed_parts(self):
+        order_id = self.create_order(self.parts(*self.products[:3])).data['id']
+        with self.assertNumQueries(17):
+            response = self.client.patch(
+                f'/api/orders/orders/{order_id}/',
+                {'parts': self.parts(*self.products[1:], quantity=2)},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            dict(OrderPart.objects.filter(order_id=order_id).values_list('product_id', 'quantity')),
+            {product.pk: 2 for product in self.products[1:]}
+        )
+        for product in self.products:
+            product.refresh_from_db()
+        self.assertEqual([product.quantity for product in self.products], [50, 48, 48, 48, 48])
+
+
+class CustomerListQueryCountTests(TestCase):
+    """El listado de clientes anota orders_count: no cuenta fila por fila"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='clave', role='admin'))
+
+    def add_customers(self, count):
+        for number in range(count):
+            customer = Customer.objects.create(
+                first_name='Cliente', last_name=f'{count}-{number}', dni=f'{count:02d}{number:06d}',
+                phone=f'11{count:02d}{number:04d}'
+            )
+            for _ in range(number % 3):
+                RepairOrder.objects.create(
+                    customer=customer, device_type='phone', device_brand='Motorola',
+                    device_model='G60', problem_description='No carga'
+                )
+
+    def test_constant_queries(self):
+        for count in (2, 20):
+            self.add_customers(count)
+            with self.subTest(customers=Customer.objects.count()), self.assertNumQueries(2):
+                response = self.client.get('/api/orders/customers/')
+            self.assertEqual(response.status_code, 200)
+
+        counts = {row['id']: row['orders_count'] for row in response.data['results']}
+        expected = dict(Customer.objects.filter(pk__in=counts).values_list('pk').annotate(orders=Count('orders')))
+        self.assertEqual(counts, expected)
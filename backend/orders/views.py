@@ -5,10 +5,9 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count, Sum, Value
-from django.db.models.functions import Concat
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
 from .models import Customer, RepairOrder, OrderStatusHistory
 from .serializers import (
@@ -17,32 +16,93 @@ from .serializers import (
     RepairOrderDetailSerializer,
     OrderStatusHistorySerializer  
 )
-from core.permissions import IsAdminOrReadOnly
+from core.cache import cached
+from core.dates import filter_by_days, local_midnight, month_start, resolve_period
+from core.exports import Column, choice_label, full_name, period_filename, stream_csv
+from core.mixins import SerializerTimingMixin
+from core.permissions import IsAdmin, IsAdminOrReadOnly
+from core.search import apply_search
 
-class CustomerViewSet(viewsets.ModelViewSet):
+
+def with_order_relations(queryset):
+    """Carga las relaciones que muestra RepairOrderSerializer"""
+    return queryset.select_related(
+        'customer', 'assigned_to', 'created_by'
+    ).prefetch_related('order_parts__product')
+
+
+# Consultas de las acciones, compartidas con la verificación de planes
+# (core.query_plans)
+
+def open_orders_for(user):
+    """Órdenes asignadas al usuario que todavía no se cerraron"""
+    return RepairOrder.objects.filter(assigned_to=user).exclude(
+        status__in=RepairOrder.CLOSED_STATUSES
+    )
+
+
+def delivered_in_period(period):
+    """
+    Órdenes entregadas en el período: por delivered_date y, si no la tienen,
+    por received_date. Retorna los dos querysets.
+    """
+    delivered = RepairOrder.objects.filter(
+        status='delivered',
+        **period.lookups('delivered_date')
+    ).select_related('customer')
+    fallback = RepairOrder.objects.filter(
+        status='delivered',
+        delivered_date__isnull=True,
+        **period.lookups('received_date')
+    ).select_related('customer')
+    return delivered, fallback
+
+
+def orders_with_balance():
+    """Órdenes con saldo pendiente, sin importar el período"""
+    return RepairOrder.objects.filter(balance__gt=0)
+
+
+# Exportación de órdenes (y de las entregadas en caja)
+ORDER_EXPORT_COLUMNS = [
+    Column('Orden', 'order_number'),
+    Column('Recibida', 'received_date'),
+    Column('Entregada', 'delivered_date'),
+    Column('Estado', 'status', format=choice_label(RepairOrder.STATUS_CHOICES)),
+    Column('Cliente', 'customer__first_name', 'customer__last_name', format=full_name),
+    Column('DNI', 'customer__dni'),
+    Column('Teléfono', 'customer__phone'),
+    Column('Equipo', 'device_type', format=choice_label(RepairOrder.DEVICE_TYPES)),
+    Column('Marca', 'device_brand'),
+    Column('Modelo', 'device_model'),
+    Column('Técnico', 'assigned_to__username'),
+    Column('Presupuesto', 'estimated_cost'),
+    Column('Costo final', 'final_cost'),
+    Column('Costo repuestos', 'parts_cost'),
+    Column('Pagado', 'paid_amount'),
+    Column('Saldo', 'balance'),
+    Column('Método de pago', 'payment_method', format=choice_label(RepairOrder.PAYMENT_METHOD_CHOICES)),
+    Column('Estado de pago', 'payment_status', format=choice_label(RepairOrder.PAYMENT_STATUS_CHOICES)),
+]
+
+
+class CustomerViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de clientes
     """
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('last_name', 'first_name', 'id')
     
     def get_queryset(self):
-        queryset = Customer.objects.all()
+        queryset = Customer.objects.annotate(
+            orders_count=Count('orders')
+        ).order_by('last_name', 'first_name')
         search = self.request.query_params.get('search', None)
         
         if search:
-            queryset = queryset.annotate(
-                full_name=Concat('first_name', Value(' '), 'last_name')
-            ).filter(
-                Q(dni__icontains=search) |
-                Q(customer_number__icontains=search) |
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(full_name__icontains=search) |
-                Q(phone__icontains=search) |
-                Q(email__icontains=search)
-            )
+            queryset = apply_search(queryset, 'customer', search)
         
         return queryset
     
@@ -71,12 +131,12 @@ class CustomerViewSet(viewsets.ModelViewSet):
         GET /api/orders/customers/{id}/orders/
         """
         customer = self.get_object()
-        orders = customer.orders.all()
+        orders = with_order_relations(customer.orders.all())
         serializer = RepairOrderSerializer(orders, many=True)
         return Response(serializer.data)
 
 
-class RepairOrderViewSet(viewsets.ModelViewSet):
+class RepairOrderViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de órdenes de reparación
     """
@@ -84,6 +144,7 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         'customer', 'assigned_to', 'created_by'
     ).all()
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-received_date', '-id')
     
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -91,28 +152,16 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         return RepairOrderSerializer
     
     def get_queryset(self):
-        queryset = RepairOrder.objects.select_related(
-            'customer', 'assigned_to', 'created_by'
-        ).all()
+        queryset = with_order_relations(RepairOrder.objects.all())
         
         # Filtros
         search = self.request.query_params.get('search', None)
         status_filter = self.request.query_params.get('status', None)
         device_type = self.request.query_params.get('device_type', None)
         assigned_to = self.request.query_params.get('assigned_to', None)
-        date_from = self.request.query_params.get('date_from', None)
-        date_to = self.request.query_params.get('date_to', None)
         
         if search:
-            queryset = queryset.filter(
-                Q(order_number__icontains=search) |
-                Q(customer__first_name__icontains=search) |
-                Q(customer__last_name__icontains=search) |
-                Q(customer__phone__icontains=search) |
-                Q(device_brand__icontains=search) |
-                Q(device_model__icontains=search) |
-                Q(device_serial__icontains=search)
-            )
+            queryset = apply_search(queryset, 'order', search)
         
         if status_filter:
             queryset = queryset.filter(status=status_filter)
@@ -123,11 +172,7 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         if assigned_to:
             queryset = queryset.filter(assigned_to_id=assigned_to)
         
-        if date_from:
-            queryset = queryset.filter(received_date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(received_date__lte=date_to)
+        queryset = filter_by_days(queryset, 'received_date', self.request.query_params)
         
         return queryset
     
@@ -137,56 +182,79 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         Retorna estadísticas para el dashboard
         GET /api/orders/orders/dashboard/
         """
-        # Contadores por estado
-        status_counts = RepairOrder.objects.values('status').annotate(
-            count=Count('id')
+        today = timezone.localdate()
+        return Response(cached('orders', f'dashboard:{today}', self.dashboard_payload))
+
+    def dashboard_payload(self):
+        """
+        Todo el dashboard sale de una única consulta agrupada por técnico
+        con agregados condicionales; los totales se suman en Python sobre
+        las pocas filas resultantes.
+        """
+        today = timezone.localdate()
+        this_month = Q(received_date__gte=local_midnight(month_start(today)))
+        pending = ~Q(status__in=RepairOrder.CLOSED_STATUSES)
+        # Órdenes en trabajo con entrega estimada en los próximos 3 días
+        upcoming = Q(
+            status__in=RepairOrder.WORKING_STATUSES,
+            estimated_delivery__gte=today,
+            estimated_delivery__lte=today + timedelta(days=3)
         )
-        
-        status_dict = {item['status']: item['count'] for item in status_counts}
-        
-        # Estadísticas específicas
-        total_orders = RepairOrder.objects.count()
-        in_service_count = status_dict.get('in_service', 0)
-        ready_count = status_dict.get('ready', 0)
-        delivered_count = status_dict.get('delivered', 0)
-        
-        # Órdenes pendientes (no entregadas ni canceladas)
-        pending_orders = RepairOrder.objects.exclude(
-            status__in=['delivered', 'cancelled']
-        ).count()
-        
-        # Órdenes del mes actual
-        current_month = timezone.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        orders_this_month = RepairOrder.objects.filter(
-            received_date__gte=current_month
-        ).count()
-        
-        # Ingresos del mes
-        revenue_this_month = RepairOrder.objects.filter(
-            received_date__gte=current_month,
-            status='delivered'
-        ).aggregate(
-            total=Sum('final_cost')
-        )['total'] or 0
-        
-        # Órdenes próximas a vencer (estimación en los próximos 3 días)
-        upcoming_due = RepairOrder.objects.filter(
-            status__in=['received', 'in_repair'],
-            estimated_delivery__lte=timezone.now().date() + timedelta(days=3),
-            estimated_delivery__gte=timezone.now().date()
-        ).count()
-        
-        return Response({
-            'total_orders': total_orders,
-            'in_service_count': in_service_count,
-            'ready_count': ready_count,
-            'delivered_count': delivered_count,
+
+        rows = RepairOrder.objects.values(
+            'assigned_to', 'assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__username'
+        ).annotate(
+            total=Count('id'),
+            pending=Count('id', filter=pending),
+            this_month=Count('id', filter=this_month),
+            upcoming_due=Count('id', filter=upcoming),
+            revenue=Sum('final_cost', filter=this_month & Q(status='delivered')),
+            **{
+                f'status_{code}': Count('id', filter=Q(status=code))
+                for code, _ in RepairOrder.STATUS_CHOICES
+            }
+        ).order_by()
+
+        def total(field):
+            return sum(row[field] or 0 for row in rows)
+
+        status_dict = {
+            code: total(f'status_{code}')
+            for code, _ in RepairOrder.STATUS_CHOICES
+            if total(f'status_{code}')
+        }
+
+        # Carga de trabajo por técnico (órdenes abiertas)
+        workload = [
+            {
+                'technician_id': row['assigned_to'],
+                'technician_name': (
+                    f"{row['assigned_to__first_name']} {row['assigned_to__last_name']}".strip()
+                    or row['assigned_to__username']
+                ) if row['assigned_to'] else 'Sin asignar',
+                'pending': row['pending'],
+                'received': row['status_received'],
+                'in_service': row['status_in_service'],
+                'ready': row['status_ready'],
+                'upcoming_due': row['upcoming_due'],
+            }
+            for row in rows
+            if row['pending']
+        ]
+        workload.sort(key=lambda item: item['pending'], reverse=True)
+
+        return {
+            'total_orders': total('total'),
+            'in_service_count': status_dict.get('in_service', 0),
+            'ready_count': status_dict.get('ready', 0),
+            'delivered_count': status_dict.get('delivered', 0),
             'status_breakdown': status_dict,
-            'pending_orders': pending_orders,
-            'orders_this_month': orders_this_month,
-            'revenue_this_month': float(revenue_this_month),
-            'upcoming_due': upcoming_due
-        })
+            'pending_orders': total('pending'),
+            'orders_this_month': total('this_month'),
+            'revenue_this_month': float(total('revenue')),
+            'upcoming_due': total('upcoming_due'),
+            'technician_workload': workload,
+        }
     
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
@@ -194,7 +262,7 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         Actualiza el estado de una orden
         POST /api/orders/orders/{id}/update_status/
         Body: {
-            "status": "received|in_repair|ready|delivered|cancelled",
+            "status": "received|in_service|repaired|not_repaired|not_solved|ready|delivered|cancelled",
             "notes": "Notas opcionales"
         }
         """
@@ -243,11 +311,7 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         Retorna las órdenes asignadas al usuario actual
         GET /api/orders/orders/my_orders/
         """
-        orders = RepairOrder.objects.filter(
-            assigned_to=request.user
-        ).exclude(
-            status__in=['delivered', 'cancelled']
-        )
+        orders = with_order_relations(open_orders_for(request.user))
         
         serializer = self.get_serializer(orders, many=True)
         return Response(serializer.data)
@@ -257,32 +321,26 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         """
         Retorna las órdenes recibidas en un día específico (Carga Diaria)
         GET /api/orders/orders/daily_load/?date=2026-01-13
+        GET /api/orders/orders/daily_load/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
         Si no se proporciona fecha, retorna las del día actual
         """
-        from datetime import date
-        
-        date_param = request.query_params.get('date')
-        if date_param:
-            try:
-                target_date = datetime.strptime(date_param, '%Y-%m-%d').date()
-            except ValueError:
-                return Response(
-                    {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        else:
-            target_date = date.today()
+        try:
+            period = resolve_period(request.query_params, default='today')
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Filtrar órdenes recibidas en esa fecha
-        orders = RepairOrder.objects.filter(
-            received_date__date=target_date
-        ).order_by('-received_date')
+        # Filtrar órdenes recibidas en el rango
+        orders = with_order_relations(RepairOrder.objects.filter(
+            **period.lookups('received_date')
+        )).order_by('-received_date')
         
         serializer = self.get_serializer(orders, many=True)
         
         return Response({
-            'date': target_date,
-            'count': orders.count(),
+            'date': period.date_from,
+            'date_from': period.date_from,
+            'date_to': period.date_to,
+            'count': len(serializer.data),
             'orders': serializer.data
         })
     
@@ -293,47 +351,13 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         GET /api/orders/orders/caja/?period=today|week|month
         GET /api/orders/orders/caja/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
         """
-        from datetime import date
-
-        period = request.query_params.get('period', 'month')
-        date_from_param = request.query_params.get('date_from')
-        date_to_param = request.query_params.get('date_to')
-
-        today = date.today()
-
-        if date_from_param and date_to_param:
-            try:
-                date_from = datetime.strptime(date_from_param, '%Y-%m-%d').date()
-                date_to = datetime.strptime(date_to_param, '%Y-%m-%d').date()
-            except ValueError:
-                return Response(
-                    {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        elif period == 'today':
-            date_from = today
-            date_to = today
-        elif period == 'week':
-            date_from = today - timedelta(days=today.weekday())  # lunes de esta semana
-            date_to = today
-        else:  # month
-            date_from = today.replace(day=1)
-            date_to = today
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
         # Órdenes entregadas en el período (usando delivered_date o received_date)
-        delivered_orders = RepairOrder.objects.filter(
-            status='delivered',
-            delivered_date__date__gte=date_from,
-            delivered_date__date__lte=date_to
-        ).select_related('customer')
-
-        # Si no tienen delivered_date se usan las recibidas en el período
-        delivered_fallback = RepairOrder.objects.filter(
-            status='delivered',
-            delivered_date__isnull=True,
-            received_date__date__gte=date_from,
-            received_date__date__lte=date_to
-        ).select_related('customer')
+        delivered_orders, delivered_fallback = delivered_in_period(period)
 
         # Combinar ambos querysets
         from itertools import chain
@@ -345,14 +369,10 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
         total_labor_profit = sum(o.labor_profit() for o in all_delivered)
 
         # Saldo pendiente total (todas las órdenes, sin importar período)
-        pending_balance_total = RepairOrder.objects.filter(
-            balance__gt=0
-        ).aggregate(total=Sum('balance'))['total'] or 0
+        pending_balance_total = orders_with_balance().aggregate(total=Sum('balance'))['total'] or 0
 
         # Órdenes con saldo pendiente
-        pending_orders_qs = RepairOrder.objects.filter(
-            balance__gt=0
-        ).select_related('customer').order_by('-received_date')
+        pending_orders_qs = orders_with_balance().select_related('customer').order_by('-received_date')
 
         def order_to_dict(o):
             customer = o.customer
@@ -377,9 +397,9 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
             }
 
         return Response({
-            'period': period if not (date_from_param and date_to_param) else 'custom',
-            'date_from': date_from.strftime('%Y-%m-%d'),
-            'date_to': date_to.strftime('%Y-%m-%d'),
+            'period': period.period,
+            'date_from': period.date_from.strftime('%Y-%m-%d'),
+            'date_to': period.date_to.strftime('%Y-%m-%d'),
             'summary': {
                 'total_income': total_income,
                 'total_parts_cost': total_parts_cost,
@@ -392,6 +412,43 @@ class RepairOrderViewSet(viewsets.ModelViewSet):
             'pending_orders': [order_to_dict(o) for o in pending_orders_qs],
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
+    def export(self, request):
+        """
+        Exporta a CSV las órdenes recibidas en el período
+        GET /api/orders/orders/export/?period=today|week|month
+        GET /api/orders/orders/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        """
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = RepairOrder.objects.filter(
+            **period.lookups('received_date')
+        ).order_by('received_date', 'id')
+        return stream_csv(orders, ORDER_EXPORT_COLUMNS, period_filename('ordenes', period))
+
+    @action(detail=False, methods=['get'], url_path='caja/export',
+            permission_classes=[IsAuthenticated, IsAdmin])
+    def caja_export(self, request):
+        """
+        Exporta a CSV las órdenes entregadas en el período (mismo criterio que caja)
+        GET /api/orders/orders/caja/export/?period=today|week|month
+        GET /api/orders/orders/caja/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        """
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = RepairOrder.objects.filter(
+            Q(**period.lookups('delivered_date'))
+            | Q(delivered_date__isnull=True, **period.lookups('received_date')),
+            status='delivered'
+        ).order_by('received_date', 'id')
+        return stream_csv(orders, ORDER_EXPORT_COLUMNS, period_filename('caja_ordenes', period))
+
     @action(detail=True, methods=['post'])
     def add_payment(self, request, pk=None):
         """
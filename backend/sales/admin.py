@@ -2,7 +2,7 @@
 Configuración del admin para ventas
 """
 from django.contrib import admin
-from .models import Sale, SaleItem
+from .models import Sale, SaleItem, DailySalesSummary
 
 
 class SaleItemInline(admin.TabularInline):
@@ -19,6 +19,13 @@ class SaleAdmin(admin.ModelAdmin):
     readonly_fields = ('sale_number', 'date', 'subtotal', 'total', 'created_at', 'updated_at')
     inlines = [SaleItemInline]
     
+    def get_readonly_fields(self, request, obj=None):
+        # Vendedor, método de pago e importes ya están sumados en
+        # DailySalesSummary: no se editan en una venta registrada
+        if obj is not None:
+            return self.readonly_fields + ('employee', 'discount', 'payment_method')
+        return self.readonly_fields
+    
     fieldsets = (
         ('Información de la Venta', {
             'fields': ('sale_number', 'date', 'customer', 'customer_name', 'employee')
@@ -42,3 +49,9 @@ class SaleItemAdmin(admin.ModelAdmin):
     list_filter = ('sale__date',)
     search_fields = ('sale__sale_number', 'product__name')
     readonly_fields = ('subtotal',)
+
+
+@admin.register(DailySalesSummary)
+class DailySalesSummaryAdmin(admin.ModelAdmin):
+    list_display = ('day', 'payment_method', 'employee', 'sales_count', 'cancelled_count', 'total', 'balance')
+    list_filter = ('payment_method', 'day')
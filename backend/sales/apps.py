@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
 
 
 class SalesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'sales'
     verbose_name = 'Gestión de Ventas'
+
+    def ready(self):
+        # Los dashboards leen DailySalesSummary: borrar una venta la descuenta
+        from .rollups import sale_deleted
+        post_delete.connect(sale_deleted, sender='sales.Sale', dispatch_uid='sales.summary_delete')
@@ -0,0 +1,98 @@
+"""
+Cálculos de caja de ventas resueltos con agregaciones en SQL
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import DailySalesSummary, Sale, SaleItem
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal('0'), output_field=MONEY)
+
+
+def _money(value):
+    """Convierte un Decimal de la BD al float con 2 decimales que espera el frontend"""
+    return round(float(value or 0), 2)
+
+
+def period_sales(period):
+    """Ventas no anuladas del período (core.dates.DateRange)"""
+    return Sale.objects.filter(is_cancelled=False, **period.lookups('date'))
+
+
+def sales_with_balance():
+    """Ventas no anuladas con saldo pendiente (cuenta corriente), de cualquier fecha"""
+    return Sale.objects.filter(is_cancelled=False, balance__gt=0)
+
+
+def summaries_between(date_from, date_to):
+    """Resúmenes diarios de los días date_from..date_to (inclusive)"""
+    return DailySalesSummary.objects.filter(day__gte=date_from, day__lte=date_to)
+
+
+def summarize_period(period):
+    """
+    Totales del período (core.dates.DateRange) en dos consultas:
+    ingresos, descuentos y cantidad salen de DailySalesSummary; ingresos por
+    item y costo, de SaleItem.
+    """
+    totals = summaries_between(period.date_from, period.date_to).aggregate(
+        income=Coalesce(Sum('total'), ZERO),
+        discount=Coalesce(Sum('discount'), ZERO),
+        count=Coalesce(Sum('sales_count'), 0),
+    )
+    items = SaleItem.objects.filter(
+        sale__is_cancelled=False,
+        **period.lookups('sale__date')
+    ).aggregate(
+        revenue=Coalesce(Sum(F('quantity') * F('unit_price'), output_field=MONEY), ZERO),
+        cost=Coalesce(Sum(F('quantity') * F('unit_cost'), output_field=MONEY), ZERO),
+    )
+    return {
+        'total_income': _money(totals['income']),
+        'total_cost': _money(items['cost']),
+        'total_profit': _money(items['revenue'] - items['cost']),
+        'total_discount': _money(totals['discount']),
+        'sales_count': totals['count'],
+    }
+
+
+def with_row_totals(queryset):
+    """Anota cantidad de items, ingresos y costo por venta (una sola consulta)"""
+    return queryset.select_related('customer').annotate(
+        items_count=Count('items'),
+        items_revenue=Coalesce(
+            Sum(F('items__quantity') * F('items__unit_price'), output_field=MONEY), ZERO
+        ),
+        items_cost=Coalesce(
+            Sum(F('items__quantity') * F('items__unit_cost'), output_field=MONEY), ZERO
+        ),
+    ).order_by('-date')
+
+
+def sale_row(sale):
+    """Fila de caja para una venta anotada con with_row_totals()"""
+    if sale.customer:
+        customer_display = f"{sale.customer.first_name} {sale.customer.last_name}"
+    elif sale.customer_name:
+        customer_display = sale.customer_name
+    else:
+        customer_display = 'Consumidor Final'
+    return {
+        'id': sale.id,
+        'sale_number': sale.sale_number,
+        'customer_name': customer_display,
+        'items_count': sale.items_count,
+        'subtotal': float(sale.subtotal),
+        'discount': float(sale.discount),
+        'total': float(sale.total),
+        'cost': _money(sale.items_cost),
+        'profit': _money(sale.items_revenue - sale.items_cost),
+        'paid_amount': float(sale.paid_amount),
+        'balance': float(sale.balance),
+        'payment_method': sale.payment_method,
+        'payment_status': sale.payment_status,
+        'date': sale.date.strftime('%Y-%m-%d'),
+    }
@@ -0,0 +1,80 @@
+"""
+Cobro de ventas: alta del ticket, sus items y descuento de stock
+en una sola transacción y con cantidad de queries constante.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from rest_framework import serializers
+
+from core.sequences import next_number
+from inventory import ledger
+from inventory.stock import lock_products
+from .models import Sale, SaleItem
+from . import rollups
+
+
+@transaction.atomic
+def checkout(sale_data, items_data):
+    """
+    Crea una venta con sus items y descuenta el stock.
+
+    - Bloquea todos los productos involucrados con un único SELECT ordenado.
+    - Valida el stock de todas las líneas juntas (sumando líneas repetidas).
+    - Inserta los items con bulk_create y descuenta stock con un solo UPDATE,
+      registrando un movimiento de salida por producto (inventory.ledger).
+    - Calcula los totales en memoria, sin volver a consultar los items.
+    """
+    requested = defaultdict(int)
+    for item_data in items_data:
+        requested[item_data['product_id']] += item_data['quantity']
+
+    products = lock_products(requested.keys())
+
+    errors = []
+    for product_id, quantity in requested.items():
+        product = products.get(product_id)
+        if product is None:
+            errors.append(f"Producto con id={product_id} no encontrado.")
+        elif product.quantity < quantity:
+            errors.append(
+                f"Stock insuficiente para {product.name}. Disponible: {product.quantity}"
+            )
+    if errors:
+        raise serializers.ValidationError(errors)
+
+    sale = Sale(**sale_data)
+    sale.sale_number = next_number(Sale.NUMBER_PREFIX)
+
+    items = []
+    for item_data in items_data:
+        quantity = item_data['quantity']
+        unit_price = item_data['unit_price']
+        product = products[item_data['product_id']]
+        items.append(SaleItem(
+            product=product,
+            quantity=quantity,
+            unit_price=unit_price,
+            unit_cost=product.unit_price,
+            subtotal=quantity * unit_price,
+        ))
+
+    sale.apply_totals(sum(item.subtotal for item in items))
+    sale.save()
+    rollups.record_sale(sale)
+
+    for item in items:
+        item.sale = sale
+    SaleItem.objects.bulk_create(items)
+
+    ledger.post(
+        products,
+        {pk: -quantity for pk, quantity in requested.items()},
+        source='sale',
+        reference=sale.sale_number,
+        user=sale.employee,
+    )
+
+    # Los items ya están en memoria: evita re-consultarlos al serializar
+    sale._prefetched_objects_cache = {'items': items}
+    return sale
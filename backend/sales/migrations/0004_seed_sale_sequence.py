@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def seed_sale_sequence(apps, schema_editor):
+    """Inicializa el contador VTA con el mayor número de ticket existente"""
+    Sale = apps.get_model('sales', 'Sale')
+    Sequence = apps.get_model('core', 'Sequence')
+
+    last_value = 0
+    numbers = Sale.objects.filter(sale_number__startswith='VTA-').values_list('sale_number', flat=True)
+    for sale_number in numbers.iterator():
+        try:
+            last_value = max(last_value, int(sale_number.split('-')[1]))
+        except (IndexError, ValueError):
+            continue
+
+    Sequence.objects.update_or_create(prefix='VTA', defaults={'last_value': last_value})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sequence'),
+        ('sales', '0003_sale_cancellation_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_sale_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+
+AMOUNT_FIELDS = ('subtotal', 'discount', 'total', 'paid_amount', 'balance')
+
+
+def backfill_daily_sales_summary(apps, schema_editor):
+    """Genera los resúmenes diarios a partir de las ventas existentes"""
+    Sale = apps.get_model('sales', 'Sale')
+    DailySalesSummary = apps.get_model('sales', 'DailySalesSummary')
+
+    active = Q(is_cancelled=False)
+    rows = Sale.objects.annotate(day=TruncDate('date')).values(
+        'day', 'payment_method', 'employee'
+    ).annotate(
+        sales_count=Count('id', filter=active),
+        cancelled_count=Count('id', filter=~active),
+        **{field: Sum(field, filter=active) for field in AMOUNT_FIELDS}
+    ).order_by()
+
+    DailySalesSummary.objects.bulk_create(
+        [
+            DailySalesSummary(
+                day=row['day'],
+                payment_method=row['payment_method'],
+                employee_id=row['employee'],
+                sales_count=row['sales_count'],
+                cancelled_count=row['cancelled_count'],
+                **{field: row[field] or 0 for field in AMOUNT_FIELDS}
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_seed_sale_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Día')),
+                ('payment_method', models.CharField(choices=[('cash', 'Efectivo'), ('card', 'Tarjeta'), ('transfer', 'Transferencia'), ('multiple', 'Múltiple'), ('account', 'Cuenta Corriente')], max_length=20, verbose_name='Método de Pago')),
+                ('sales_count', models.IntegerField(default=0, verbose_name='Cantidad de ventas')),
+                ('cancelled_count', models.IntegerField(default=0, verbose_name='Ventas anuladas')),
+                ('subtotal', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Subtotal')),
+                ('discount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Descuento')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Monto Pagado')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Saldo Pendiente')),
+                ('employee', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales_summaries', to=settings.AUTH_USER_MODEL, verbose_name='Vendedor')),
+            ],
+            options={
+                'verbose_name': 'Resumen diario de ventas',
+                'verbose_name_plural': 'Resúmenes diarios de ventas',
+                'ordering': ['-day'],
+                'unique_together': {('day', 'payment_method', 'employee')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_sales_summary, migrations.RunPython.noop),
+    ]
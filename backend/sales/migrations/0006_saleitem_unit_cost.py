@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_unit_cost(apps, schema_editor):
+    """Completa el costo de los items históricos con el costo actual del producto"""
+    SaleItem = apps.get_model('sales', 'SaleItem')
+    Product = apps.get_model('inventory', 'Product')
+    SaleItem.objects.filter(unit_cost__isnull=True).update(
+        unit_cost=Subquery(
+            Product.objects.filter(pk=OuterRef('product_id')).values('unit_price')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_product_low_stock_idx'),
+        ('sales', '0005_daily_sales_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleitem',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Costo del producto al momento de la venta', max_digits=10, null=True, verbose_name='Costo Unitario'),
+        ),
+        migrations.RunPython(backfill_unit_cost, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from core.search import create_search_index, drop_search_index
+
+# Tabla -> columnas indexadas para búsqueda de texto
+SEARCH_INDEXES = {
+    'sales_sale': ['sale_number', 'customer_name'],
+}
+
+
+def create_indexes(apps, schema_editor):
+    for table, fields in SEARCH_INDEXES.items():
+        create_search_index(schema_editor, table, fields)
+
+
+def drop_indexes(apps, schema_editor):
+    for table, fields in SEARCH_INDEXES.items():
+        drop_search_index(schema_editor, table, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
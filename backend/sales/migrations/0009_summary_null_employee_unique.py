@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+AMOUNT_FIELDS = (
+    'sales_count', 'cancelled_count', 'subtotal', 'discount', 'total',
+    'paid_amount', 'balance',
+)
+
+
+def merge_null_employee_duplicates(apps, schema_editor):
+    """Une los resúmenes sin vendedor repetidos para el mismo día y método de pago"""
+    DailySalesSummary = apps.get_model('sales', 'DailySalesSummary')
+    duplicated = DailySalesSummary.objects.filter(employee__isnull=True).values(
+        'day', 'payment_method'
+    ).annotate(rows=Count('id')).filter(rows__gt=1)
+
+    for bucket in duplicated:
+        rows = list(DailySalesSummary.objects.filter(
+            employee__isnull=True, day=bucket['day'], payment_method=bucket['payment_method']
+        ).order_by('id'))
+        keep, extra = rows[0], rows[1:]
+        for field in AMOUNT_FIELDS:
+            setattr(keep, field, sum(getattr(row, field) for row in rows))
+        keep.save(update_fields=list(AMOUNT_FIELDS))
+        DailySalesSummary.objects.filter(pk__in=[row.pk for row in extra]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_null_employee_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailysalessummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('employee__isnull', True)), fields=('day', 'payment_method'), name='summary_day_method_no_employee_uniq'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 """
 Modelos para el sistema de ventas
 """
+from collections import defaultdict
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from core.cache import invalidate
 from inventory.models import Product
 from orders.models import Customer
 
@@ -14,6 +17,8 @@ class Sale(models.Model):
     """
     Modelo de ventas (tickets de venta)
     """
+    NUMBER_PREFIX = 'VTA'
+
     PAYMENT_METHOD_CHOICES = (
         ('cash', 'Efectivo'),
         ('card', 'Tarjeta'),
@@ -156,6 +161,21 @@ class Sale(models.Model):
         verbose_name = 'Venta'
         verbose_name_plural = 'Ventas'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['-date'], name='sale_date_idx'),
+            models.Index(fields=['is_cancelled', '-date'], name='sale_cancelled_date_idx'),
+            # Índices parciales (se omiten en motores que no los soportan)
+            models.Index(
+                fields=['-date'],
+                condition=models.Q(is_cancelled=False),
+                name='sale_active_date_idx'
+            ),
+            models.Index(
+                fields=['-date'],
+                condition=models.Q(balance__gt=0),
+                name='sale_pending_balance_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"Venta {self.sale_number}"
@@ -169,7 +189,12 @@ class Sale(models.Model):
     def calculate_totals(self):
         """Calcula subtotal y total basado en los items"""
         items = self.items.all()
-        self.subtotal = sum(item.subtotal for item in items)
+        self.apply_totals(sum(item.subtotal for item in items))
+        self.save()
+
+    def apply_totals(self, subtotal):
+        """Asigna subtotal, total, saldo y estado de pago sin guardar"""
+        self.subtotal = subtotal
         self.total = self.subtotal - self.discount
         
         # Calcular balance según método de pago
@@ -188,24 +213,53 @@ class Sale(models.Model):
             self.paid_amount = self.total
             self.balance = 0
             self.payment_status = 'paid'
-        
-        self.save()
 
     def cancel_sale(self, cancelled_by=None, reason=''):
-        """Anula la venta y reintegra stock de todos sus items."""
+        """
+        Anula la venta y reintegra stock de todos sus items. Debe llamarse
+        dentro de una transacción.
+
+        La marca de anulación se escribe primero con un UPDATE condicional:
+        toma el lock de la venta (y el de escritura en SQLite) antes de leer
+        los items, y si dos pedidos anulan la misma venta a la vez solo uno
+        reintegra el stock.
+        """
         if self.is_cancelled:
             return
 
-        for item in self.items.select_related('product').all():
-            product = item.product
-            product.quantity += item.quantity
-            product.save(update_fields=['quantity'])
-
+        cancelled_at = timezone.now()
+        cancelled = Sale.objects.filter(pk=self.pk, is_cancelled=False).update(
+            is_cancelled=True,
+            cancelled_at=cancelled_at,
+            cancelled_by=cancelled_by,
+            cancellation_reason=reason or '',
+        )
         self.is_cancelled = True
-        self.cancelled_at = timezone.now()
+        self.cancelled_at = cancelled_at
         self.cancelled_by = cancelled_by
         self.cancellation_reason = reason or ''
-        self.save(update_fields=['is_cancelled', 'cancelled_at', 'cancelled_by', 'cancellation_reason'])
+        if not cancelled:
+            return
+
+        returned = defaultdict(int)
+        for product_id, quantity in self.items.values_list('product_id', 'quantity'):
+            returned[product_id] += quantity
+
+        from inventory import ledger
+        from inventory.stock import lock_products
+        ledger.post(
+            lock_products(returned),
+            returned,
+            source='sale_cancel',
+            reference=self.sale_number,
+            user=cancelled_by,
+        )
+
+        from .rollups import record_cancellation
+        record_cancellation(self)
+
+        # update() no emite señales
+        invalidate('sales')
 
 
 class SaleItem(models.Model):
@@ -238,6 +292,15 @@ class SaleItem(models.Model):
         help_text='Precio al momento de la venta'
     )
     
+    unit_cost = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name='Costo Unitario',
+        help_text='Costo del producto al momento de la venta'
+    )
+    
     subtotal = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -252,6 +315,101 @@ class SaleItem(models.Model):
         return f"{self.quantity}x {self.product.name}"
     
     def save(self, *args, **kwargs):
-        """Calcula el subtotal antes de guardar"""
+        """
+        Calcula el subtotal antes de guardar. Un item nuevo sin costo toma
+        el costo actual del producto (como checkout) para que las
+        ganancias no lo cuenten como costo cero.
+        """
         self.subtotal = self.quantity * self.unit_price
+        if self.unit_cost is None and self._state.adding and self.product_id:
+            self.unit_cost = self.product.unit_price
         super().save(*args, **kwargs)
+
+
+class DailySalesSummary(models.Model):
+    """
+    Resumen diario de ventas por método de pago y vendedor.
+    Se actualiza de forma incremental desde sales.rollups al crear,
+    cobrar o anular una venta, y se puede reconstruir con el comando
+    rebuild_sales_summary.
+    """
+    day = models.DateField(
+        verbose_name='Día'
+    )
+    
+    payment_method = models.CharField(
+        max_length=20,
+        choices=Sale.PAYMENT_METHOD_CHOICES,
+        verbose_name='Método de Pago'
+    )
+    
+    employee = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='daily_sales_summaries',
+        verbose_name='Vendedor'
+    )
+    
+    sales_count = models.IntegerField(
+        default=0,
+        verbose_name='Cantidad de ventas'
+    )
+    
+    cancelled_count = models.IntegerField(
+        default=0,
+        verbose_name='Ventas anuladas'
+    )
+    
+    subtotal = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Subtotal'
+    )
+    
+    discount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Descuento'
+    )
+    
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Total'
+    )
+    
+    paid_amount = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Monto Pagado'
+    )
+    
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Saldo Pendiente'
+    )
+    
+    class Meta:
+        verbose_name = 'Resumen diario de ventas'
+        verbose_name_plural = 'Resúmenes diarios de ventas'
+        ordering = ['-day']
+        unique_together = ('day', 'payment_method', 'employee')
+        constraints = [
+            # unique_together no cubre employee NULL (los NULL son distintos)
+            models.UniqueConstraint(
+                fields=['day', 'payment_method'],
+                condition=models.Q(employee__isnull=True),
+                name='summary_day_method_no_employee_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} - {self.get_payment_method_display()} ({self.sales_count})"
@@ -0,0 +1,141 @@
+"""
+Mantenimiento incremental de DailySalesSummary.
+
+Cada venta suma sus importes al resumen de su día (hora local),
+método de pago y vendedor. Los dashboards leen los resúmenes en lugar de
+recorrer todos los tickets, por lo que el costo depende de la cantidad de
+días consultados y no de la cantidad de ventas.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.cache import invalidate
+from core.dates import local_midnight
+
+from .models import DailySalesSummary, Sale
+
+AMOUNT_FIELDS = ('subtotal', 'discount', 'total', 'paid_amount', 'balance')
+
+
+def _bucket(sale):
+    return {
+        'day': timezone.localdate(sale.date),
+        'payment_method': sale.payment_method,
+        'employee_id': sale.employee_id,
+    }
+
+
+def _apply(sale, create=True, **deltas):
+    """Suma los deltas al resumen de la venta, creándolo si no existe"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+
+    bucket = _bucket(sale)
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if DailySalesSummary.objects.filter(**bucket).update(**changes) or not create:
+        return
+
+    try:
+        with transaction.atomic():
+            DailySalesSummary.objects.create(**bucket, **deltas)
+    except IntegrityError:
+        # Otro proceso creó el resumen en paralelo
+        DailySalesSummary.objects.filter(**bucket).update(**changes)
+
+
+def record_sale(sale):
+    """Registra una venta nueva en el resumen de su día"""
+    _apply(
+        sale,
+        sales_count=1,
+        **{field: getattr(sale, field) for field in AMOUNT_FIELDS}
+    )
+
+
+def record_payment(sale, paid_delta, balance_delta):
+    """Registra un pago sobre una venta en cuenta corriente"""
+    _apply(sale, paid_amount=paid_delta, balance=balance_delta)
+
+
+def record_cancellation(sale):
+    """Descuenta una venta anulada del resumen de su día"""
+    _apply(
+        sale,
+        sales_count=-1,
+        cancelled_count=1,
+        **{field: -getattr(sale, field) for field in AMOUNT_FIELDS}
+    )
+
+
+def record_deletion(sale):
+    """
+    Quita del resumen una venta borrada (API, admin o shell). Una venta
+    anulada ya se había descontado: solo deja de contarse como anulada.
+    Si el resumen ya no existe (purgado) no hay nada que descontar.
+    """
+    if sale.is_cancelled:
+        _apply(sale, create=False, cancelled_count=-1)
+        return
+    _apply(
+        sale,
+        create=False,
+        sales_count=-1,
+        **{field: -getattr(sale, field) for field in AMOUNT_FIELDS}
+    )
+
+
+def sale_deleted(sender, instance, **kwargs):
+    """Receptor de post_delete de Sale (conectado en SalesConfig.ready)"""
+    record_deletion(instance)
+
+
+def summary_rows(sales):
+    """Agrega un queryset de ventas al formato de DailySalesSummary"""
+    active = Q(is_cancelled=False)
+    return sales.annotate(day=TruncDate('date')).values(
+        'day', 'payment_method', 'employee'
+    ).annotate(
+        sales_count=Count('id', filter=active),
+        cancelled_count=Count('id', filter=~active),
+        **{field: Sum(field, filter=active) for field in AMOUNT_FIELDS}
+    ).order_by()
+
+
+@transaction.atomic
+def rebuild(date_from=None, date_to=None):
+    """
+    Reconstruye los resúmenes del rango indicado (fechas locales, inclusive)
+    a partir de las ventas. Sin rango reconstruye todo el historial.
+    Retorna la cantidad de resúmenes generados.
+    """
+    summaries = DailySalesSummary.objects.all()
+    sales = Sale.objects.all()
+    if date_from:
+        summaries = summaries.filter(day__gte=date_from)
+        sales = sales.filter(date__gte=local_midnight(date_from))
+    if date_to:
+        summaries = summaries.filter(day__lte=date_to)
+        sales = sales.filter(date__lt=local_midnight(date_to + timedelta(days=1)))
+
+    summaries.delete()
+    created = DailySalesSummary.objects.bulk_create(
+        [
+            DailySalesSummary(
+                day=row['day'],
+                payment_method=row['payment_method'],
+                employee_id=row['employee'],
+                sales_count=row['sales_count'],
+                cancelled_count=row['cancelled_count'],
+                **{field: row[field] or 0 for field in AMOUNT_FIELDS}
+            )
+            for row in summary_rows(sales).iterator()
+        ],
+        batch_size=500
+    )
+    invalidate('sales')
+    return len(created)
@@ -3,11 +3,13 @@ Serializadores para el sistema de ventas
 """
 from rest_framework import serializers
 from .models import Sale, SaleItem
-from inventory.models import Product
+from .checkout import checkout
 
 
 class SaleItemSerializer(serializers.ModelSerializer):
     """Serializer para items de venta"""
+    # Se valida solo el id; el producto se busca (y bloquea) en lote al cobrar
+    product = serializers.IntegerField(source='product_id')
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
     
@@ -22,6 +24,9 @@ class SaleItemSerializer(serializers.ModelSerializer):
 
 class SaleSerializer(serializers.ModelSerializer):
     """Serializer para ventas"""
+    # Campos que suman en el resumen diario: solo se fijan al crear la venta
+    LOCKED_FIELDS = ('payment_method', 'paid_amount', 'discount')
+    
     items = SaleItemSerializer(many=True)
     customer_display = serializers.CharField(source='get_customer_display', read_only=True)
     employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
@@ -51,45 +56,28 @@ class SaleSerializer(serializers.ModelSerializer):
         if request and hasattr(request, 'user'):
             validated_data['employee'] = request.user
         
-        # Generar número de venta automáticamente
-        last_sale = Sale.objects.order_by('-id').first()
-        if last_sale and last_sale.sale_number:
-            try:
-                last_number = int(last_sale.sale_number.split('-')[1])
-                new_number = f"VTA-{last_number + 1:06d}"
-            except (IndexError, ValueError):
-                new_number = "VTA-000001"
-        else:
-            new_number = "VTA-000001"
-        
-        validated_data['sale_number'] = new_number
-        
-        # Crear la venta
-        sale = Sale.objects.create(**validated_data)
-        
-        # Crear los items y actualizar inventario
-        for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
-            
-            # Verificar stock disponible
-            if product.quantity < quantity:
-                raise serializers.ValidationError(
-                    f"Stock insuficiente para {product.name}. Disponible: {product.quantity}"
-                )
-            
-            # Crear el item
-            SaleItem.objects.create(sale=sale, **item_data)
-            
-            # Descontar del inventario
-            product.quantity -= quantity
-            product.save()
-        
-        # Calcular totales
-        sale.calculate_totals()
-        
-        return sale
+        return checkout(validated_data, items_data)
     
+    def validate(self, attrs):
+        """
+        Una venta registrada no cambia sus importes ni su método de pago:
+        están sumados en DailySalesSummary (sales.rollups). Los pagos van por
+        add_payment y las correcciones, anulando la venta.
+        """
+        if self.instance is not None:
+            errors = {}
+            if 'items' in attrs:
+                errors['items'] = ['Los items de una venta registrada no se pueden modificar.']
+            for field in self.LOCKED_FIELDS:
+                if field in attrs and attrs[field] != getattr(self.instance, field):
+                    errors[field] = [
+                        'No se puede modificar en una venta registrada; '
+                        'use add_payment o anule la venta.'
+                    ]
+            if errors:
+                raise serializers.ValidationError(errors)
+        return attrs
+
     def validate_items(self, items):
         """Valida que haya al menos un item"""
         if not items:
@@ -101,7 +89,7 @@ class SaleListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listado de ventas"""
     customer_display = serializers.CharField(source='get_customer_display', read_only=True)
     employee_name = serializers.CharField(source='employee.get_full_name', read_only=True)
-    items_count = serializers.IntegerField(source='items.count', read_only=True)
+    items_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Sale
@@ -109,3 +97,10 @@ class SaleListSerializer(serializers.ModelSerializer):
             'id', 'sale_number', 'date', 'customer_display',
             'total', 'payment_method', 'employee_name', 'items_count', 'is_cancelled'
         ]
+    
+    def get_items_count(self, obj):
+        # El listado anota items_count; se cuenta solo si no viene anotado
+        count = getattr(obj, 'items_count', None)
+        if count is None:
+            count = obj.items.count()
+        return count
@@ -0,0 +1,221 @@
+"""
+Tests del cobro de ventas y de los resúmenes diarios
+"""
+import os
+import threading
+
+from django.db import connections
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from core import sequences
+from core.models import User
+from inventory.models import Category, Product, StockMovement
+from .models import DailySalesSummary, Sale, SaleItem
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """
+    Varias cajas cobrando a la vez sobre los mismos productos. La carga se
+    ajusta con CHECKOUT_STRESS_SALES (ventas en total) y
+    CHECKOUT_STRESS_THREADS (cajas simultáneas).
+    """
+
+    SALES = int(os.environ.get('CHECKOUT_STRESS_SALES', '300'))
+    THREADS = int(os.environ.get('CHECKOUT_STRESS_THREADS', '10'))
+    INITIAL_STOCK = SALES + 50
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='caja', password='clave', role='employee')
+        category = Category.objects.create(name='Accesorios')
+        self.products = [
+            Product.objects.create(
+                category=category, name=f'Producto {number}', sku=f'SKU-{number}',
+                quantity=self.INITIAL_STOCK, min_stock=1, unit_price=100, sale_price=150
+            )
+            for number in range(3)
+        ]
+
+    def _sell(self, count, statuses, errors):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {
+            'payment_method': 'cash',
+            'items': [
+                {'product': product.pk, 'quantity': 1, 'unit_price': '150'}
+                for product in self.products
+            ],
+        }
+        try:
+            for _ in range(count):
+                response = client.post('/api/sales/sales/', payload, format='json')
+                statuses.append(response.status_code)
+        except Exception as error:  # noqa: BLE001 - se reporta en el assert
+            errors.append(repr(error))
+        finally:
+            connections.close_all()
+
+    def test_parallel_checkouts(self):
+        statuses, errors = [], []
+        # Reparte SALES entre las cajas (las primeras toman el resto)
+        share, extra = divmod(self.SALES, self.THREADS)
+        threads = [
+            threading.Thread(target=self._sell, args=(share + (number < extra), statuses, errors))
+            for number in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = self.SALES
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses, [201] * total)
+
+        numbers = list(Sale.objects.values_list('sale_number', flat=True))
+        self.assertEqual(len(numbers), total)
+        self.assertEqual(len(set(numbers)), total)
+
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.quantity, self.INITIAL_STOCK - total)
+
+            # El libro cuadra: una salida por venta y su suma es el stock vendido
+            movements = StockMovement.objects.filter(product=product)
+            self.assertEqual(movements.filter(source='sale').count(), total)
+            ledger_delta = movements.aggregate(
+                delta=Sum(F('new_quantity') - F('previous_quantity'))
+            )['delta']
+            self.assertEqual(ledger_delta, -total)
+            self.assertEqual(self.INITIAL_STOCK + ledger_delta, product.quantity)
+
+
+class SaleDeletionSummaryTests(TestCase):
+    """Borrar una venta la quita de los resúmenes que leen los dashboards"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='clave', role='admin')
+        cls.product = Product.objects.create(
+            category=Category.objects.create(name='Accesorios'), name='Funda',
+            sku='FUN-1', quantity=10, min_stock=1, unit_price=100, sale_price=150
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sell(self):
+        response = self.client.post('/api/sales/sales/', {
+            'payment_method': 'cash',
+            'items': [{'product': self.product.pk, 'quantity': 1, 'unit_price': '150'}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['id']
+
+    def totals(self):
+        return DailySalesSummary.objects.aggregate(
+            sales=Sum('sales_count'), cancelled=Sum('cancelled_count'), total=Sum('total')
+        )
+
+    def test_delete_removes_sale_from_summary(self):
+        sale_id = self.sell()
+        self.sell()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/sales/sales/{sale_id}/')
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(self.totals(), {'sales': 1, 'cancelled': 0, 'total': 150})
+        dashboard = self.client.get('/api/sales/sales/dashboard/').data
+        self.assertEqual(dashboard['sales_today'], {'count': 1, 'total': 150.0})
+        self.assertEqual(self.client.get('/api/sales/sales/daily_report/').data['total_sales'], 1)
+
+    def test_delete_cancelled_sale(self):
+        sale_id = self.sell()
+        self.assertEqual(self.client.post(f'/api/sales/sales/{sale_id}/cancel/').status_code, 200)
+        Sale.objects.get(pk=sale_id).delete()
+        self.assertEqual(self.totals(), {'sales': 0, 'cancelled': 0, 'total': 0})
+
+
+@override_settings(SEQUENCE_BLOCK_SIZE=100)
+class CheckoutQueryCountTests(TestCase):
+    """El cobro cuesta las mismas consultas sin importar la cantidad de líneas"""
+
+    # Lock de productos, SELECT, venta, resumen, items, movimientos y stock
+    # (más BEGIN/COMMIT), con el número tomado del bloque en memoria
+    CHECKOUT_QUERIES = 9
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='caja', password='clave', role='employee')
+        category = Category.objects.create(name='Accesorios')
+        cls.products = Product.objects.bulk_create([
+            Product(
+                category=category, name=f'Producto {number}', sku=f'SKU-{number}',
+                quantity=100, min_stock=1, unit_price=100, sale_price=150
+            )
+            for number in range(30)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        sequences._pools.clear()
+        # La primera venta reserva el bloque de números y crea el resumen del día
+        with self.captureOnCommitCallbacks(execute=True):
+            self.sell(1)
+        # El bloque queda en memoria pero el rollback del test revierte el
+        # contador: no debe llegar a los tests siguientes
+        self.addCleanup(sequences._pools.clear)
+
+    def sell(self, lines):
+        response = self.client.post('/api/sales/sales/', {
+            'payment_method': 'cash',
+            'items': [
+                {'product': product.pk, 'quantity': 1, 'unit_price': '150'}
+                for product in self.products[:lines]
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_constant_queries(self):
+        for lines in (1, 5, 30):
+            with self.subTest(lines=lines), self.assertNumQueries(self.CHECKOUT_QUERIES):
+                self.sell(lines)
+
+
+class SaleListQueryCountTests(TestCase):
+    """El listado de ventas anota items_count: no cuenta fila por fila"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='admin', password='clave', role='admin')
+        cls.product = Product.objects.create(
+            category=Category.objects.create(name='Accesorios'), name='Cable',
+            sku='CAB-1', quantity=100, min_stock=1, unit_price=10, sale_price=20
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_sales(self, count):
+        for number in range(count):
+            sale = Sale.objects.create(
+                sale_number=sequences.next_number(Sale.NUMBER_PREFIX),
+                payment_method='cash', subtotal=0, total=0, employee=self.user
+            )
+            for _ in range(number % 3 + 1):
+                SaleItem.objects.create(sale=sale, product=self.product, quantity=1, unit_price=20)
+
+    def test_constant_queries(self):
+        for count in (2, 20):
+            self.add_sales(count)
+            for url, queries in (('/api/sales/sales/', 2), ('/api/sales/sales/?cursor=', 1)):
+                with self.subTest(url=url, sales=Sale.objects.count()), self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+        counts = {row['id']: row['items_count'] for row in response.data['results']}
+        self.assertEqual(counts, {sale.pk: sale.items.count() for sale in Sale.objects.all()})
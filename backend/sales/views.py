@@ -5,22 +5,86 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q
+from django.db.models import Count, F, Q, Sum
 from django.db import transaction
 from django.utils import timezone
-from datetime import timedelta
 from decimal import Decimal
 from .models import Sale, SaleItem
+from . import rollups
 from .serializers import SaleSerializer, SaleListSerializer
+from .caja import (
+    period_sales, sale_row, sales_with_balance, summaries_between, summarize_period, with_row_totals,
+)
+from core.cache import cached
+from core.dates import DateRange, filter_by_days, month_start, previous_period, resolve_period
+from core.exports import Column, choice_label, full_name, period_filename, stream_csv
+from core.mixins import SerializerTimingMixin
 from core.permissions import IsAdmin
+from core.search import apply_search
 
+# Exportación de ventas: una fila por item con los datos del ticket
+SALE_EXPORT_COLUMNS = [
+    Column('Ticket', 'sale__sale_number'),
+    Column('Fecha', 'sale__date'),
+    Column(
+        'Cliente', 'sale__customer__first_name', 'sale__customer__last_name', 'sale__customer_name',
+        format=lambda first, last, name: full_name(first, last, name or 'Consumidor Final')
+    ),
+    Column('Vendedor', 'sale__employee__username'),
+    Column('Método de pago', 'sale__payment_method', format=choice_label(Sale.PAYMENT_METHOD_CHOICES)),
+    Column('Anulada', 'sale__is_cancelled'),
+    Column('SKU', 'product__sku'),
+    Column('Producto', 'product__name'),
+    Column('Cantidad', 'quantity'),
+    Column('Precio unitario', 'unit_price'),
+    Column('Costo unitario', 'unit_cost'),
+    Column('Subtotal item', 'subtotal'),
+    Column('Descuento ticket', 'sale__discount'),
+    Column('Total ticket', 'sale__total'),
+]
 
-class SaleViewSet(viewsets.ModelViewSet):
+# Exportación de caja: una fila por venta no anulada del período
+CAJA_EXPORT_COLUMNS = [
+    Column('Ticket', 'sale_number'),
+    Column('Fecha', 'date'),
+    Column(
+        'Cliente', 'customer__first_name', 'customer__last_name', 'customer_name',
+        format=lambda first, last, name: full_name(first, last, name or 'Consumidor Final')
+    ),
+    Column('Items', 'items_count'),
+    Column('Subtotal', 'subtotal'),
+    Column('Descuento', 'discount'),
+    Column('Total', 'total'),
+    Column('Costo', 'items_cost'),
+    Column('Ganancia', 'items_profit'),
+    Column('Pagado', 'paid_amount'),
+    Column('Saldo', 'balance'),
+    Column('Método de pago', 'payment_method', format=choice_label(Sale.PAYMENT_METHOD_CHOICES)),
+]
+
+
+def period_delta(current, previous):
+    """Valores del período anterior y variación contra el actual"""
+    change = (
+        round((current['total'] - previous['total']) / previous['total'] * 100, 2)
+        if previous['total'] else None
+    )
+    return {
+        'count': previous['count'],
+        'total': previous['total'],
+        'count_delta': current['count'] - previous['count'],
+        'total_delta': round(current['total'] - previous['total'], 2),
+        'total_change_percent': change,
+    }
+
+
+class SaleViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de ventas
     """
     queryset = Sale.objects.all()
     permission_classes = [IsAuthenticated]
+    cursor_ordering = ('-date', '-id')
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -28,85 +92,115 @@ class SaleViewSet(viewsets.ModelViewSet):
         return SaleSerializer
     
     def get_queryset(self):
-        queryset = Sale.objects.select_related('customer', 'employee', 'cancelled_by').prefetch_related('items__product')
+        queryset = Sale.objects.select_related(
+            'customer', 'employee', 'cancelled_by'
+        ).order_by('-date')
+        if self.action == 'list':
+            # El listado solo muestra la cantidad de items
+            queryset = queryset.annotate(items_count=Count('items'))
+        else:
+            queryset = queryset.prefetch_related('items__product')
         
         # Filtros
         search = self.request.query_params.get('search', None)
         payment_method = self.request.query_params.get('payment_method', None)
-        date_from = self.request.query_params.get('date_from', None)
-        date_to = self.request.query_params.get('date_to', None)
         
         if search:
-            queryset = queryset.filter(
-                Q(sale_number__icontains=search) |
-                Q(customer_name__icontains=search) |
-                Q(customer__first_name__icontains=search) |
-                Q(customer__last_name__icontains=search)
-            )
+            queryset = apply_search(queryset, 'sale', search)
         
         if payment_method:
             queryset = queryset.filter(payment_method=payment_method)
         
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
+        queryset = filter_by_days(queryset, 'date', self.request.query_params)
         
-        return queryset.order_by('-date')
+        return queryset
     
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """
         Retorna estadísticas del dashboard de ventas
+        GET /api/sales/sales/dashboard/
+        GET /api/sales/sales/dashboard/?compare=previous_period  (agrega variaciones)
         """
-        today = timezone.now().date()
-        month_start = today.replace(day=1)
-        active_sales = Sale.objects.filter(is_cancelled=False)
-        
-        # Ventas del día
-        today_sales = active_sales.filter(date__date=today)
-        sales_today_count = today_sales.count()
-        sales_today_total = today_sales.aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
-        # Ventas del mes
-        month_sales = active_sales.filter(date__gte=month_start)
-        sales_month_count = month_sales.count()
-        sales_month_total = month_sales.aggregate(
-            total=Sum('total')
-        )['total'] or 0
-        
+        today = timezone.localdate()
+        compare = request.query_params.get('compare') == 'previous_period'
+        return Response(cached(
+            'sales',
+            f'dashboard:{today}:{int(compare)}',
+            lambda: self.dashboard_payload(today, compare)
+        ))
+
+    def dashboard_payload(self, today, compare=False):
+        """
+        Dos consultas: una sobre los resúmenes diarios con agregados
+        condicionales por período (agrupada por método de pago) y otra para
+        los productos más vendidos. La comparación con el período anterior
+        agrega columnas a la primera consulta, no consultas nuevas.
+        """
+        periods = {'today': (today, today), 'month': (month_start(today), today)}
+        if compare:
+            periods['previous_today'] = previous_period(today, today)
+            periods['previous_month'] = previous_period(*periods['month'], by_month=True)
+
+        aggregates = {}
+        for name, (date_from, date_to) in periods.items():
+            in_period = Q(day__gte=date_from, day__lte=date_to)
+            aggregates[f'{name}_count'] = Sum('sales_count', filter=in_period)
+            aggregates[f'{name}_total'] = Sum('total', filter=in_period)
+
+        rows = summaries_between(
+            min(date_from for date_from, _ in periods.values()), today
+        ).values('payment_method').annotate(**aggregates).order_by()
+
+        def period_totals(name):
+            return {
+                'count': sum(row[f'{name}_count'] or 0 for row in rows),
+                'total': float(sum(row[f'{name}_total'] or 0 for row in rows)),
+            }
+
+        # Ventas por método de pago (mes actual)
+        payment_methods = sorted(
+            (
+                {
+                    'payment_method': row['payment_method'],
+                    'count': row['month_count'],
+                    'total': row['month_total'],
+                }
+                for row in rows
+                if row['month_count']
+            ),
+            key=lambda item: item['total'],
+            reverse=True
+        )
+
         # Productos más vendidos del mes
         top_products = SaleItem.objects.filter(
             sale__is_cancelled=False,
-            sale__date__gte=month_start
+            **DateRange(*periods['month']).lookups('sale__date')
         ).values(
             'product__name', 'product__sku'
         ).annotate(
             quantity=Sum('quantity'),
             total=Sum('subtotal')
         ).order_by('-quantity')[:5]
-        
-        # Ventas por método de pago (mes actual)
-        payment_methods = month_sales.values('payment_method').annotate(
-            count=Count('id'),
-            total=Sum('total')
-        ).order_by('-total')
-        
-        return Response({
-            'sales_today': {
-                'count': sales_today_count,
-                'total': float(sales_today_total)
-            },
-            'sales_month': {
-                'count': sales_month_count,
-                'total': float(sales_month_total)
-            },
+
+        payload = {
+            'sales_today': period_totals('today'),
+            'sales_month': period_totals('month'),
             'top_products': list(top_products),
-            'payment_methods': list(payment_methods)
-        })
+            'payment_methods': payment_methods
+        }
+
+        if compare:
+            payload['comparison'] = {
+                key: {
+                    'date_from': periods[f'previous_{name}'][0],
+                    'date_to': periods[f'previous_{name}'][1],
+                    **period_delta(payload[key], period_totals(f'previous_{name}'))
+                }
+                for key, name in (('sales_today', 'today'), ('sales_month', 'month'))
+            }
+        return payload
     
     @action(detail=True, methods=['post'])
     def add_payment(self, request, pk=None):
@@ -159,6 +253,7 @@ class SaleViewSet(viewsets.ModelViewSet):
             )
         
         # Actualizar la venta
+        previous_balance = Decimal(str(sale.balance))
         sale.paid_amount = Decimal(str(sale.paid_amount)) + amount
         sale.balance = Decimal(str(sale.total)) - sale.paid_amount
         
@@ -169,7 +264,9 @@ class SaleViewSet(viewsets.ModelViewSet):
         elif sale.paid_amount > 0:
             sale.payment_status = 'partial'
         
-        sale.save()
+        with transaction.atomic():
+            sale.save()
+            rollups.record_payment(sale, amount, sale.balance - previous_balance)
         
         # Retornar la venta actualizada
         serializer = self.get_serializer(sale)
@@ -205,125 +302,91 @@ class SaleViewSet(viewsets.ModelViewSet):
         GET /api/sales/sales/caja/?period=today|week|month
         GET /api/sales/sales/caja/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
         """
-        from datetime import date, datetime
-
-        period = request.query_params.get('period', 'month')
-        date_from_param = request.query_params.get('date_from')
-        date_to_param = request.query_params.get('date_to')
-
-        today = date.today()
-
-        if date_from_param and date_to_param:
-            try:
-                date_from = datetime.strptime(date_from_param, '%Y-%m-%d').date()
-                date_to = datetime.strptime(date_to_param, '%Y-%m-%d').date()
-            except ValueError:
-                return Response(
-                    {'error': 'Formato de fecha inválido. Use YYYY-MM-DD'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-        elif period == 'today':
-            date_from = today
-            date_to = today
-        elif period == 'week':
-            date_from = today - timedelta(days=today.weekday())
-            date_to = today
-        else:  # month
-            date_from = today.replace(day=1)
-            date_to = today
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Ventas del período
-        period_sales = Sale.objects.filter(
-            is_cancelled=False,
-            date__date__gte=date_from,
-            date__date__lte=date_to
-        ).prefetch_related('items__product').select_related('customer')
+        # Ventas con saldo pendiente (cuenta corriente)
+        pending_sales_qs = sales_with_balance()
+        pending = pending_sales_qs.aggregate(
+            total=Sum('balance'),
+            count=Count('id')
+        )
 
-        # Calcular totales del período
-        total_income = sum(float(s.total) for s in period_sales)
-        total_discount = sum(float(s.discount) for s in period_sales)
+        summary = summarize_period(period)
+        summary['pending_balance_total'] = float(pending['total'] or 0)
+        summary['pending_sales_count'] = pending['count']
 
-        # Ganancia = precio de venta - costo producto para cada item
-        total_profit = 0
-        total_cost = 0
-        for sale in period_sales:
-            for item in sale.items.all():
-                cost = float(item.product.unit_price) * item.quantity
-                revenue = float(item.unit_price) * item.quantity
-                total_cost += cost
-                total_profit += (revenue - cost)
+        return Response({
+            'period': period.period,
+            'date_from': period.date_from.strftime('%Y-%m-%d'),
+            'date_to': period.date_to.strftime('%Y-%m-%d'),
+            'summary': summary,
+            'sales': [sale_row(s) for s in with_row_totals(period_sales(period))],
+            'pending_sales': [sale_row(s) for s in with_row_totals(pending_sales_qs)],
+        })
 
-        # Saldo pendiente total en ventas (cuenta corriente)
-        pending_sales_qs = Sale.objects.filter(
-            is_cancelled=False,
-            balance__gt=0
-        ).prefetch_related('items__product').select_related('customer').order_by('-date')
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated, IsAdmin])
+    def export(self, request):
+        """
+        Exporta a CSV las ventas del período, una fila por item
+        GET /api/sales/sales/export/?period=today|week|month
+        GET /api/sales/sales/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        """
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
-        pending_balance_total = pending_sales_qs.aggregate(
-            total=Sum('balance')
-        )['total'] or 0
+        items = SaleItem.objects.filter(
+            **period.lookups('sale__date')
+        ).order_by('sale__date', 'sale_id', 'id')
+        return stream_csv(items, SALE_EXPORT_COLUMNS, period_filename('ventas', period))
 
-        def sale_to_dict(s):
-            sale_profit = 0
-            sale_cost = 0
-            for item in s.items.all():
-                cost = float(item.product.unit_price) * item.quantity
-                revenue = float(item.unit_price) * item.quantity
-                sale_cost += cost
-                sale_profit += (revenue - cost)
-            customer_display = ''
-            if s.customer:
-                customer_display = f"{s.customer.first_name} {s.customer.last_name}"
-            elif s.customer_name:
-                customer_display = s.customer_name
-            else:
-                customer_display = 'Consumidor Final'
-            return {
-                'id': s.id,
-                'sale_number': s.sale_number,
-                'customer_name': customer_display,
-                'items_count': s.items.count(),
-                'subtotal': float(s.subtotal),
-                'discount': float(s.discount),
-                'total': float(s.total),
-                'cost': round(sale_cost, 2),
-                'profit': round(sale_profit, 2),
-                'paid_amount': float(s.paid_amount),
-                'balance': float(s.balance),
-                'payment_method': s.payment_method,
-                'payment_status': s.payment_status,
-                'date': s.date.strftime('%Y-%m-%d'),
-            }
+    @action(detail=False, methods=['get'], url_path='caja/export',
+            permission_classes=[IsAuthenticated, IsAdmin])
+    def caja_export(self, request):
+        """
+        Exporta a CSV las ventas de caja del período con costo y ganancia
+        GET /api/sales/sales/caja/export/?period=today|week|month
+        GET /api/sales/sales/caja/export/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        """
+        try:
+            period = resolve_period(request.query_params)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({
-            'period': period if not (date_from_param and date_to_param) else 'custom',
-            'date_from': date_from.strftime('%Y-%m-%d'),
-            'date_to': date_to.strftime('%Y-%m-%d'),
-            'summary': {
-                'total_income': round(total_income, 2),
-                'total_cost': round(total_cost, 2),
-                'total_profit': round(total_profit, 2),
-                'total_discount': round(total_discount, 2),
-                'sales_count': len(list(period_sales)),
-                'pending_balance_total': float(pending_balance_total),
-                'pending_sales_count': pending_sales_qs.count(),
-            },
-            'sales': [sale_to_dict(s) for s in period_sales],
-            'pending_sales': [sale_to_dict(s) for s in pending_sales_qs],
-        })
+        sales = with_row_totals(period_sales(period)).annotate(
+            items_profit=F('items_revenue') - F('items_cost')
+        ).order_by('date', 'id')
+        return stream_csv(sales, CAJA_EXPORT_COLUMNS, period_filename('caja_ventas', period))
 
     @action(detail=False, methods=['get'])
     def daily_report(self, request):
         """
         Reporte de ventas del día (cierre de caja)
+        GET /api/sales/sales/daily_report/?date=YYYY-MM-DD (por defecto hoy)
+        GET /api/sales/sales/daily_report/?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        Los totales y el detalle cubren el mismo rango de días.
         """
-        date = request.query_params.get('date', timezone.now().date())
+        try:
+            period = resolve_period(request.query_params, default='today')
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
         
-        sales = Sale.objects.filter(date__date=date, is_cancelled=False)
+        sales = period_sales(period).select_related('customer', 'employee').annotate(
+            items_count=Count('items')
+        ).order_by('-date')
+        summaries = summaries_between(period.date_from, period.date_to)
         
         # Total por método de pago
-        by_payment = sales.values('payment_method').annotate(
-            count=Count('id'),
+        by_payment = summaries.values('payment_method').annotate(
+            count=Sum('sales_count'),
+            total=Sum('total')
+        ).filter(count__gt=0)
+        totals = summaries.aggregate(
+            count=Sum('sales_count'),
             total=Sum('total')
         )
         
@@ -331,9 +394,11 @@ class SaleViewSet(viewsets.ModelViewSet):
         sales_detail = SaleListSerializer(sales, many=True).data
         
         return Response({
-            'date': date,
-            'total_sales': sales.count(),
-            'total_amount': sales.aggregate(Sum('total'))['total'] or 0,
+            'date': period.date_from,
+            'date_from': period.date_from,
+            'date_to': period.date_to,
+            'total_sales': totals['count'] or 0,
+            'total_amount': totals['total'] or 0,
             'by_payment_method': list(by_payment),
             'sales': sales_detail
         })
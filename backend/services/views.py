@@ -6,9 +6,10 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from .models import Service
 from .serializers import ServiceSerializer
+from core.mixins import SerializerTimingMixin
 from core.permissions import IsAdminOrReadOnly
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de servicios
     """